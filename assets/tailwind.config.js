@@ -0,0 +1,11 @@
+/** Purge against every template and any Python that emits class names. */
+module.exports = {
+  content: [
+    "../templates/**/*.html",
+    "../standards/**/*.py",
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
@@ -41,7 +41,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "standards.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "standards.snapshots.SnapshotMiddleware",
+    "standards.assets.StaticAssetsMiddleware",
+    "standards.http.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -63,6 +67,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "standards.assets.asset_bundle",
             ],
         },
     },
@@ -78,9 +83,19 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # Published read-only copy of the corpus (standards.snapshots). NAME is only
+    # a placeholder: SnapshotMiddleware points each request's connection at the
+    # corpus-*.sqlite3 file named in the PMHUB_SNAPSHOTS["ROOT"]/CURRENT pointer.
+    "snapshot": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": (BASE_DIR / "snapshots" / "unpublished.sqlite3").as_uri() + "?mode=ro&immutable=1",
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+DATABASE_ROUTERS = ["standards.snapshots.SnapshotRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -118,7 +133,20 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# `manage.py build_assets` fills static/ (Tailwind bundle, vendored Chart.js)
+# and collects content-hashed copies plus .gz/.br variants into STATIC_ROOT.
+# AssetStorage serves hashed names once that manifest exists, plain ones before.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "standards.assets.AssetStorage"},
+}
 
+# Signed-cookie sessions: reads never hit django_session, and a session cookie
+# is only issued when a bookmark is toggled. standards.sessions also adopts old
+# database session keys so existing bookmarks survive the switch.
+SESSION_ENGINE = "standards.sessions"
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 30
 CSRF_TRUSTED_ORIGINS = ["http://localhost", "http://127.0.0.1"]
 
@@ -129,6 +157,131 @@ MEDIA_ROOT = BASE_DIR / "media"
 # Allow embedding pages (like our inline PDF) on same-origin
 X_FRAME_OPTIONS = "SAMEORIGIN"
 
+# Per-view profiling (opt-in): Server-Timing headers plus p50/p95/p99 per route
+# at /standards/profiling/. SAMPLE_RATE is the fraction of requests instrumented.
+PMHUB_PROFILING = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 0.1,
+    "WINDOW": 1000,
+    "SERVER_TIMING": True,
+}
+
+# Compress textual responses of at least COMPRESS_MIN_SIZE bytes (gzip).
+PMHUB_HTTP = {
+    "COMPRESS_MIN_SIZE": 1024,
+}
+
+# Concept (LSA) search index built by `manage.py build_lsa`; rebuild after ingest.
+PMHUB_LSA = {
+    "ROOT": BASE_DIR / "lsa",
+    "COMPONENTS": 128,
+}
+
+# Ingest job queue. Pages are committed every BATCH_SIZE pages so a crashed
+# job resumes from its last batch; jobs queued over HTTP must live in SOURCE_DIR.
+# MODE "fast" extracts PDF text with pypdf and leaves the pdfminer HTML to a
+# render on first page view and a queued backfill job (HTML_BACKFILL).
+PMHUB_INGEST = {
+    "SOURCE_DIR": BASE_DIR,
+    "BATCH_SIZE": 25,
+    "WORKERS": 1,
+    "POLL_INTERVAL": 2.0,
+    "STALE_AFTER": 300,
+    "MODE": "full",
+    "HTML_BACKFILL": True,
+}
+
+# Lines repeated on at least MIN_FRACTION of a standard's pages (running
+# headers/footers, copyright and licence stamps) are removed from the indexed
+# text after ingest; the original text is kept in Page.raw_content.
+PMHUB_BOILERPLATE = {
+    "ENABLED": True,
+    "MIN_FRACTION": 0.7,
+    "MIN_PAGES": 8,
+    "EDGE_LINES": 4,
+}
+
+# Images extracted at ingest, stored once per content hash under ROOT (default
+# MEDIA_ROOT/figures) with WebP variants at WIDTHS for srcset.
+PMHUB_FIGURES = {
+    "ROOT": MEDIA_ROOT / "figures",
+    "WIDTHS": [320, 640, 1280],
+    "QUALITY": 80,
+}
+
+# "Did you mean" for keyword search: a deletion index over the page_fts
+# vocabulary, rebuilt after every ingest (or `manage.py build_spelling`). Words
+# seen on fewer than MIN_DOCS pages are never suggested; with AUTO_APPLY a query
+# with no hits is re-run with the correction.
+PMHUB_SPELLING = {
+    "ROOT": BASE_DIR / "spelling",
+    "MAX_DISTANCE": 2,
+    "MIN_DOCS": 2,
+    "AUTO_APPLY": True,
+}
+
+# Ingest writes to the main database; after each job it is copied into an
+# immutable snapshot under ROOT (KEEP newest kept) that GET requests read with
+# mode=ro&immutable=1 and MMAP_SIZE bytes memory-mapped.
+PMHUB_SNAPSHOTS = {
+    "ENABLED": True,
+    "ROOT": BASE_DIR / "snapshots",
+    "KEEP": 2,
+    "MMAP_SIZE": 256 * 2**20,
+}
+
+# "Terms and definitions" clauses and glossaries are indexed after every ingest
+# (or `manage.py build_glossary`): the heading's section is read for up to
+# MAX_PAGES pages; fewer than MIN_ENTRIES entries means no glossary.
+PMHUB_GLOSSARY = {
+    "ENABLED": True,
+    "MAX_PAGES": 40,
+    "MIN_ENTRIES": 3,
+    "MAX_TERM_WORDS": 6,
+}
+
+# Clause headings and "see 4.3.2"-style references are extracted after every
+# ingest (or `manage.py build_crossrefs`). Pages with at least TOC_MIN_HEADINGS
+# heading lines making up TOC_DENSITY of the page are tables of contents; a
+# heading may skip at most MAX_STEP - 1 numbers lost in extraction.
+PMHUB_CROSSREFS = {
+    "ENABLED": True,
+    "TOC_MIN_HEADINGS": 8,
+    "TOC_DENSITY": 0.4,
+    "MAX_STEP": 3,
+}
+
+# Tailoring scenarios: the built-in ones are loaded from FILE (default
+# standards/data/scenarios.json) by migration 0013 and `manage.py build_scenarios`,
+# more can be added in the admin. Their evidence (RECOMMENDATIONS passages for
+# the keywords, EVIDENCE_PER_PHASE per phase) is stored on save and after ingest.
+PMHUB_SCENARIOS = {
+    "RECOMMENDATIONS": 100,
+    "EVIDENCE_PER_PHASE": 30,
+}
+
+# Server-rendered Process Design Documents (process-document/?format=html|md)
+# are stored under ROOT once streamed, keyed by scenario and corpus version, and
+# served as files from then on. BASE_URL makes their corpus links absolute.
+PMHUB_DOCUMENTS = {
+    "ENABLED": True,
+    "ROOT": MEDIA_ROOT / "documents",
+    "BASE_URL": "",
+}
+
+# Identical concurrent compare/insights/tailor requests share one computation;
+# per route at most CONCURRENCY run at once and QUEUE wait (up to QUEUE_TIMEOUT
+# seconds) before a 503 with Retry-After. Counters at /standards/flight/.
+PMHUB_FLIGHT = {
+    "ENABLED": True,
+    "WAIT_TIMEOUT": 60.0,
+    "ROUTES": {
+        "compare": {"CONCURRENCY": 2, "QUEUE": 16, "QUEUE_TIMEOUT": 15.0},
+        "insights": {"CONCURRENCY": 1, "QUEUE": 16, "QUEUE_TIMEOUT": 30.0},
+        "tailor": {"CONCURRENCY": 2, "QUEUE": 16, "QUEUE_TIMEOUT": 15.0},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -1,5 +1,9 @@
+from django import forms
 from django.contrib import admin
-from .models import Standard, Page, Bookmark
+from django.core.exceptions import ValidationError
+
+from . import jobs, scenarios
+from .models import Standard, Page, Definition, Clause, Scenario, Bookmark, IngestJob, CorpusVersion
 
 
 @admin.register(Standard)
@@ -18,9 +22,66 @@ class PageAdmin(admin.ModelAdmin):
         return (obj.content or "")[:80]
 
 
+@admin.register(Definition)
+class DefinitionAdmin(admin.ModelAdmin):
+    list_display = ("term", "standard", "clause", "key")
+    list_filter = ("standard",)
+    search_fields = ("term", "key", "definition")
+
+
+@admin.register(Clause)
+class ClauseAdmin(admin.ModelAdmin):
+    list_display = ("number", "title", "standard", "page")
+    list_filter = ("standard",)
+    search_fields = ("number", "title")
+    raw_id_fields = ("page",)
+
+
+class ScenarioForm(forms.ModelForm):
+    class Meta:
+        model = Scenario
+        fields = ("slug", "name", "spec")
+
+    def clean(self):  # type: ignore[no-untyped-def]
+        data = super().clean()
+        if isinstance(data.get("spec"), dict):
+            data["spec"] = {**data["spec"], "slug": data.get("slug"), "name": data.get("name")}
+            try:
+                scenarios.validate(data["spec"])
+            except ValidationError as exc:
+                self.add_error("spec", exc)
+        return data
+
+
+@admin.register(Scenario)
+class ScenarioAdmin(admin.ModelAdmin):
+    form = ScenarioForm
+    list_display = ("name", "slug", "builtin", "evidence_version", "updated_at")
+    readonly_fields = ("builtin", "evidence_version", "updated_at")
+
+    # Both bump CorpusVersion, which leaves the snapshot behind; the job runner
+    # publishes it rather than this request copying the whole database.
+    def save_model(self, request, obj, form, change):  # type: ignore[no-untyped-def]
+        super().save_model(request, obj, form, change)
+        scenarios.save(obj.spec, builtin=obj.builtin)
+        jobs.ensure_workers()
+
+    def delete_model(self, request, obj):  # type: ignore[no-untyped-def]
+        super().delete_model(request, obj)
+        CorpusVersion.bump()
+        jobs.ensure_workers()
+
+
 @admin.register(Bookmark)
 class BookmarkAdmin(admin.ModelAdmin):
     list_display = ("session_key", "page", "label", "created_at")
     list_filter = ("session_key", "page__standard")
 
+
+@admin.register(IngestJob)
+class IngestJobAdmin(admin.ModelAdmin):
+    list_display = ("file_path", "mode", "status", "pages_done", "pages_total", "pages_per_sec", "created_at")
+    list_filter = ("status", "mode")
+    readonly_fields = ("pages_done", "next_page_index", "pages_per_sec", "worker", "started_at", "finished_at", "updated_at")
+
 # Register your models here.
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class StandardsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "standards"
+
+    def ready(self) -> None:
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from . import snapshots
+
+        connection_created.connect(snapshots.configure_connection)
+        post_migrate.connect(snapshots.publish_after_migrate, sender=self)
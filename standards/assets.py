@@ -0,0 +1,155 @@
+"""Pre-built static bundle: detection, precompression and cache-friendly serving.
+
+``manage.py build_assets`` compiles the Tailwind bundle and vendors Chart.js
+into ``STATICFILES_DIRS``, then runs ``collectstatic`` so
+``ManifestStaticFilesStorage`` writes content-hashed copies to ``STATIC_ROOT``
+and finally writes ``.gz``/``.br`` siblings for the compressible ones.
+
+``StaticAssetsMiddleware`` serves ``STATIC_ROOT`` when ``DEBUG`` is off (the
+development server serves static files itself). Hashed names get a one-year
+``immutable`` lifetime and the precompressed variant the client accepts.
+Until the bundle has been built, templates fall back to the CDN scripts (see
+the ``asset_bundle`` context variable).
+"""
+
+import gzip
+import json
+import mimetypes
+from pathlib import Path
+from typing import Dict, List, Set
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, StaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpRequest, HttpResponse, HttpResponseNotAllowed, HttpResponseNotFound
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+
+BUNDLE = ["css/app.css", "vendor/chart.umd.min.js"]
+
+COMPRESSIBLE = {".css", ".js", ".map", ".svg", ".json", ".txt", ".html", ".xml"}
+MIN_COMPRESS_BYTES = 256
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=300"
+
+_manifest: Dict[str, object] = {"mtime": None, "paths": {}, "hashed": set()}
+
+
+def source_dir() -> Path:
+    return Path(settings.STATICFILES_DIRS[0])
+
+
+def manifest_paths() -> Dict[str, str]:
+    """``original name -> hashed name`` from the collectstatic manifest, reloaded when it changes."""
+    path = Path(settings.STATIC_ROOT) / "staticfiles.json"
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return {}
+    if _manifest["mtime"] != mtime:
+        paths = json.loads(path.read_text(encoding="utf-8")).get("paths", {})
+        _manifest.update(mtime=mtime, paths=paths, hashed=set(paths.values()))
+    return _manifest["paths"]  # type: ignore[return-value]
+
+
+def hashed_names() -> Set[str]:
+    manifest_paths()
+    return _manifest["hashed"]  # type: ignore[return-value]
+
+
+def bundle_ready() -> bool:
+    if settings.DEBUG:
+        return all((source_dir() / name).exists() for name in BUNDLE)
+    paths = manifest_paths()
+    return all(name in paths for name in BUNDLE)
+
+
+def asset_bundle(request: HttpRequest) -> dict:
+    """Context processor: whether templates can reference the built bundle."""
+    return {"asset_bundle": bundle_ready()}
+
+
+def precompress(root: Path) -> List[Path]:
+    """Write ``.gz`` (and ``.br`` when the ``brotli`` package is installed) next to compressible files."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    written: List[Path] = []
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE or path.name == "staticfiles.json":
+            continue
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_BYTES:
+            continue
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+        for suffix, payload in variants:
+            if len(payload) < len(data):
+                target = path.with_name(path.name + suffix)
+                target.write_bytes(payload)
+                written.append(target)
+    return written
+
+
+class AssetStorage(ManifestStaticFilesStorage):
+    """Hashed names from the manifest once ``collectstatic`` has written one, plain names until then.
+
+    ``ManifestStaticFilesStorage`` raises ``ValueError`` for every ``{% static %}``
+    (the admin's included) when ``DEBUG`` is off and no manifest exists yet.
+    """
+
+    def url(self, name, force=False):  # type: ignore[no-untyped-def]
+        if not force and not self.hashed_files:
+            return StaticFilesStorage.url(self, name)
+        return super().url(name, force)
+
+
+class StaticAssetsMiddleware:
+    """Serve ``STATIC_ROOT`` with far-future caching and precompressed variants."""
+
+    ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+    def __init__(self, get_response):  # type: ignore[no-untyped-def]
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = "/" + settings.STATIC_URL.lstrip("/")
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+        return self.serve(request, request.path[len(self.prefix):])
+
+    def serve(self, request: HttpRequest, name: str) -> HttpResponse:
+        try:
+            path = Path(safe_join(settings.STATIC_ROOT, name))
+        except Exception:
+            return HttpResponseNotFound()
+        if not path.is_file():
+            return HttpResponseNotFound()
+
+        content_type = mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+        encoding, served = self._variant(request, path)
+        stat = served.stat()
+        response = FileResponse(open(served, "rb"), content_type=content_type)
+        response["Content-Length"] = str(stat.st_size)
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Cache-Control"] = IMMUTABLE if name in hashed_names() else REVALIDATE
+        response["Vary"] = "Accept-Encoding"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        return response
+
+    def _variant(self, request: HttpRequest, path: Path):  # type: ignore[no-untyped-def]
+        accepted = request.headers.get("Accept-Encoding", "")
+        for encoding, suffix in self.ENCODINGS:
+            if encoding in accepted:
+                candidate = path.with_name(path.name + suffix)
+                if candidate.exists():
+                    return encoding, candidate
+        return None, path
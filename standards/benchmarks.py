@@ -0,0 +1,181 @@
+"""Synthetic corpora and timing helpers for the ``benchmark`` management command.
+
+Everything here runs against a throw-away SQLite database so the numbers are
+reproducible (fixed seed, fixed vocabulary) and independent of whatever has
+been ingested into ``db.sqlite3``.
+"""
+
+import contextlib
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+
+from . import passages, scenarios, stats
+from .models import Page, Standard
+
+
+STANDARD_TITLES = [
+    "A Guide to the Project Management Body of Knowledge (PMBOK Guide)",
+    "Managing Successful Projects with PRINCE2",
+    "ISO 21500-2021 Project, programme and portfolio management - Context and concepts",
+    "ISO 21502-2020 Project, programme and portfolio management - Guidance on project management",
+]
+
+# Domain terms are over-represented so the lifecycle/compare/tailor queries all hit.
+DOMAIN_TERMS = (
+    "project risk management stakeholder governance quality planning execution monitoring closing "
+    "procurement change communication business case benefits realisation value delivery sprint agile "
+    "iteration stage boundaries principles themes processes initiation charter requirements design "
+    "integration testing deployment closure lessons training handover compliance audit contract "
+    "schedule scope cost resource team sponsor board assurance tolerance exception product"
+).split()
+FILLER = (
+    "the of and to in a is that for on with as by be are this which or from at an it should can "
+    "organization approach information activities shall include ensure appropriate relevant"
+).split()
+
+SEARCH_QUERIES = ["risk", "stakeholder engagement", "governance OR assurance", "benefit*"]
+SEARCH_DEPTHS = [20, 100, 300]
+COMPARE_TOPICS = ["risk", "quality", "stakeholder", "change control"]
+SCENARIOS = ["custom_software", "innovative_product", "government_project"]
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    lines: List[str] = []
+    line: List[str] = []
+    for _ in range(words):
+        line.append(rng.choice(DOMAIN_TERMS) if rng.random() < 0.35 else rng.choice(FILLER))
+        if len(line) >= 12:
+            lines.append(" ".join(line))
+            line = []
+    if line:
+        lines.append(" ".join(line))
+    return "\n".join(lines)
+
+
+def populate(pages: int, seed: int = 1, words_per_page: int = 250, batch_size: int = 2000) -> None:
+    """Fill the current database with ``pages`` synthetic pages spread over four standards."""
+    rng = random.Random(seed)
+    standards = [
+        Standard.objects.create(title=title, file_path="", source_type="pdf")
+        for title in STANDARD_TITLES
+    ]
+    per_standard = pages // len(standards)
+    for n, standard in enumerate(standards):
+        count = per_standard if n < len(standards) - 1 else pages - per_standard * (len(standards) - 1)
+        batch: List[Page] = []
+        for idx in range(count):
+            batch.append(Page(standard=standard, page_index=idx, content=synthetic_text(rng, words_per_page)))
+            if len(batch) >= batch_size:
+                passages.index_pages(Page.objects.bulk_create(batch), replace=False)
+                batch = []
+        if batch:
+            passages.index_pages(Page.objects.bulk_create(batch), replace=False)
+        stats.refresh(standard, ingested=True)
+    scenarios.refresh()  # as ingest does, so tailor reads stored evidence
+
+
+@contextlib.contextmanager
+def temporary_database(directory: Path) -> Iterator[Path]:
+    """Point the default connection at a fresh, migrated SQLite file for the block; snapshots are off."""
+    db_settings = settings.DATABASES["default"]
+    original = db_settings["NAME"]
+    original_snapshots = getattr(settings, "PMHUB_SNAPSHOTS", {})
+    workdir = Path(tempfile.mkdtemp(dir=directory))
+    path = workdir / "bench.sqlite3"
+    connections["default"].close()
+    db_settings["NAME"] = path
+    settings.PMHUB_SNAPSHOTS = {**original_snapshots, "ENABLED": False}  # read the throw-away database itself
+    try:
+        call_command("migrate", verbosity=0, interactive=False)
+        yield path
+    finally:
+        connections["default"].close()
+        db_settings["NAME"] = original
+        settings.PMHUB_SNAPSHOTS = original_snapshots
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def time_call(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    ordered = sorted(samples)
+    return {
+        "runs": repeat,
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "min_ms": round(ordered[0], 3),
+    }
+
+
+def write_synthetic_pdf(path: Path, pages: int, seed: int = 1) -> None:
+    """Write a minimal text-only PDF (Helvetica, one content stream per page)."""
+    rng = random.Random(seed)
+    objects: List[bytes] = [b"", b""]  # 1: catalog, 2: page tree; filled in below
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")  # 3: font
+    page_ids: List[int] = []
+    for _ in range(pages):
+        lines = synthetic_text(rng, 250).split("\n")
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets: List[int] = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def write_synthetic_epub(path: Path, chapters: int, seed: int = 1) -> None:
+    from ebooklib import epub
+
+    rng = random.Random(seed)
+    book = epub.EpubBook()
+    book.set_identifier("pmhub-benchmark")
+    book.set_title("Synthetic Standard")
+    book.set_language("en")
+    items = []
+    for n in range(chapters):
+        paragraphs = "".join(f"<p>{synthetic_text(rng, 120)}</p>" for _ in range(12))
+        item = epub.EpubHtml(title=f"Chapter {n + 1}", file_name=f"chap_{n + 1}.xhtml", lang="en")
+        item.content = f"<html><body><h1>Chapter {n + 1}</h1>{paragraphs}</body></html>"
+        book.add_item(item)
+        items.append(item)
+    book.toc = items
+    book.spine = ["nav"] + items
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    epub.write_epub(str(path), book)
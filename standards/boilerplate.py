@@ -0,0 +1,126 @@
+"""Running header/footer and licence-stamp removal.
+
+A line is boilerplate when its normalised form (lower-cased, whitespace
+collapsed, digit runs replaced by ``#`` so page numbers and years match) occurs
+on at least ``MIN_FRACTION`` of a standard's pages. Lines without letters (bare
+page numbers) only count and are only removed within the first/last
+``EDGE_LINES`` non-blank lines of a page, so numbers in tables survive.
+
+``strip_standard`` rewrites ``Page.content`` (which ``page_fts`` indexes) and
+the page's passages, and keeps the original text in ``Page.raw_content``.
+Detection always starts from the raw text, so re-running it is idempotent.
+"""
+
+import re
+from collections import Counter, namedtuple
+from typing import FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import passages, stats
+from .models import CorpusVersion, Page, Standard
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MIN_FRACTION": 0.7,
+    "MIN_PAGES": 8,
+    "EDGE_LINES": 4,
+}
+
+LETTER_RE = re.compile(r"[^\W\d_]")
+DIGITS_RE = re.compile(r"\d+")
+SPACE_RE = re.compile(r"\s+")
+
+StripReport = namedtuple("StripReport", "pages changed lines chars_before chars_after")
+
+
+def boilerplate_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PMHUB_BOILERPLATE", {})}
+
+
+def line_key(line: str) -> str:
+    return SPACE_RE.sub(" ", DIGITS_RE.sub("#", line.lower())).strip()
+
+
+def _candidates(text: str, edge_lines: int) -> Iterable[Tuple[int, str]]:
+    """``(line number, key)`` for the lines of ``text`` that may be boilerplate."""
+    lines = text.split("\n")
+    nonblank = [i for i, line in enumerate(lines) if line.strip()]
+    edges = set(nonblank[:edge_lines] + nonblank[-edge_lines:])
+    for i in nonblank:
+        key = line_key(lines[i])
+        if i in edges or LETTER_RE.search(key):
+            yield i, key
+
+
+def detect(texts: Sequence[str], min_fraction: float, min_pages: int, edge_lines: int) -> FrozenSet[str]:
+    """Keys of lines repeated on at least ``min_fraction`` of ``texts``."""
+    if len(texts) < min_pages:
+        return frozenset()
+    counts: Counter = Counter()
+    for text in texts:
+        counts.update({key for _, key in _candidates(text, edge_lines)})
+    needed = max(2, min_fraction * len(texts))
+    return frozenset(key for key, n in counts.items() if n >= needed)
+
+
+def strip(text: str, keys: FrozenSet[str], edge_lines: int) -> Tuple[str, int]:
+    """``text`` without boilerplate lines, and how many lines were removed."""
+    if not keys or not text:
+        return text, 0
+    drop: Set[int] = {i for i, key in _candidates(text, edge_lines) if key in keys}
+    if not drop:
+        return text, 0
+    kept = [line for i, line in enumerate(text.split("\n")) if i not in drop]
+    return "\n".join(kept).strip("\n"), len(drop)
+
+
+def strip_standard(standard: Standard, dry_run: bool = False) -> StripReport:
+    """Detect and remove boilerplate across one standard's pages; re-index changed pages."""
+    config = boilerplate_settings()
+    pages: List[Page] = list(
+        Page.objects.filter(standard=standard)
+        .only("id", "standard_id", "page_index", "content", "raw_content")
+        .order_by("page_index")
+    )
+    sources = [page.raw_content or page.content for page in pages]
+    keys: FrozenSet[str] = frozenset()
+    if config["ENABLED"]:
+        keys = detect(sources, config["MIN_FRACTION"], config["MIN_PAGES"], config["EDGE_LINES"])
+
+    changed: List[Page] = []
+    lines = chars_after = 0
+    for page, source in zip(pages, sources):
+        text, removed = strip(source, keys, config["EDGE_LINES"])
+        lines += removed
+        chars_after += len(text)
+        if text != page.content:
+            page.content = text
+            page.raw_content = source if text != source else None
+            changed.append(page)
+
+    if changed and not dry_run:
+        with transaction.atomic():
+            Page.objects.bulk_update(changed, ["content", "raw_content"], batch_size=500)
+            passages.index_pages(changed)
+            stats.refresh(standard)
+            CorpusVersion.bump()
+    return StripReport(len(pages), len(changed), lines, sum(len(s) for s in sources), chars_after)
+
+
+def index_bytes() -> dict:
+    """Bytes held by each FTS5 index in the main database (its ``*_data`` shadow table)."""
+    with connection.cursor() as cursor:
+        sizes = {}
+        for table in ("page_fts", "passage_fts"):
+            cursor.execute(f"SELECT COALESCE(SUM(LENGTH(block)), 0) FROM {table}_data")
+            sizes[table] = cursor.fetchone()[0]
+    return sizes
+
+
+def optimize_indexes() -> None:
+    with connection.cursor() as cursor:
+        for table in ("page_fts", "passage_fts"):
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES('optimize')")
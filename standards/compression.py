@@ -0,0 +1,84 @@
+"""Transparent zlib compression for bulky page columns.
+
+Values are stored as ``<format byte><payload>`` blobs. Format 1 is raw deflate
+primed with ``ZDICT_V1``, a preset dictionary of the markup pdfminer's
+``HTMLConverter`` repeats on every text run. Rows written before compression
+was introduced are plain ``str`` and pass through untouched, so the column can
+be converted lazily.
+
+The dictionary is part of the on-disk format. To change it, add ``ZDICT_V2``
+under a new format byte and keep the old one readable.
+"""
+
+import zlib
+from functools import lru_cache
+from typing import Union
+
+from django.db import models
+
+
+FORMAT_DEFLATE_V1 = 1
+
+# Most frequent substrings go last: deflate finds the nearest (cheapest) match.
+ZDICT_V1 = (
+    '<html><head><meta http-equiv="Content-Type" content="text/html"></head><body>\n'
+    '<ul class="list-disc"><li></li></ul><p></p><h1></h1><h2></h2><h3></h3><table><tr><td></td></tr></table>'
+    'ISO 21500 21502 PRINCE2 PMBOK project programme portfolio management organization stakeholders '
+    'governance risk quality requirements shall should International Standard '
+    '<div style="position:absolute; top:50px;"><a name="1">Page 1</a></div>\n'
+    '<span style="position:absolute; border: gray 1px solid; left:0px; top:50px; width:595px; height:841px;"></span>\n'
+    '<span style="position:absolute; border: gray 1px solid; left:0px; top:50px; width:612px; height:792px;"></span>\n'
+    '<span style="font-family: Cambria-Bold; font-size:12px">'
+    '<span style="font-family: Calibri; font-size:11px">'
+    '<span style="font-family: TimesNewRomanPSMT; font-size:12px">'
+    '<span style="font-family: ArialMT; font-size:10px">'
+    '<span style="font-family: Cambria-Italic; font-size:10px">'
+    '<span style="font-family: Cambria; font-size:11px">'
+    '<div style="position:absolute; border: textbox 1px solid; writing-mode:lr-tb; left:36px; top:'
+    '<div style="position:absolute; border: textbox 1px solid; writing-mode:lr-tb; left:'
+    'px; top:px; width:px; height:px;"><span style="font-family: '
+    '; font-size:px">\n<br/></span></div>'
+    '<br/></span></div><div style="position:absolute; border: textbox 1px solid; writing-mode:lr-tb; left:'
+).encode("utf-8")
+
+_ZDICTS = {FORMAT_DEFLATE_V1: ZDICT_V1}
+
+
+def compress(text: str, level: int = 9) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=ZDICT_V1)
+    return bytes([FORMAT_DEFLATE_V1]) + compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+
+@lru_cache(maxsize=256)
+def decompress(blob: bytes) -> str:
+    """Inverse of ``compress``. Cached on the blob itself, so re-ingested pages can never be served stale."""
+    zdict = _ZDICTS.get(blob[0])
+    if zdict is None:
+        raise ValueError(f"Unknown compressed text format {blob[0]}")
+    decompressor = zlib.decompressobj(-15, zdict=zdict)
+    return (decompressor.decompress(blob[1:]) + decompressor.flush()).decode("utf-8")
+
+
+class CompressedTextField(models.TextField):
+    """TextField stored as a compressed blob.
+
+    SQLite keeps BLOB values as-is in a TEXT column, so the schema does not
+    change and uncompressed legacy values still read back correctly. Only
+    saved values are compressed; since SQL cannot see inside the blobs, the
+    only lookup allowed is ``isnull`` (``contains`` and friends raise
+    ``FieldError`` instead of silently comparing against compressed bytes).
+    """
+
+    def from_db_value(self, value, expression, connection):  # type: ignore[no-untyped-def]
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(bytes(value))
+        return value
+
+    def get_db_prep_save(self, value, connection) -> Union[bytes, str, None]:  # type: ignore[no-untyped-def]
+        value = super().get_db_prep_save(value, connection)
+        if value is None or value == "" or hasattr(value, "as_sql"):
+            return value  # expressions (bulk_update's CASE) compress their own Value()s
+        return compress(value)
+
+    def get_lookup(self, lookup_name):  # type: ignore[no-untyped-def]
+        return super().get_lookup(lookup_name) if lookup_name == "isnull" else None
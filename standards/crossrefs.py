@@ -0,0 +1,251 @@
+"""Clause headings and the in-text cross-references between them.
+
+Ingest calls ``index_standard`` after boilerplate stripping. It reads every
+page once and stores:
+
+``Clause``            numbered headings (``4.3.2  Business case``, ``Annex A``)
+                      with the page each one starts on
+``ClauseReference``   ``see 4.3.2``, ``(see Clause 6)``, ``Annexes A and B``
+                      or ``(3.20)``: source page and clause → target clause
+
+A heading candidate is a line starting with a clause number and a capitalised
+title. Tables of contents (pages that are mostly such lines) are skipped, and
+a candidate is only accepted if it can follow the previous heading (next
+sibling, a child, or the next clause at a higher level, allowing for a couple
+of headings lost in extraction), which rejects numbered figure legends and
+lists. References resolve to the deepest known clause (``3.20`` → ``3`` when
+term entries have no heading); references to the clause they appear in are
+dropped.
+
+Page views and the graph endpoint then only read these tables through their
+foreign-key indexes; nothing is parsed per request.
+"""
+
+import re
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .glossary import LEADER_RE
+from .models import Clause, ClauseReference, Page, Standard
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "TOC_MIN_HEADINGS": 8,
+    "TOC_DENSITY": 0.4,
+    "MAX_STEP": 3,
+}
+
+Heading = namedtuple("Heading", "page_id number title")
+Reference = namedtuple("Reference", "page_id source target label")  # source/target: clause numbers
+
+NUMBER = r"(?:\d{1,2}(?:\.\d{1,3}){0,5}|[A-Z](?:\.\d{1,3}){1,5})"  # "4.3.2", "A.1"
+NAMED = r"(?:\d{1,2}(?:\.\d{1,3}){0,5}|[A-Z](?:\.\d{1,3}){0,5})"  # also "A" after "Annex"
+
+
+def _listed(number: str) -> str:
+    return r"(" + number + r"(?:\s*(?:,|and|or|to|–|-)\s*" + number + r")*)(?![\w.]\w)"
+
+
+HEADING_RE = re.compile(r"^\s*(" + NUMBER + r")\s+([A-Z][^\n]{1,200}?)\s*$")
+ANNEX_RE = re.compile(r"^\s*Annex\s+([A-Z])\s+\((?:informative|normative)\)\s*(.*)$")
+LONE_RE = re.compile(r"^\s*(?:" + NUMBER + r"|Annex\s+[A-Z])\s*$")
+REFERENCE_RES = [
+    re.compile(r"\b(?i:(?:sub)?clauses?|sections?|chapters?|annex(?:es)?)\s+" + _listed(NAMED)),
+    re.compile(r"\bsee(?:\s+also)?\s+" + _listed(NUMBER)),
+    re.compile(r"\((\d{1,2}(?:\.\d{1,3}){1,5})\)"),  # ISO term cross-references
+]
+SPLIT_RE = re.compile(NAMED)
+SPACE_RE = re.compile(r"\s+")
+
+
+def crossrefs_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PMHUB_CROSSREFS", {})}
+
+
+def _parts(number: str) -> Tuple[object, ...]:
+    return tuple(int(p) if p.isdigit() else p for p in number.split("."))
+
+
+def _follows(previous: Tuple[object, ...], candidate: Tuple[object, ...], max_step: int) -> bool:
+    """Whether heading ``candidate`` can come right after ``previous`` in a document."""
+    for level in range(len(previous) + 1):
+        if candidate[:level] != previous[:level] or len(candidate) <= level:
+            continue
+        before = previous[level] if level < len(previous) else 0
+        value = candidate[level]
+        if isinstance(value, str) or isinstance(before, str):
+            step = ord(str(value)) - ord(str(before)) if isinstance(value, str) and isinstance(before, str) else 1
+        else:
+            step = value - before
+        if 1 <= step <= max_step and all(isinstance(p, int) and p <= max_step for p in candidate[level + 1:]):
+            return True
+    return False
+
+
+def _is_contents(lines: List[str], config: dict) -> bool:
+    if sum(1 for line in lines if LEADER_RE.search(line)) >= 3:
+        return True
+    candidates = sum(1 for line in lines if HEADING_RE.match(line))
+    return candidates >= config["TOC_MIN_HEADINGS"] and candidates >= config["TOC_DENSITY"] * len(lines)
+
+
+def _lines(pages: Sequence[Tuple[int, str]], config: dict) -> List[Tuple[int, str]]:
+    """Non-blank ``(page_id, line)`` outside tables of contents, with a lone number joined to the title below it."""
+    out: List[Tuple[int, str]] = []
+    for page_id, text in pages:
+        lines = [line.strip() for line in text.split("\n") if line.strip()]
+        if _is_contents(lines, config):
+            continue
+        for line in lines:
+            last = out[-1][1] if out else ""
+            annex = ANNEX_RE.match(last)
+            if (LONE_RE.match(last) or (annex and not annex.group(2))) and (line[:1].isupper() or line.startswith("(")):
+                out[-1] = (out[-1][0], f"{last}  {line}")
+            else:
+                out.append((page_id, line))
+    return out
+
+
+def headings(pages: Sequence[Tuple[int, str]]) -> List[Heading]:
+    """Accepted clause headings in document order."""
+    config = crossrefs_settings()
+    max_step = int(config["MAX_STEP"])
+    found: List[Heading] = []
+    seen: Dict[str, Heading] = {}
+    previous: Tuple[object, ...] = ()
+    for page_id, line in _lines(pages, config):
+        annex = ANNEX_RE.match(line)
+        if annex:
+            if annex.group(1) in seen:
+                continue
+            number, title = annex.groups()
+            parts: Tuple[object, ...] = (number,)
+        else:
+            match = HEADING_RE.match(line)
+            if match is None or match.group(1) in seen:
+                continue
+            number, title = match.groups()
+            parts = _parts(number)
+            if isinstance(parts[0], str) and parts[0] not in seen:
+                continue  # "A.1" without "Annex A"
+            if not _follows(previous, parts, max_step):
+                continue
+        heading = Heading(page_id, number, SPACE_RE.sub(" ", title).strip()[:255])
+        previous = parts
+        seen[number] = heading
+        found.append(heading)
+    return found
+
+
+def _resolve(number: str, known: Dict[str, Heading]) -> Optional[str]:
+    parts = number.split(".")
+    while parts:
+        if ".".join(parts) in known:
+            return ".".join(parts)
+        parts.pop()
+    return None
+
+
+def references(pages: Sequence[Tuple[int, str]], found: List[Heading]) -> List[Reference]:
+    """Resolved in-text references, one per (page, target clause)."""
+    known = {h.number: h for h in found}
+    by_page: Dict[int, List[Heading]] = {}
+    for heading in found:
+        by_page.setdefault(heading.page_id, []).append(heading)
+    out: Dict[Tuple[int, str], Reference] = {}
+    current: Optional[str] = None
+    config = crossrefs_settings()
+    for page_id, text in pages:
+        if _is_contents([line for line in text.split("\n") if line.strip()], config):
+            continue
+        joined = SPACE_RE.sub(" ", text)
+        # Where each heading on this page starts, to attribute references to the clause they are written in.
+        starts = []
+        for heading in by_page.get(page_id, []):
+            at = joined.find(f"Annex {heading.number} " if heading.number.isalpha() else f"{heading.number} ")
+            starts.append((at if at >= 0 else 0, heading.number))
+        starts.sort()
+        spans = []
+        for pattern in REFERENCE_RES:
+            for match in pattern.finditer(joined):
+                spans.append((match.start(), match.group(1)))
+        spans.sort()
+        position = 0
+        for start, numbers in spans:
+            while position < len(starts) and starts[position][0] <= start:
+                current = starts[position][1]
+                position += 1
+            for label in SPLIT_RE.findall(numbers):
+                target = _resolve(label, known)
+                if target is None or target == current or (page_id, target) in out:
+                    continue
+                out[(page_id, target)] = Reference(page_id, current, target, label)
+        for _, number in starts[position:]:
+            current = number
+    return list(out.values())
+
+
+def index_standard(standard: Standard) -> Tuple[int, int]:
+    """Replace ``standard``'s clauses and references; returns how many of each."""
+    if not crossrefs_settings()["ENABLED"]:
+        return 0, 0
+    pages = list(Page.objects.filter(standard=standard).order_by("page_index").values_list("id", "content"))
+    found = headings(pages)
+    refs = references(pages, found)
+    with transaction.atomic():
+        Clause.objects.filter(standard=standard).delete()
+        clauses = {
+            c.number: c
+            for c in Clause.objects.bulk_create(
+                Clause(standard=standard, page_id=h.page_id, number=h.number, title=h.title) for h in found
+            )
+        }
+        ClauseReference.objects.bulk_create(
+            ClauseReference(
+                standard=standard,
+                page_id=r.page_id,
+                source=clauses.get(r.source) if r.source else None,
+                target=clauses[r.target],
+                label=r.label,
+            )
+            for r in refs
+        )
+    return len(found), len(refs)
+
+
+def page_links(page: Page) -> dict:
+    """Clauses starting on ``page``, the clauses it references, and the references pointing at its clauses."""
+    heavy = ("content", "content_html", "raw_content")
+    return {
+        "clauses": list(page.clauses.all()),
+        "references": list(
+            page.clause_references.select_related("target__page")
+            .defer(*(f"target__page__{field}" for field in heavy))
+            .order_by("target_id")
+        ),
+        "referenced_by": list(
+            ClauseReference.objects.filter(target__page=page)
+            .select_related("page", "source", "target")
+            .defer(*(f"page__{field}" for field in heavy))
+            .order_by("page__page_index", "id")
+        ),
+    }
+
+
+def graph(standard: Standard) -> dict:
+    """``{"nodes", "edges"}`` of ``standard``'s clause graph for the JSON endpoint."""
+    nodes = [
+        {"number": number, "title": title, "page_index": page_index}
+        for number, title, page_index in Clause.objects.filter(standard=standard)
+        .order_by("id").values_list("number", "title", "page__page_index")
+    ]
+    edges = [
+        {"source": source, "target": target, "page_index": page_index, "label": label}
+        for source, target, page_index, label in ClauseReference.objects.filter(standard=standard)
+        .order_by("id").values_list("source__number", "target__number", "page__page_index", "label")
+    ]
+    return {"nodes": nodes, "edges": edges}
@@ -0,0 +1,46 @@
+"""Raw sqlite3 access to the corpus database.
+
+The ORM cannot express FTS5 ``MATCH``/``bm25()`` queries, so the views open
+plain sqlite3 connections for them. Going through ``connect()`` keeps those
+queries visible to the profiling middleware.
+"""
+
+import sqlite3
+from typing import Tuple
+
+from django.conf import settings
+
+from .profiling import ProfiledConnection
+
+
+def db_path() -> str:
+    return str(settings.DATABASES["default"]["NAME"])
+
+
+def connect() -> sqlite3.Connection:
+    return sqlite3.connect(db_path(), factory=ProfiledConnection)
+
+
+def read_path() -> Tuple[str, bool]:
+    """``(file, immutable)`` for corpus reads: the published snapshot in read-only requests, else the main database."""
+    from . import snapshots
+
+    live = snapshots.reading()
+    if live is not None:
+        return str(live), True
+    return db_path(), False
+
+
+def connect_readonly(path: str, immutable: bool = False) -> sqlite3.Connection:
+    """Open a SQLite file read-only.
+
+    ``immutable`` is for files that never change (published snapshots):
+    SQLite then skips locking and change detection, and memory-maps reads.
+    """
+    uri = f"file:{path}?mode=ro&immutable=1" if immutable else f"file:{path}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, factory=ProfiledConnection, check_same_thread=False)
+    if immutable:
+        from . import snapshots
+
+        conn.execute(f"PRAGMA mmap_size = {int(snapshots.snapshots_settings()['MMAP_SIZE'])}")
+    return conn
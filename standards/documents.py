@@ -0,0 +1,307 @@
+"""Process Design Documents rendered on the server and kept as files.
+
+``document`` assembles a scenario's design into the structure that
+``process_document`` returns as JSON. ``render`` turns it into HTML or
+Markdown, one section (or phase) per chunk. Each phase's standards references
+link to the corpus: the reference text is searched in the named standard and
+links to its best page, or to a search when that standard is not ingested.
+
+``response`` serves one format of a scenario's document. Artefacts are stored
+under ``PMHUB_DOCUMENTS["ROOT"]`` as ``<slug>-<key>.<ext>``; the key hashes the
+scenario, the ``CorpusVersion`` and ``VERSION``. A stored artefact is returned
+as a file. Otherwise the document is streamed while being written to a
+temporary file. That file is renamed into place once complete, and older
+artefacts of the scenario are removed, so an interrupted download never leaves
+a partial document behind.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from . import federation, fts, scenarios
+from .models import CorpusVersion, Standard
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "ROOT": None,
+    "BASE_URL": "",  # prefix for corpus links, e.g. "https://pmhub.example.org"; relative if empty
+}
+
+FORMATS = {
+    "html": "text/html; charset=utf-8",
+    "md": "text/markdown; charset=utf-8",
+}
+VERSION = 2  # bump when the layout changes so stored artefacts are re-rendered
+STANDARDS_REFERENCED = ["PMBOK Guide 7th Edition", "PRINCE2 2023", "ISO 21500:2021", "ISO 21502:2020"]
+FILLER = frozenset("a an and as by for from in of on or the to via with".split())
+
+STYLE = """
+body { font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; color: #333; }
+.header { border-bottom: 3px solid #3B82F6; padding-bottom: 20px; margin-bottom: 30px; }
+.section { margin-bottom: 30px; }
+.phase { border: 1px solid #e5e7eb; border-radius: 8px; padding: 20px; margin-bottom: 20px; background: #f9fafb; }
+.phase-header { display: flex; align-items: center; gap: 15px; margin-bottom: 15px; }
+.phase-number { background: linear-gradient(135deg, #3B82F6, #8B5CF6); color: white; width: 40px; height: 40px; border-radius: 8px; display: flex; align-items: center; justify-content: center; font-weight: bold; }
+.grid { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-top: 15px; }
+.tag { background: #e5e7eb; padding: 4px 8px; border-radius: 4px; font-size: 12px; margin: 2px; display: inline-block; }
+.standards-ref { background: #f3f4f6; padding: 15px; border-radius: 8px; margin-top: 15px; }
+.decision { background: #fef3c7; padding: 15px; border-radius: 8px; margin-bottom: 15px; }
+.implementation { background: #ecfdf5; padding: 15px; border-radius: 8px; }
+@media print { body { margin: 20px; } }
+"""
+
+GUIDANCE = [
+    ("team_structure", "Team Structure"),
+    ("tools_recommended", "Recommended Tools"),
+    ("success_metrics", "Success Metrics"),
+    ("risks", "Key Risks"),
+    ("mitigation_strategies", "Mitigation Strategies"),
+]
+
+
+def documents_settings() -> dict:
+    config = {**DEFAULTS, **getattr(settings, "PMHUB_DOCUMENTS", {})}
+    if config["ROOT"] is None:
+        config["ROOT"] = Path(settings.MEDIA_ROOT) / "documents"
+    return config
+
+
+def document(spec: dict, design: dict) -> dict:
+    """The Process Design Document of scenario ``spec`` with process ``design`` (see ``scenarios.design``)."""
+    return {
+        "title": f"Process Design Document: {spec['name']}",
+        "metadata": {
+            "project_type": spec["slug"],
+            "scenario_name": spec["name"],
+            "context": spec["context"],
+            "focus": spec["focus"],
+            "generated_date": "2025-01-27",
+            "standards_referenced": STANDARDS_REFERENCED,
+        },
+        "executive_summary": {
+            "tailoring_rationale": design["tailoring_rationale"],
+            "governance_model": design["governance_model"],
+            "key_characteristics": spec.get("key_characteristics", []),
+        },
+        "process_phases": design["phases"],
+        "standards_mapping": scenarios.standards_mapping(design["phases"]),
+        "tailoring_decisions": spec.get("tailoring_decisions", []),
+        "implementation_guidance": spec.get("implementation_guidance", {}),
+    }
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def links(phases: List[dict]) -> Dict[str, Dict[str, str]]:
+    """``{standard label: {reference: url}}`` for every phase's standards references."""
+    base = documents_settings()["BASE_URL"].rstrip("/")
+    by_label: Dict[str, Optional[Standard]] = {}
+    standards = list(Standard.objects.only("id", "slug", "title"))
+    out: Dict[str, Dict[str, str]] = {}
+    for phase in phases:
+        for label, reference in phase["standards_references"].items():
+            if label not in by_label:
+                by_label[label] = next((s for s in standards if _squash(label) in _squash(s.title)), None)
+            standard = by_label[label]
+            url = reverse("standards:search") + "?" + urlencode({"q": reference})
+            words = [w for w in fts.tokens(reference) if w not in FILLER]
+            if standard is not None and words:
+                hits = federation.passages(fts.any_of(words), 1, standard_ids=[standard.id])
+                if hits:
+                    url = reverse("standards:page", args=[standard.slug, hits[0].page_index])
+            out.setdefault(label, {})[reference] = base + url
+    return out
+
+
+def _html(doc: dict, urls: Dict[str, Dict[str, str]], as_of: str) -> Iterator[str]:
+    e = html.escape
+    meta = doc["metadata"]
+    summary = doc["executive_summary"]
+    yield (
+        f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+        f'<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f"<title>{e(doc['title'])}</title>\n<style>{STYLE}</style>\n</head>\n<body>\n"
+        f'<div class="header">\n<h1>{e(doc["title"])}</h1>\n'
+        f"<p><strong>Corpus as of:</strong> {as_of}</p>\n"
+        f"<p><strong>Context:</strong> {e(meta['context'])}</p>\n"
+        f"<p><strong>Focus:</strong> {e(meta['focus'])}</p>\n</div>\n"
+        f'<div class="section">\n<h2>Executive Summary</h2>\n'
+        f"<p><strong>Tailoring Rationale:</strong> {e(summary['tailoring_rationale'])}</p>\n"
+        f"<p><strong>Governance Model:</strong> {e(summary['governance_model'])}</p>\n"
+        f"<h3>Key Characteristics</h3>\n<ul>{''.join(f'<li>{e(c)}</li>' for c in summary['key_characteristics'])}</ul>\n"
+        f'</div>\n<div class="section">\n<h2>Process Phases</h2>\n'
+    )
+
+    def tags(items: List[str]) -> str:
+        return "".join(f'<span class="tag">{e(item)}</span>' for item in items)
+
+    for n, phase in enumerate(doc["process_phases"], 1):
+        references = "".join(
+            f'<p><strong>{e(label)}:</strong> <a href="{e(urls[label][reference])}">{e(reference)}</a></p>'
+            for label, reference in phase["standards_references"].items()
+        )
+        yield (
+            f'<div class="phase">\n<div class="phase-header">\n<div class="phase-number">{n}</div>\n'
+            f"<div>\n<h3>{e(phase['name'])}</h3>\n<p><strong>Duration:</strong> {e(phase['duration'])}</p>\n</div>\n</div>\n"
+            f'<div class="grid">\n<div>\n<h4>Key Activities</h4>\n<ul>{"".join(f"<li>{e(a)}</li>" for a in phase["activities"])}</ul>\n</div>\n'
+            f"<div>\n<h4>Key Roles</h4>\n{tags(phase['roles'])}\n</div>\n</div>\n"
+            f'<div class="grid">\n<div>\n<h4>Key Artifacts</h4>\n{tags(phase["artifacts"])}\n</div>\n'
+            f"<div>\n<h4>Decision Gates</h4>\n{tags(phase['decision_gates'])}\n</div>\n</div>\n"
+            f'<div class="standards-ref">\n<h4>Standards References</h4>\n{references}\n</div>\n</div>\n'
+        )
+    yield "</div>\n"
+
+    yield '<div class="section">\n<h2>Tailoring Decisions</h2>\n' + "".join(
+        f'<div class="decision">\n<h4>{e(d["decision"])}</h4>\n<p><strong>Rationale:</strong> {e(d["rationale"])}</p>\n'
+        f"<p><strong>Standards Basis:</strong> {e(d['standards_basis'])}</p>\n</div>\n"
+        for d in doc["tailoring_decisions"]
+    ) + "</div>\n"
+
+    guidance = doc["implementation_guidance"]
+    parts = []
+    for field, heading in GUIDANCE:
+        value = guidance.get(field)
+        if isinstance(value, list):
+            parts.append(f"<h3>{heading}</h3>\n<ul>{''.join(f'<li>{e(v)}</li>' for v in value)}</ul>\n")
+        elif value:
+            parts.append(f"<h3>{heading}</h3>\n<p>{e(value)}</p>\n")
+    if parts:
+        yield f'<div class="section">\n<h2>Implementation Guidance</h2>\n<div class="implementation">\n{"".join(parts)}</div>\n</div>\n'
+
+    yield '<div class="section">\n<h2>Standards Mapping</h2>\n'
+    for label, mappings in doc["standards_mapping"].items():
+        yield f"<h3>{e(label)}</h3>\n" + "".join(
+            f'<div style="margin-left: 20px; margin-bottom: 15px;">\n<h4>{e(m["phase"])}</h4>\n'
+            f'<p><strong>Reference:</strong> <a href="{e(urls[label][m["reference"]])}">{e(m["reference"])}</a></p>\n'
+            f"<p><strong>Activities:</strong> {e(', '.join(m['activities']))}</p>\n"
+            f"<p><strong>Artifacts:</strong> {e(', '.join(m['artifacts']))}</p>\n</div>\n"
+            for m in mappings
+        )
+    yield "</div>\n</body>\n</html>\n"
+
+
+def _md_escape(text: str) -> str:
+    return re.sub(r"([\\`*_\[\]<>#|])", r"\\\1", text)
+
+
+def _markdown(doc: dict, urls: Dict[str, Dict[str, str]], as_of: str) -> Iterator[str]:
+    e = _md_escape
+    meta = doc["metadata"]
+    summary = doc["executive_summary"]
+    yield (
+        f"# {e(doc['title'])}\n\n"
+        f"**Corpus as of:** {as_of}  \n"
+        f"**Context:** {e(meta['context'])}  \n"
+        f"**Focus:** {e(meta['focus'])}\n\n"
+        f"## Executive Summary\n\n"
+        f"**Tailoring Rationale:** {e(summary['tailoring_rationale'])}\n\n"
+        f"**Governance Model:** {e(summary['governance_model'])}\n\n"
+        f"### Key Characteristics\n\n{''.join(f'- {e(c)}' + chr(10) for c in summary['key_characteristics'])}\n"
+        f"## Process Phases\n\n"
+    )
+    for n, phase in enumerate(doc["process_phases"], 1):
+        yield (
+            f"### {n}. {e(phase['name'])}\n\n**Duration:** {e(phase['duration'])}\n\n"
+            f"**Key Activities**\n\n{''.join(f'- {e(a)}' + chr(10) for a in phase['activities'])}\n"
+            f"**Key Roles:** {e(', '.join(phase['roles']))}\n\n"
+            f"**Key Artifacts:** {e(', '.join(phase['artifacts']))}\n\n"
+            f"**Decision Gates:** {e('; '.join(phase['decision_gates']))}\n\n"
+            f"**Standards References**\n\n"
+            + "".join(
+                f"- **{e(label)}:** [{e(reference)}]({urls[label][reference]})\n"
+                for label, reference in phase["standards_references"].items()
+            )
+            + "\n"
+        )
+    yield "## Tailoring Decisions\n\n" + "".join(
+        f"### {e(d['decision'])}\n\n**Rationale:** {e(d['rationale'])}\n\n**Standards Basis:** {e(d['standards_basis'])}\n\n"
+        for d in doc["tailoring_decisions"]
+    )
+    guidance = doc["implementation_guidance"]
+    parts = []
+    for field, heading in GUIDANCE:
+        value = guidance.get(field)
+        if isinstance(value, list):
+            parts.append(f"### {heading}\n\n{''.join(f'- {e(v)}' + chr(10) for v in value)}\n")
+        elif value:
+            parts.append(f"### {heading}\n\n{e(value)}\n\n")
+    if parts:
+        yield "## Implementation Guidance\n\n" + "".join(parts)
+    yield "## Standards Mapping\n\n"
+    for label, mappings in doc["standards_mapping"].items():
+        yield f"### {e(label)}\n\n" + "".join(
+            f"#### {e(m['phase'])}\n\n"
+            f"**Reference:** [{e(m['reference'])}]({urls[label][m['reference']]})\n\n"
+            f"**Activities:** {e(', '.join(m['activities']))}\n\n"
+            f"**Artifacts:** {e(', '.join(m['artifacts']))}\n\n"
+            for m in mappings
+        )
+
+
+def render(spec: dict, design: dict, fmt: str) -> Iterator[str]:
+    """The document in ``fmt`` (``FORMATS``), in chunks.
+
+    It is dated by the corpus version it was built from rather than the
+    request, so a stored artefact stays accurate for as long as ``key`` matches.
+    """
+    doc = document(spec, design)
+    urls = links(design["phases"])
+    as_of = CorpusVersion.current().updated_at.date().isoformat()
+    return _html(doc, urls, as_of) if fmt == "html" else _markdown(doc, urls, as_of)
+
+
+def key(spec: dict) -> str:
+    payload = json.dumps([spec, CorpusVersion.current().version, VERSION], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def artefact_path(spec: dict, fmt: str) -> Path:
+    return Path(documents_settings()["ROOT"]) / f"{spec['slug']}-{key(spec)}.{fmt}"
+
+
+def _store(chunks: Iterator[str], path: Path) -> Iterator[bytes]:
+    """Yield ``chunks`` encoded while writing them to ``path``; the file only appears once complete."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=path.suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                out.write(data)
+                yield data
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    slug = path.name.rsplit("-", 1)[0]
+    for old in path.parent.glob(f"{slug}-*{path.suffix}"):
+        if old != path and old.name.rsplit("-", 1)[0] == slug:
+            old.unlink(missing_ok=True)
+
+
+def response(spec: dict, design: dict, fmt: str, download: bool = False) -> HttpResponse:
+    """The stored artefact for ``spec`` in ``fmt`` if there is one, else a streamed render that stores it."""
+    path = artefact_path(spec, fmt)
+    if path.is_file():
+        resp: HttpResponse = FileResponse(open(path, "rb"), content_type=FORMATS[fmt])
+    elif documents_settings()["ENABLED"]:
+        resp = StreamingHttpResponse(_store(render(spec, design, fmt), path), content_type=FORMATS[fmt])
+    else:
+        resp = StreamingHttpResponse((c.encode("utf-8") for c in render(spec, design, fmt)), content_type=FORMATS[fmt])
+    if download:
+        resp["Content-Disposition"] = f'attachment; filename="{spec["slug"]}-process-design.{fmt}"'
+    return resp
@@ -0,0 +1,124 @@
+"""Streaming corpus export for downstream analysis.
+
+``records`` yields one dict per page, with the standard's fields copied onto
+every row. Rows come from ``QuerySet.iterator`` (``fetchmany`` batches of
+``CHUNK_SIZE``), so memory stays constant whatever the corpus size.
+``write_jsonl`` streams them as JSON Lines, and ``write_parquet`` writes
+Parquet row groups of ``ROW_GROUP`` pages. Parquet needs the optional
+``pyarrow`` package.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import IO, Dict, Iterator, List, Optional, Sequence
+
+from .models import Page
+
+
+CHUNK_SIZE = 500
+ROW_GROUP = 5000
+GZIP_LEVEL = 1  # ~4x faster than 6 for ~20% larger files
+FORMATS = ("jsonl", "parquet")
+
+
+class ExportError(Exception):
+    pass
+
+
+def sha256(text: Optional[str]) -> Optional[str]:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest() if text is not None else None
+
+
+def records(slugs: Optional[Sequence[str]] = None, first_page: Optional[int] = None,
+            last_page: Optional[int] = None, html: bool = False, using: str = "default") -> Iterator[Dict[str, object]]:
+    """Pages in ``(standard, page_index)`` order, optionally limited to some standards and an inclusive page range.
+
+    ``using`` is read when the first row is requested, so a view streaming the
+    rows must pass the alias it resolved itself (``snapshots.alias()``).
+    """
+    pages = Page.objects.using(using).order_by("standard_id", "page_index")
+    if slugs:
+        pages = pages.filter(standard__slug__in=slugs)
+    if first_page is not None:
+        pages = pages.filter(page_index__gte=first_page)
+    if last_page is not None:
+        pages = pages.filter(page_index__lte=last_page)
+    columns = ["standard__slug", "standard__title", "standard__source_type", "id", "page_index", "section_hint", "content"]
+    if html:
+        columns.append("content_html")
+    for row in pages.values_list(*columns).iterator(chunk_size=CHUNK_SIZE):
+        slug, title, source_type, page_id, page_index, section_hint, content = row[:7]
+        record: Dict[str, object] = {
+            "standard": slug,
+            "standard_title": title,
+            "source_type": source_type,
+            "page_id": page_id,
+            "page_index": page_index,
+            "section_hint": section_hint,
+            "chars": len(content),
+            "content_sha256": sha256(content),
+            "content": content,
+        }
+        if html:
+            record["content_html_sha256"] = sha256(row[7])
+            record["content_html"] = row[7]
+        yield record
+
+
+def jsonl_lines(rows: Iterator[Dict[str, object]]) -> Iterator[bytes]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def write_jsonl(rows: Iterator[Dict[str, object]], out: IO[bytes], compress: bool = False) -> int:
+    """Write ``rows`` as JSON Lines (gzip-compressed with ``compress``); returns the row count."""
+    stream = gzip.GzipFile(fileobj=out, mode="wb", compresslevel=GZIP_LEVEL) if compress else out
+    count = 0
+    try:
+        for line in jsonl_lines(rows):
+            stream.write(line)
+            count += 1
+    finally:
+        if compress:
+            stream.close()
+    return count
+
+
+def write_parquet(rows: Iterator[Dict[str, object]], out: IO[bytes], html: bool = False,
+                  compression: str = "zstd") -> int:
+    """Write ``rows`` as Parquet, one row group per ``ROW_GROUP`` pages; returns the row count."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export needs pyarrow (`pip install pyarrow`); use --format jsonl otherwise")
+
+    schema = pa.schema(
+        [
+            # Repeated per row but dictionary-encoded by the Parquet writer.
+            ("standard", pa.string()),
+            ("standard_title", pa.string()),
+            ("source_type", pa.string()),
+            ("page_id", pa.int64()),
+            ("page_index", pa.int32()),
+            ("section_hint", pa.string()),
+            ("chars", pa.int32()),
+            ("content_sha256", pa.string()),
+            ("content", pa.large_string()),
+        ]
+        + ([("content_html_sha256", pa.string()), ("content_html", pa.large_string())] if html else [])
+    )
+    count = 0
+    with pq.ParquetWriter(out, schema, compression=None if compression == "none" else compression) as writer:
+        batch: List[Dict[str, object]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= ROW_GROUP:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
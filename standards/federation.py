@@ -0,0 +1,163 @@
+"""FTS queries over the corpus: the one place search, compare and tailor run them.
+
+Queries go to ``page_fts``/``passage_fts`` of the database ``db.read_path()``
+names (the published snapshot in read-only requests) through a per-thread
+connection that keeps its prepared statements.
+
+``passages`` ranks pages by their best-scoring passage (``passage_fts``) and
+returns that passage as the hit's content, which is what the views display.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from . import db
+
+
+Hit = namedtuple("Hit", "page_id standard_id page_index score content")
+
+MATCH_SQL = """
+SELECT p.id, p.standard_id, p.page_index, bm25(page_fts), {content}
+FROM page_fts
+JOIN standards_page p ON p.id = page_fts.rowid
+WHERE page_fts MATCH ?
+ORDER BY bm25(page_fts)
+LIMIT ?
+"""
+
+# Pages ranked by their best passage. The inner query keeps only the top
+# ``pool`` passage ids so passage text is read for those rows alone; SQLite
+# takes the bare ``content`` column from the row that produced MIN(score),
+# i.e. the best passage itself.
+PASSAGE_SQL = """
+SELECT ps.page_id, ps.standard_id, ps.page_index, MIN(hit.score), ps.content
+FROM (
+  SELECT rowid AS id, rank AS score FROM passage_fts
+  WHERE passage_fts MATCH ?
+  ORDER BY rank
+  LIMIT ?
+) AS hit
+CROSS JOIN standards_passage ps ON ps.id = hit.id
+GROUP BY ps.page_id
+ORDER BY MIN(hit.score)
+LIMIT ?
+"""
+
+# The same restricted to the standards in ``{standard_ids}``. The restriction
+# comes before the LIMIT so other standards cannot crowd them out; bm25 is
+# computed for every match either way, so joining first costs one primary-key
+# lookup per matching passage.
+FILTERED_PASSAGE_SQL = PASSAGE_SQL.replace(
+    """  SELECT rowid AS id, rank AS score FROM passage_fts
+  WHERE passage_fts MATCH ?
+  ORDER BY rank
+""",
+    """  SELECT hit.id, hit.score
+  FROM (SELECT rowid AS id, rank AS score FROM passage_fts WHERE passage_fts MATCH ?) AS hit
+  CROSS JOIN standards_passage f ON f.id = hit.id
+  WHERE f.standard_id IN ({standard_ids})
+  ORDER BY hit.score
+""",
+)
+
+COUNT_SQL = """
+SELECT p.standard_id, COUNT(*)
+FROM page_fts
+JOIN standards_page p ON p.id = page_fts.rowid
+WHERE page_fts MATCH ?
+GROUP BY p.standard_id
+"""
+
+# Matching pages in corpus order with their first matching passage. No bm25,
+# so FTS5 stops reading doclists once ``pool`` passages are found.
+FIRST_PASSAGE_SQL = """
+SELECT page_id, standard_id, page_index, 0.0, content FROM (
+  SELECT ps.page_id, ps.standard_id, ps.page_index, ps.content, MIN(hit.id)
+  FROM (
+    SELECT rowid AS id FROM passage_fts
+    WHERE passage_fts MATCH ?
+    LIMIT ?
+  ) AS hit
+  CROSS JOIN standards_passage ps ON ps.id = hit.id
+  GROUP BY ps.page_id
+)
+ORDER BY standard_id, page_index
+LIMIT ?
+"""
+
+# Candidate passages considered per page returned by ``passages()``.
+PASSAGE_POOL = 8
+
+_local = threading.local()
+
+
+def _connection(path: Path, immutable: bool = False) -> sqlite3.Connection:
+    """Per-thread cached read-only connection, reopened when the file changes.
+
+    Keeping the connection also keeps SQLite's prepared statements, so the
+    schema is not re-read and the fixed queries above are not re-planned on
+    every call. When ``path`` changes (a new snapshot is published) the
+    previous connection is closed.
+    """
+    st = os.stat(path)
+    identity = (str(path), st.st_ino, st.st_mtime_ns)
+    cached = getattr(_local, "connection", None)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    conn = db.connect_readonly(str(path), immutable=immutable)
+    _local.connection = (identity, conn)
+    return conn
+
+
+def _rows(sql: str, params: tuple) -> list:
+    path, immutable = db.read_path()
+    return _connection(Path(path), immutable).execute(sql, params).fetchall()
+
+
+def _query(sql: str, params: tuple) -> List[Hit]:
+    return [Hit(*row) for row in _rows(sql, params)]
+
+
+def _with_content(sql: str, with_content: bool) -> str:
+    return sql.replace("{content}", "p.content" if with_content else "NULL")
+
+
+def match(query: str, limit: int, with_content: bool = False) -> List[Hit]:
+    """Pages matching an FTS5 ``query``, best BM25 first."""
+    return _query(_with_content(MATCH_SQL, with_content), (query, limit))
+
+
+def phrase_query(phrases: Sequence[str]) -> str:
+    """FTS5 query matching any of ``phrases``, each as a quoted phrase with a prefix on its last word."""
+    quoted = ['"%s"*' % p.strip().replace('"', '""') for p in phrases if p.strip()]
+    return " OR ".join(quoted)
+
+
+def passages(query: str, limit: int, standard_ids: Optional[Sequence[int]] = None) -> List[Hit]:
+    """Pages matching an FTS5 ``query``, ranked by their best passage; ``content`` is that passage.
+
+    ``standard_ids`` restricts the result to those standards.
+    """
+    if standard_ids is None:
+        sql = PASSAGE_SQL
+    elif not standard_ids:
+        return []
+    else:
+        sql = FILTERED_PASSAGE_SQL.replace("{standard_ids}", ",".join(str(int(i)) for i in standard_ids))
+    return _query(sql, (query, limit * PASSAGE_POOL, limit))
+
+
+def page_counts(query: str) -> Dict[int, int]:
+    """Number of pages matching an FTS5 ``query``, per standard id."""
+    return dict(_rows(COUNT_SQL, (query,)))
+
+
+def first_passages(query: str, limit: int) -> List[Hit]:
+    """Pages matching an FTS5 ``query`` in page order, each with its first matching passage; unranked."""
+    return _query(FIRST_PASSAGE_SQL, (query, limit * PASSAGE_POOL, limit))
@@ -0,0 +1,184 @@
+"""Content-addressed store for images found in PDFs and EPUBs.
+
+Every extracted image is keyed by the SHA-256 of its bytes and written once
+under ``PMHUB_FIGURES["ROOT"]`` (``<2 hex>/<hash>.<ext>``), so a logo repeated
+on every page or shared by several standards is stored a single time. Images
+wider than an entry of ``WIDTHS`` also get WebP variants at those widths.
+
+``content_html`` then only holds ``<img loading="lazy" srcset=...>`` tags that
+point at the ``figure`` view, which serves the files as immutable; page rows
+never carry image bytes (``data:`` URIs included).
+
+Pillow and pdfminer are only imported once an image is actually stored or a
+PDF converted, so the ``figure`` view does not pay for them.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.urls import reverse
+
+if TYPE_CHECKING:
+    from PIL import Image
+    from pdfminer.layout import LTImage
+
+
+DEFAULTS = {
+    "ROOT": None,
+    "WIDTHS": [320, 640, 1280],
+    "QUALITY": 80,
+}
+
+WEB_FORMATS = {"jpeg": "jpg", "png": "png", "gif": "gif", "webp": "webp"}
+SIZES = "(max-width: 768px) 100vw, 768px"
+
+Figure = namedtuple("Figure", "name width height variants")  # variants: [(width, name), ...]
+
+
+def figures_settings() -> dict:
+    config = {**DEFAULTS, **getattr(settings, "PMHUB_FIGURES", {})}
+    if config["ROOT"] is None:
+        config["ROOT"] = Path(settings.MEDIA_ROOT) / "figures"
+    return config
+
+
+def path_for(name: str) -> Path:
+    return Path(figures_settings()["ROOT"]) / name[:2] / name
+
+
+def url_for(name: str) -> str:
+    return reverse("standards:figure", args=[f"{name[:2]}/{name}"])
+
+
+def _write(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+def _encode(image: "Image.Image", fmt: str, **params: object) -> bytes:
+    out = BytesIO()
+    image.save(out, fmt, **params)
+    return out.getvalue()
+
+
+def store(data: bytes) -> Optional[Figure]:
+    """File ``data`` under its hash (plus resized variants); None if Pillow cannot read it."""
+    from PIL import Image
+
+    config = figures_settings()
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+    ext = WEB_FORMATS.get((image.format or "").lower())
+    if ext is None:
+        # BMP/TIFF/JPEG 2000 and friends: browsers want PNG.
+        ext = "png"
+        data = _encode(image.convert("RGBA" if "A" in image.getbands() else "RGB"), "PNG", optimize=True)
+    name = f"{digest}.{ext}"
+    if not path_for(name).exists():
+        _write(path_for(name), data)
+
+    variants = []
+    widths = [] if getattr(image, "is_animated", False) else [w for w in sorted(config["WIDTHS"]) if w < image.width]
+    source = None
+    for width in widths:
+        variant = f"{digest}-{width}.webp"
+        if not path_for(variant).exists():
+            if source is None:
+                source = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            resized = source.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            _write(path_for(variant), _encode(resized, "WEBP", quality=config["QUALITY"], method=6))
+        variants.append((width, variant))
+    return Figure(name, image.width, image.height, variants)
+
+
+def set_img_attrs(img, figure: Figure, keep_size: bool = False) -> None:  # type: ignore[no-untyped-def]
+    """Point a BeautifulSoup ``<img>`` at ``figure`` with lazy loading and a ``srcset``."""
+    img["src"] = url_for(figure.name)
+    if figure.variants:
+        candidates = [f"{url_for(name)} {width}w" for width, name in figure.variants]
+        img["srcset"] = ", ".join(candidates + [f"{url_for(figure.name)} {figure.width}w"])
+        img["sizes"] = SIZES
+    if not keep_size or not img.get("width"):
+        img["width"], img["height"] = str(figure.width), str(figure.height)
+    img["loading"] = "lazy"
+    img["decoding"] = "async"
+
+
+def data_uri_bytes(src: str) -> Optional[bytes]:
+    header, _, payload = src.partition(",")
+    if not header.startswith("data:image/"):
+        return None
+    try:
+        return base64.b64decode(payload) if header.endswith(";base64") else unquote(payload).encode("latin-1")
+    except (binascii.Error, ValueError):
+        return None
+
+
+def rewrite_images(body, resolve: Callable[[str], Optional[bytes]]) -> int:  # type: ignore[no-untyped-def]
+    """Move every ``<img>`` under ``body`` into the store; ``resolve`` maps a ``src`` to bytes. Returns how many."""
+    moved = 0
+    for img in body.find_all("img"):
+        src = img.get("src", "")
+        data = data_uri_bytes(src) if src.startswith("data:") else resolve(src)
+        figure = store(data) if data else None
+        if figure is not None:
+            set_img_attrs(img, figure)
+            moved += 1
+        elif src.startswith("data:"):
+            img.decompose()  # unreadable inline blob: not worth keeping in the row
+    return moved
+
+
+class FigureWriter:
+    """Stands in for pdfminer's ``ImageWriter``: files exported images in the store and returns their URL."""
+
+    def __init__(self) -> None:
+        from pdfminer.image import ImageWriter
+
+        self.writer = ImageWriter(tempfile.mkdtemp(prefix="pmhub-figures-"))
+        self.outdir = self.writer.outdir
+        self.figures: Dict[str, Figure] = {}
+
+    def export_image(self, image: "LTImage") -> str:
+        try:
+            exported = Path(self.outdir) / self.writer.export_image(image)
+        except Exception:
+            return ""  # a broken or exotic image stream must not fail the page
+        try:
+            figure = store(exported.read_bytes())
+        finally:
+            exported.unlink(missing_ok=True)
+        if figure is None:
+            return ""
+        url = url_for(figure.name)
+        self.figures[url] = figure
+        return url
+
+    def finish(self, body) -> None:  # type: ignore[no-untyped-def]
+        """Add lazy-loading attributes to the ``<img>`` tags pdfminer wrote; drop the unexportable ones."""
+        for img in body.find_all("img"):
+            figure = self.figures.get(img.get("src", ""))
+            if figure is None:
+                img.decompose()
+            else:
+                set_img_attrs(img, figure, keep_size=True)
+
+    def close(self) -> None:
+        shutil.rmtree(self.outdir, ignore_errors=True)
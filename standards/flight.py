@@ -0,0 +1,198 @@
+"""Single-flight coalescing and per-route admission control for heavy views.
+
+``run(route, key, compute)`` makes concurrent callers with the same ``key``
+share one call to ``compute``: the first caller (the leader) computes, the
+others wait for its result. Views coalesce the context they build, not the
+rendered response, because every page embeds the visitor's own CSRF token.
+
+Only leaders take a slot in the route's admission limit from
+``PMHUB_FLIGHT["ROUTES"]``: at most ``CONCURRENCY`` computations run at once
+and at most ``QUEUE`` more wait, each for up to ``QUEUE_TIMEOUT`` seconds.
+Anything beyond that raises ``Overloaded``, which ``shed_load`` turns into a
+503 with ``Retry-After``. State and counters are per process; ``computed`` and
+``failed`` count the computations that returned and raised.
+"""
+
+import functools
+import math
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "WAIT_TIMEOUT": 60.0,
+    "ROUTES": {},
+}
+ROUTE_DEFAULTS = {"CONCURRENCY": 2, "QUEUE": 16, "QUEUE_TIMEOUT": 15.0}
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    def __init__(self, route: str, retry_after: float) -> None:
+        super().__init__(f"{route} is overloaded")
+        self.route = route
+        self.retry_after = retry_after
+
+
+def flight_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PMHUB_FLIGHT", {})}
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class _Gate:
+    """Counting semaphore with a bounded wait queue."""
+
+    def __init__(self, concurrency: int, queue: int, timeout: float) -> None:
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.queue = queue
+        self.timeout = timeout
+        self.waiting = 0
+
+
+_lock = threading.Lock()
+_calls: Dict[Hashable, _Call] = {}
+_gates: Dict[str, _Gate] = {}
+_metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+
+def _gate(route: str) -> Optional[_Gate]:
+    limits = flight_settings()["ROUTES"].get(route)
+    if limits is None:
+        return None
+    gate = _gates.get(route)
+    if gate is None:
+        limits = {**ROUTE_DEFAULTS, **limits}
+        gate = _gates[route] = _Gate(int(limits["CONCURRENCY"]), int(limits["QUEUE"]), float(limits["QUEUE_TIMEOUT"]))
+    return gate
+
+
+def _admitted(route: str, compute: Callable[[], T]) -> T:
+    with _lock:
+        gate = _gate(route)
+        if gate is not None:
+            acquired = gate.slots.acquire(blocking=False)
+            if not acquired:
+                if gate.waiting >= gate.queue:
+                    _metrics[route]["rejected"] += 1
+                    raise Overloaded(route, gate.timeout)
+                gate.waiting += 1
+                _metrics[route]["queued"] += 1
+    if gate is not None and not acquired:
+        acquired = gate.slots.acquire(timeout=gate.timeout)
+        with _lock:
+            gate.waiting -= 1
+            if not acquired:
+                _metrics[route]["rejected"] += 1
+        if not acquired:
+            raise Overloaded(route, gate.timeout)
+    with _lock:
+        _metrics[route]["in_flight"] += 1
+    outcome = "failed"
+    try:
+        result = compute()
+        outcome = "computed"
+        return result
+    finally:
+        with _lock:
+            _metrics[route]["in_flight"] -= 1
+            _metrics[route][outcome] += 1
+        if gate is not None:
+            gate.slots.release()
+
+
+def _own(exc: BaseException) -> BaseException:
+    """A copy of the leader's ``exc`` for one waiter, chained to the original.
+
+    Raising one exception object in several threads makes them all rewrite its
+    ``__traceback__``; each waiter raises its own copy (same type, ``args`` and
+    attributes, without calling ``__init__``) instead.
+    """
+    clone = exc.__class__.__new__(exc.__class__)
+    clone.args = exc.args
+    clone.__dict__.update(exc.__dict__)
+    clone.__cause__ = exc
+    return clone
+
+
+def run(route: str, key: Hashable, compute: Callable[[], T]) -> T:
+    """``compute()``, shared with every concurrent caller passing the same ``route`` and ``key``."""
+    config = flight_settings()
+    if not config["ENABLED"]:
+        return compute()
+    key = (route, key)
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+        else:
+            call.waiters += 1
+            _metrics[route]["coalesced"] += 1
+    if not leader:
+        if not call.done.wait(config["WAIT_TIMEOUT"]):
+            with _lock:
+                _metrics[route]["rejected"] += 1
+            raise Overloaded(route, config["WAIT_TIMEOUT"])
+        if call.error is not None:
+            raise _own(call.error)
+        return call.result
+
+    try:
+        call.result = _admitted(route, compute)
+        return call.result
+    except BaseException as exc:
+        call.error = exc
+        raise
+    finally:
+        with _lock:
+            del _calls[key]
+        call.done.set()
+
+
+def shed_load(view):  # type: ignore[no-untyped-def]
+    """Answer ``Overloaded`` with 503 and ``Retry-After`` instead of an error page."""
+
+    @functools.wraps(view)
+    def inner(request: HttpRequest, *args, **kwargs) -> HttpResponse:  # type: ignore[no-untyped-def]
+        try:
+            return view(request, *args, **kwargs)
+        except Overloaded as exc:
+            response = HttpResponse(
+                "This page is busy right now; please retry in a few seconds.\n",
+                status=503,
+                content_type="text/plain; charset=utf-8",
+            )
+            response["Retry-After"] = str(max(1, math.ceil(exc.retry_after)))
+            return response
+
+    return inner
+
+
+def snapshot() -> Dict[str, Dict[str, int]]:
+    with _lock:
+        routes = {route: dict(counts) for route, counts in _metrics.items()}
+        for route, gate in _gates.items():
+            routes.setdefault(route, {})["waiting"] = gate.waiting
+    return routes
+
+
+@staff_member_required
+@require_GET
+def stats_view(request: HttpRequest) -> HttpResponse:
+    """Coalesced, queued and rejected request counts per route for this worker process."""
+    return JsonResponse({"routes": snapshot()})
@@ -0,0 +1,255 @@
+"""Compile user search syntax into FTS5 MATCH expressions that always parse.
+
+Accepted syntax, all of it optional and forgiving:
+
+``risk management``          both words (implicit AND)
+``"risk management"``        phrase; ``"risk manag"*`` prefixes the last word
+``plan*``                    prefix
+``risk OR issue``, ``AND``   boolean operators (upper case, as in FTS5)
+``risk NOT financial``       exclusion; ``-financial`` does the same
+``(a OR b) c``               grouping
+``risk NEAR issue``          within 10 tokens; ``NEAR/5`` or ``NEAR(a b, 5)``
+``standard:prince2``         only pages of matching standards (``in:`` too)
+
+Words are split the way the ``unicode61`` tokenizer splits them, so
+``risk-based`` or ``ISO/IEC`` become phrases instead of syntax errors, and
+every term is emitted quoted. Unbalanced quotes and parentheses are closed,
+dangling operators dropped, and a query with nothing searchable compiles to an
+empty expression rather than a failing statement. Results are cached.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .highlight import Term
+
+
+Compiled = namedtuple("Compiled", "match standards terms")  # FTS5 expression, filter values, highlight terms
+
+FILTER_PREFIXES = ("standard:", "in:")
+NEAR_DISTANCE = 10
+
+TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+LEXER_RE = re.compile(
+    r'\s+|(?P<lparen>\()|(?P<rparen>\))|(?P<comma>,)'
+    r'|"(?P<phrase>[^"]*)(?:"|$)(?P<phrase_star>\*?)'
+    r'|(?P<word>[^\s()",]+)'
+)
+NEAR_RE = re.compile(r"NEAR(?:/(\d+))?$")
+
+
+def tokens(text: str) -> List[str]:
+    """``text`` split into index tokens (``unicode61``: letters and digits; everything else separates)."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def quote(words: Sequence[str], prefix: bool = False) -> str:
+    """One FTS5 string (term or phrase) for already tokenised ``words``."""
+    return '"%s"%s' % (" ".join(words).replace('"', '""'), "*" if prefix else "")
+
+
+def any_of(phrases: Iterable[str], prefix: bool = False) -> str:
+    """FTS5 query matching any of ``phrases``; a multi-word keyword stays one phrase."""
+    quoted = []
+    for phrase in phrases:
+        words = tokens(phrase)
+        if words and quote(words, prefix) not in quoted:
+            quoted.append(quote(words, prefix))
+    return " OR ".join(quoted)
+
+
+# --- parser -------------------------------------------------------------------
+# Nodes: ("term", words, prefix) | ("near", [terms], distance)
+#        ("and", [nodes]) | ("or", [nodes]) | ("not", positive, [negatives])
+
+def _lex(text: str) -> List[Tuple[str, object]]:
+    out: List[Tuple[str, object]] = []
+    for m in LEXER_RE.finditer(text):
+        kind = m.lastgroup
+        if kind is None:
+            continue
+        if kind in ("lparen", "rparen", "comma"):
+            out.append((kind, None))
+        elif kind in ("phrase", "phrase_star"):
+            out.append(("phrase", (m.group("phrase"), bool(m.group("phrase_star")))))
+        else:
+            word = m.group("word")
+            if word in ("AND", "OR", "NOT") or NEAR_RE.match(word):
+                out.append(("op", word))
+            elif word.lower().startswith(FILTER_PREFIXES):
+                out.append(("filter", word.split(":", 1)[1]))
+            elif word.startswith("-") and len(word) > 1:
+                out.append(("op", "NOT"))
+                out.append(("word", word[1:]))
+            else:
+                out.append(("word", word))
+    return out
+
+
+class _Parser:
+    def __init__(self, lexed: List[Tuple[str, object]]) -> None:
+        self.lexed = lexed
+        self.pos = 0
+        self.standards: List[str] = []
+
+    def peek(self) -> Tuple[Optional[str], object]:
+        return self.lexed[self.pos] if self.pos < len(self.lexed) else (None, None)
+
+    def near_call(self) -> bool:
+        """Whether the next tokens are ``NEAR(``."""
+        following = self.lexed[self.pos + 1] if self.pos + 1 < len(self.lexed) else (None, None)
+        return self.peek() == ("op", "NEAR") and following[0] == "lparen"
+
+    def take(self) -> Tuple[Optional[str], object]:
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):  # type: ignore[no-untyped-def]
+        nodes = []
+        while self.pos < len(self.lexed):
+            node = self.or_expr()
+            if node is not None:
+                nodes.append(node)
+            elif self.peek()[0] is not None:
+                self.take()  # stray ")" or "," at top level
+        return _and(nodes)
+
+    def or_expr(self):  # type: ignore[no-untyped-def]
+        nodes = [self.and_expr()]
+        while self.peek() == ("op", "OR"):
+            self.take()
+            nodes.append(self.and_expr())
+        nodes = [n for n in nodes if n is not None]
+        if not nodes:
+            return None
+        return nodes[0] if len(nodes) == 1 else ("or", _dedupe(nodes))
+
+    def and_expr(self):  # type: ignore[no-untyped-def]
+        positive, negative = [], []
+        while True:
+            kind, value = self.peek()
+            if kind is None or kind in ("rparen", "comma") or (kind, value) == ("op", "OR"):
+                break
+            if (kind, value) == ("op", "AND"):
+                self.take()
+                continue
+            if (kind, value) == ("op", "NOT"):
+                self.take()
+                node = self.near_expr()
+                if node is not None:
+                    negative.append(node)
+                continue
+            if kind == "op" and not self.near_call():
+                self.take()  # NEAR with nothing on its left
+                continue
+            node = self.near_expr()
+            if node is not None:
+                positive.append(node)
+        node = _and(positive)
+        if node is None:
+            return None  # FTS5 cannot express a purely negative query
+        return ("not", node, _dedupe(negative)) if negative else node
+
+    def near_expr(self):  # type: ignore[no-untyped-def]
+        node = self.primary()
+        while node is not None and node[0] == "term" and self.peek()[0] == "op" and NEAR_RE.match(str(self.peek()[1])):
+            distance = NEAR_RE.match(str(self.take()[1])).group(1)  # type: ignore[union-attr]
+            right = self.primary()
+            if right is None or right[0] != "term":
+                return node if right is None else ("and", [node, right])
+            node = ("near", [node, right], int(distance or NEAR_DISTANCE))
+        return node
+
+    def primary(self):  # type: ignore[no-untyped-def]
+        kind, value = self.take()
+        if kind == "lparen":
+            node = self.or_expr()
+            while self.peek()[0] not in (None, "rparen"):
+                self.take()
+            self.take()
+            return node
+        if kind == "filter":
+            if value:
+                self.standards.append(str(value).lower())
+            return None
+        if kind == "phrase":
+            text, star = value  # type: ignore[misc]
+            words = tokens(text)
+            return ("term", tuple(words), star) if words else None
+        if kind == "word":
+            text = str(value)
+            words = tokens(text)
+            return ("term", tuple(words), text.endswith("*")) if words else None
+        if (kind, value) == ("op", "NEAR") and self.peek()[0] == "lparen":
+            return self.near_group()
+        return None
+
+    def near_group(self):  # type: ignore[no-untyped-def]
+        self.take()
+        terms, distance = [], NEAR_DISTANCE
+        while self.peek()[0] not in (None, "rparen"):
+            kind, value = self.peek()
+            if kind == "comma":
+                self.take()
+                number = self.take()
+                if number[0] == "word" and str(number[1]).isdigit():
+                    distance = int(str(number[1]))
+                continue
+            node = self.primary()
+            if node is not None and node[0] == "term":
+                terms.append(node)
+        self.take()
+        if len(terms) < 2:
+            return terms[0] if terms else None
+        return ("near", terms, distance)
+
+
+def _dedupe(nodes: list) -> list:
+    out: list = []
+    for node in nodes:
+        if node not in out:
+            out.append(node)
+    return out
+
+
+def _and(nodes: list):  # type: ignore[no-untyped-def]
+    nodes = _dedupe([n for n in nodes if n is not None])
+    if not nodes:
+        return None
+    return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+
+def _emit(node, parent: str = "") -> str:  # type: ignore[no-untyped-def]
+    kind = node[0]
+    if kind == "term":
+        return quote(node[1], node[2])
+    if kind == "near":
+        return "NEAR(%s, %d)" % (" ".join(quote(t[1], t[2]) for t in node[1]), node[2])
+    if kind == "not":
+        text = " NOT ".join([_emit(node[1], "not")] + [_emit(n, "not") for n in node[2]])
+    else:
+        text = (" AND " if kind == "and" else " OR ").join(_emit(n, kind) for n in node[1])
+    return f"({text})" if parent and parent != kind else text
+
+
+def _terms(node) -> List[Term]:  # type: ignore[no-untyped-def]
+    if node is None:
+        return []
+    kind = node[0]
+    if kind == "term":
+        return [(word, node[2] and i == len(node[1]) - 1) for i, word in enumerate(node[1])]
+    if kind == "not":
+        return _terms(node[1])
+    return [term for child in node[1] for term in _terms(child)]
+
+
+@lru_cache(maxsize=1024)
+def compile(text: str) -> Compiled:
+    """Parse user search syntax into a ``Compiled`` FTS5 expression (empty when nothing is searchable)."""
+    parser = _Parser(_lex(text or ""))
+    tree = parser.parse()
+    terms = tuple(dict.fromkeys(_terms(tree)))
+    return Compiled(_emit(tree) if tree is not None else "", tuple(parser.standards), terms)
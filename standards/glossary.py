@@ -0,0 +1,259 @@
+"""Term → definition index built from "Terms and definitions" clauses and glossaries.
+
+After boilerplate stripping, ingest calls ``index_standard``. It looks for a
+section heading (``3 Terms and definitions``, ``Glossary``, ...), takes the
+lines up to the next clause (or ``MAX_PAGES`` pages), and reads entries in
+whichever of three layouts matches:
+
+ISO clause        ``3.4`` on its own line, then the term, then the definition;
+                  ``[SOURCE: ...]``, notes and ``(3.20)`` cross-references dropped
+run-in glossary   ``Acceptance Criteria. A set of conditions ...`` (PMBOK)
+block glossary    term on its own line, definition on the lines after it (PRINCE2)
+
+The entries become ``Definition`` rows with a normalised ``key``: ``unicode61``
+tokens of the term without parenthesised acronyms, last word singular. A
+lookup or the compare view's definition panel is then one indexed equality
+query rather than a full-text search ranking every mention.
+
+PDF text extraction sometimes moves italic cross-reference words out of
+their sentence; when a definition ends mid-phrase, the stray words found
+before it are appended, which restores the usual ISO pattern.
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from . import fts
+from .models import Definition, Page, Standard
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_PAGES": 40,
+    "MIN_ENTRIES": 3,
+    "MAX_TERM_WORDS": 6,
+}
+
+Entry = namedtuple("Entry", "page_id clause term definition")
+
+HEADING_RE = re.compile(
+    r"^\s*(?:(\d+)\s+)?(?:terms\s+and\s+definitions|glossary(?:\s+of\s+terms)?|definitions|key\s+terms)\s*$",
+    re.IGNORECASE,
+)
+CLAUSE_RE = re.compile(r"^\s*(\d+)\s+[^\W\d_]")
+NUMBER_RE = re.compile(r"^\s*(\d+(?:\.\d+)+)\s*$")
+END_RE = re.compile(r"^\s*(?:index|bibliography|references|further\s+reading|appendix\b.*)\s*$", re.IGNORECASE)
+RUN_IN_RE = re.compile(r"^\s*(?P<term>[^\W\d_][^.:;]{0,80}?)\s*[.:]\s+(?P<definition>[A-Z(\"“].{8,})$")
+SKIP_RE = re.compile(r"^\s*(?:\[?source\b|note\b|example\b|—|https?:|admitted term|deprecated)", re.IGNORECASE)
+REFERENCE_RE = re.compile(r"\(\s*\d+(?:\s*\.\s*\d+)*\s*\)?|(?<![\w.])\d+(?:\.\d+)+\s*\)")
+DANGLING = frozenset("a an the of to or and by for from in on with that which as".split())
+SPACE_RE = re.compile(r"\s+")
+LETTER_RE = re.compile(r"[^\W\d_]")
+LEADER_RE = re.compile(r"\.{4,}|…{2,}")  # table-of-contents dot leaders
+
+
+def glossary_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PMHUB_GLOSSARY", {})}
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def key(term: str) -> str:
+    """Normalised lookup key: ``"Risks (R)"``, ``"risk"`` and ``"Risk"`` all give ``"risk"``."""
+    text = unicodedata.normalize("NFKD", re.sub(r"\([^)]*\)", " ", term))
+    words = fts.tokens("".join(c for c in text if not unicodedata.combining(c)))
+    if words:
+        words[-1] = _singular(words[-1])
+    return " ".join(words)[:255]
+
+
+def _clean(text: str) -> str:
+    text = REFERENCE_RE.sub(" ", text)
+    text = re.sub(r"\(\s*\)|(?<!\w)[()](?!\w)", " ", text)
+    text = SPACE_RE.sub(" ", text)
+    return re.sub(r"\s+([,.;:])", r"\1", text).strip(" ,;")
+
+
+def _is_term(line: str, max_words: int) -> bool:
+    words = line.split()
+    return (
+        0 < len(words) <= max_words
+        and LETTER_RE.match(line) is not None
+        and not line.rstrip().endswith((".", ",", ";", ":"))
+        and words[-1].lower() not in DANGLING
+        and not SKIP_RE.match(line)
+    )
+
+
+def _section(pages: Sequence[Tuple[int, str]], start: int, line_no: int, clause: Optional[str],
+             max_pages: int) -> List[Tuple[int, str]]:
+    """``(page_id, line)`` from just below a heading to the end of its section."""
+    out: List[Tuple[int, str]] = []
+    for page_id, text in pages[start:start + max_pages]:
+        lines = text.split("\n")
+        if page_id == pages[start][0]:
+            lines = lines[line_no:]
+        for line in lines:
+            match = CLAUSE_RE.match(line)
+            if clause is not None and match and not NUMBER_RE.match(line) and int(match.group(1)) == int(clause) + 1:
+                return out
+            if END_RE.match(line) or (clause is None and HEADING_RE.match(line)):
+                return out
+            if line.strip() and not LEADER_RE.search(line):
+                out.append((page_id, line.strip()))
+    return out
+
+
+def _iso_entries(lines: List[Tuple[int, str]], max_words: int) -> List[Entry]:
+    found = []
+    marks = [i for i, (_, line) in enumerate(lines) if NUMBER_RE.match(line)]
+    for n, i in enumerate(marks):
+        body = lines[i + 1:marks[n + 1] if n + 1 < len(marks) else len(lines)]
+        in_source = False
+        kept = []
+        for page_id, line in body:
+            if in_source or line.lower().startswith("[source"):
+                in_source = "]" not in line
+                continue
+            if not SKIP_RE.match(line):
+                kept.append((page_id, line))
+        term_at = next((j for j, (_, line) in enumerate(kept) if _is_term(line, max_words)), None)
+        if term_at is not None:
+            page_id, term = kept[term_at]
+            found.append((page_id, NUMBER_RE.match(lines[i][1]).group(1), term, [line for _, line in kept[term_at + 1:]]))  # type: ignore[union-attr]
+
+    # Short lines before the sentence that are themselves defined terms are displaced cross-references.
+    terms = {key(term) for _, _, term, _ in found}
+    entries = []
+    for page_id, clause, term, rest in found:
+        first_long = next((j for j, line in enumerate(rest) if len(_clean(line).split()) >= 4), len(rest))
+        displaced = [line for line in rest[:first_long] if key(_clean(line)) in terms]
+        text = _clean(" ".join(line for j, line in enumerate(rest) if j >= first_long or line not in displaced))
+        if text.split() and text.split()[-1].lower() in DANGLING and displaced:
+            text = _clean(f"{text} {' '.join(displaced)}")
+        if len(text.split()) >= 3:
+            entries.append(Entry(page_id, clause, _clean(term), text))
+    return entries
+
+
+def _run_in_entries(lines: List[Tuple[int, str]], max_words: int) -> List[Entry]:
+    entries: List[Entry] = []
+    for page_id, line in lines:
+        match = RUN_IN_RE.match(line)
+        if match and len(match.group("term").split()) <= max_words:
+            entries.append(Entry(page_id, "", match.group("term").strip(), match.group("definition").strip()))
+        elif entries:
+            last = entries[-1]
+            entries[-1] = last._replace(definition=f"{last.definition} {line}")
+    return [e._replace(definition=_clean(e.definition)) for e in entries]
+
+
+def _block_entries(lines: List[Tuple[int, str]], max_words: int) -> List[Entry]:
+    entries: List[Entry] = []
+    term: Optional[Tuple[int, str]] = None
+    parts: List[str] = []
+
+    def flush() -> None:
+        if term is not None and len(" ".join(parts).split()) >= 3:
+            entries.append(Entry(term[0], "", term[1], _clean(" ".join(parts))))
+
+    for page_id, line in lines:
+        # A new term only starts once the previous definition has finished its sentence.
+        if _is_term(line, max_words) and (not parts or parts[-1].endswith((".", ")"))):
+            flush()
+            term, parts = (page_id, line), []
+        elif term is not None:
+            parts.append(line)
+    flush()
+    return entries
+
+
+def parse(lines: List[Tuple[int, str]], max_words: int) -> List[Entry]:
+    """Entries of one definitions section, in the layout that yields the most."""
+    if sum(1 for _, line in lines if NUMBER_RE.match(line)) >= 2:
+        return _iso_entries(lines, max_words)
+    run_in = _run_in_entries(lines, max_words)
+    block = _block_entries(lines, max_words)
+    return run_in if len(run_in) >= len(block) else block
+
+
+def entries(pages: Sequence[Tuple[int, str]]) -> List[Entry]:
+    """Definitions found in a standard's ``(page_id, text)`` pages (page order), one per key.
+
+    Every heading is tried and the section yielding the most entries wins, so
+    a table of contents or a passing mention of "Glossary" loses to the real one.
+    """
+    config = glossary_settings()
+    best: List[Entry] = []
+    for start, (_, text) in enumerate(pages):
+        for line_no, line in enumerate(text.split("\n")):
+            heading = HEADING_RE.match(line)
+            if heading:
+                section = _section(pages, start, line_no + 1, heading.group(1), int(config["MAX_PAGES"]))
+                found = parse(section, int(config["MAX_TERM_WORDS"]))
+                if len(found) > len(best):
+                    best = found
+    if len(best) < config["MIN_ENTRIES"]:
+        return []
+    unique: Dict[str, Entry] = {}
+    for entry in best:
+        if key(entry.term):
+            unique.setdefault(key(entry.term), entry)
+    return list(unique.values())
+
+
+def index_standard(standard: Standard) -> int:
+    """Replace ``standard``'s definitions with those found in its pages; returns how many."""
+    if not glossary_settings()["ENABLED"]:
+        return 0
+    pages = list(Page.objects.filter(standard=standard).order_by("page_index").values_list("id", "content"))
+    found = entries(pages)
+    with transaction.atomic():
+        Definition.objects.filter(standard=standard).delete()
+        Definition.objects.bulk_create(
+            Definition(standard=standard, page_id=e.page_id, term=e.term[:255], key=key(e.term),
+                       clause=e.clause, definition=e.definition)
+            for e in found
+        )
+    return len(found)
+
+
+def lookup(term: str, standard_ids: Optional[Iterable[int]] = None, limit: int = 50) -> Tuple[List[Definition], bool]:
+    """Definitions whose key equals ``term``'s, else those starting with it; and whether the match was exact."""
+    wanted = key(term)
+    if not wanted:
+        return [], False
+    rows = (
+        Definition.objects.select_related("standard", "page")
+        .defer("page__content", "page__content_html", "page__raw_content")
+        .order_by("standard__title", "key")
+    )
+    if standard_ids is not None:
+        rows = rows.filter(standard_id__in=list(standard_ids))
+    exact = list(rows.filter(key=wanted)[:limit])
+    if exact:
+        return exact, True
+    # Range instead of LIKE so SQLite can walk the key index.
+    return list(rows.filter(key__gte=wanted, key__lt=wanted + "\uffff")[:limit]), False
+
+
+def side_by_side(term: str, standards: Sequence[Standard]) -> List[dict]:
+    """One ``{"standard", "definitions"}`` column per standard for the compare view; empty if none defines ``term``."""
+    found, _ = lookup(term)
+    if not found:
+        return []
+    by_standard: Dict[int, List[Definition]] = {}
+    for definition in found:
+        by_standard.setdefault(definition.standard_id, []).append(definition)
+    return [{"standard": s, "definitions": by_standard.get(s.id, [])} for s in standards]
@@ -0,0 +1,172 @@
+"""Snippet and highlight generation shared by the search, compare and tailor views.
+
+Query terms are compiled once into a case-insensitive pattern (cached per
+query) whose word boundaries are those of the ``unicode61`` tokenizer, so
+exactly the words FTS matched are marked. Hits are located with a single regex
+scan of the passage or page text and the densest windows are rendered as
+HTML-escaped fragments with ``<mark>`` around each hit. This replaces the SQLite-side ``snippet()`` and
+``substr(instr(lower(...)))`` windows, which recomputed the lowercase of the
+whole page for every row and returned unescaped page text.
+"""
+
+import html as html_lib
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Pattern, Sequence, Tuple
+
+QUERY_TERM_RE = re.compile(r"([^\W_]+)(\*?)", re.UNICODE)
+WORD = r"[^\W_]"  # a unicode61 token character: letters and digits
+QUERY_OPERATORS = {"AND", "OR", "NOT", "NEAR"}
+WHITESPACE_RE = re.compile(r"\s+")
+BREAK_RE = re.compile(r"\s")
+
+ELLIPSIS = " … "
+# Average characters per token in the corpus; turns token window sizes into character spans.
+CHARS_PER_TOKEN = 7
+
+Term = Tuple[str, bool]  # (lowercased term, is_prefix)
+Hit = Tuple[int, int, str]  # (start, end, lowercased matched word)
+
+
+@lru_cache(maxsize=512)
+def query_terms(query: str) -> Tuple[Term, ...]:
+    """Extract the highlightable terms from an FTS query or a plain phrase."""
+    terms: List[Term] = []
+    seen = set()
+    for match in QUERY_TERM_RE.finditer(query or ""):
+        word, star = match.group(1), match.group(2)
+        if word in QUERY_OPERATORS:
+            continue
+        term = (word.lower(), bool(star))
+        if term not in seen:
+            seen.add(term)
+            terms.append(term)
+    return tuple(terms)
+
+
+def terms_for(keywords: Iterable[str]) -> Tuple[Term, ...]:
+    """Combine several keywords (e.g. tailoring phase terms) into one term set."""
+    return query_terms(" ".join(keywords))
+
+
+def substring_terms(phrase: str) -> Tuple[Term, ...]:
+    """Terms for a ``federation.phrase_query`` match, where words may continue (risk -> risks)."""
+    return tuple((term, True) for term, _ in query_terms(phrase))
+
+
+@lru_cache(maxsize=512)
+def term_pattern(terms: Tuple[Term, ...]) -> Optional[Pattern[str]]:
+    """Compile ``terms`` into one alternation; longest terms first so prefixes don't shadow them."""
+    if not terms:
+        return None
+    alternatives = [
+        re.escape(term) + (WORD + "*" if prefix else f"(?!{WORD})")
+        for term, prefix in sorted(terms, key=lambda t: -len(t[0]))
+    ]
+    return re.compile(f"(?<!{WORD})(?:" + "|".join(alternatives) + ")", re.IGNORECASE | re.UNICODE)
+
+
+def find_hits(text: str, terms: Sequence[Term]) -> List[Hit]:
+    pattern = term_pattern(tuple(terms))
+    if pattern is None or not text:
+        return []
+    return [(m.start(), m.end(), m.group(0).lower()) for m in pattern.finditer(text)]
+
+
+def _choose_windows(hits: List[Hit], text_len: int, width: int, max_fragments: int) -> List[Tuple[int, int]]:
+    """Pick up to ``max_fragments`` non-overlapping character windows covering the most distinct words."""
+    candidates = []
+    j = 0
+    for start_hit, _, _ in hits:
+        # Start the window a little before the hit so it reads naturally.
+        start = max(0, min(start_hit - width // 4, text_len - width))
+        end = min(text_len, start + width)
+        while j < len(hits) and hits[j][0] < start:
+            j += 1
+        covered = []
+        for s, _, word in hits[j:]:
+            if s >= end:
+                break
+            covered.append(word)
+        candidates.append((len(set(covered)), len(covered), -start, start, end))
+    candidates.sort(reverse=True)
+    chosen: List[Tuple[int, int]] = []
+    for _, _, _, start, end in candidates:
+        if any(start < e and s < end for s, e in chosen):
+            continue
+        chosen.append((start, end))
+        if len(chosen) >= max_fragments:
+            break
+    return sorted(chosen)
+
+
+def _snap(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Move window edges onto whitespace so fragments never cut a word in half."""
+    if start > 0 and not text[start - 1].isspace():
+        m = BREAK_RE.search(text, start, start + 3 * CHARS_PER_TOKEN)
+        if m:
+            start = m.end()
+    if end < len(text) and not text[end].isspace():
+        m = BREAK_RE.search(text, end, end + 3 * CHARS_PER_TOKEN)
+        end = m.start() if m else min(len(text), end + 3 * CHARS_PER_TOKEN)
+    return start, end
+
+
+def _clean(segment: str) -> str:
+    return html_lib.escape(WHITESPACE_RE.sub(" ", segment))
+
+
+def highlight(
+    text: str,
+    terms: Sequence[Term],
+    size: int = 24,
+    max_fragments: int = 3,
+    start_mark: str = "<mark>",
+    end_mark: str = "</mark>",
+) -> str:
+    """Render HTML-safe highlighted fragments of ``text`` for ``terms``.
+
+    ``size`` is the approximate window length in tokens. When nothing matches,
+    the leading window of the text is returned so callers always have something
+    to show.
+    """
+    if not text:
+        return ""
+    width = size * CHARS_PER_TOKEN
+    hits = find_hits(text, terms)
+    if hits:
+        windows = [_snap(text, s, e) for s, e in _choose_windows(hits, len(text), width, max_fragments)]
+    else:
+        windows = [_snap(text, 0, min(width, len(text)))]
+
+    fragments: List[str] = []
+    j = 0
+    for start, end in windows:
+        parts: List[str] = []
+        cursor = start
+        while j < len(hits) and hits[j][0] < start:
+            j += 1
+        while j < len(hits) and hits[j][1] <= end:
+            s, e, _ = hits[j]
+            parts.append(_clean(text[cursor:s]))
+            parts.append(start_mark + html_lib.escape(text[s:e]) + end_mark)
+            cursor = e
+            j += 1
+        parts.append(_clean(text[cursor:end]))
+        fragments.append("".join(parts).strip())
+    result = ELLIPSIS.join(fragments)
+    if windows[0][0] > 0:
+        result = ELLIPSIS.lstrip() + result
+    if windows[-1][1] < len(text):
+        result = result + ELLIPSIS.rstrip()
+    return result
+
+
+def context_window(text: str, terms: Sequence[Term], width: int = 240) -> str:
+    """Plain-text window of ``width`` characters around the first hit (for fuzzy comparison)."""
+    if not text:
+        return ""
+    pattern = term_pattern(tuple(terms))
+    m = pattern.search(text) if pattern is not None else None
+    begin = max((m.start() if m else 0) - width // 3, 0)
+    return text[begin:begin + width]
@@ -0,0 +1,112 @@
+"""Response compression and corpus-versioned conditional GET.
+
+``CompressionMiddleware`` is Django's ``GZipMiddleware`` (including its BREACH
+length padding) restricted to textual content types above a size threshold.
+
+``conditional`` wraps ``django.views.decorators.http.condition``. It derives
+the ETag and Last-Modified from the ``CorpusVersion`` row, the request path and
+query string, and the visitor's bookmark state. That state is read from the
+signed-cookie session, so computing the validators costs one primary-key
+lookup. A repeat view answers 304 without running the view.
+"""
+
+import functools
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import CorpusVersion
+
+
+DEFAULTS = {
+    "COMPRESS_MIN_SIZE": 1024,
+    "COMPRESS_TYPES": [
+        "text/html",
+        "text/plain",
+        "text/css",
+        "text/csv",
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "image/svg+xml",
+    ],
+    # Part of every ETag; defaults to the newest mtime of this app's code and
+    # templates so a deploy invalidates validators for hard-coded content.
+    "RELEASE": None,
+}
+
+_release: Optional[str] = None
+
+
+def http_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PMHUB_HTTP", {})}
+
+
+def release() -> str:
+    global _release
+    configured = http_settings()["RELEASE"]
+    if configured:
+        return str(configured)
+    if _release is None:
+        roots = [Path(__file__).resolve().parent] + [Path(d) for d in settings.TEMPLATES[0].get("DIRS", [])]
+        newest = max(
+            (p.stat().st_mtime for root in roots for p in root.rglob("*") if p.suffix in (".py", ".html")),
+            default=0.0,
+        )
+        _release = f"{newest:.0f}"
+    return _release
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        config = http_settings()
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in config["COMPRESS_TYPES"]:
+            return response
+        if not response.streaming and len(response.content) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        return super().process_response(request, response)
+
+
+def _validators(request: HttpRequest) -> Tuple[str, datetime]:
+    cached = getattr(request, "_pmhub_validators", None)
+    if cached is not None:
+        return cached
+    corpus = CorpusVersion.current()
+    bookmarks_at = float(request.session.get("bookmarks_at", 0))
+    state = "|".join([
+        release(),
+        str(corpus.version),
+        request.get_full_path(),
+        request.session.get("bookmark_key", ""),
+        repr(bookmarks_at),
+        # The page embeds a CSRF token; a cached copy must not outlive the cookie it matches.
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    ])
+    etag = hashlib.sha1(state.encode("utf-8")).hexdigest()[:24]
+    last_modified = max(corpus.updated_at, datetime.fromtimestamp(bookmarks_at, tz=dt_timezone.utc))
+    request._pmhub_validators = (etag, last_modified)  # type: ignore[attr-defined]
+    return etag, last_modified
+
+
+def conditional(view):  # type: ignore[no-untyped-def]
+    """ETag/Last-Modified from corpus version + bookmark state; clients must revalidate every time."""
+    wrapped = condition(
+        etag_func=lambda request, *args, **kwargs: _validators(request)[0],
+        last_modified_func=lambda request, *args, **kwargs: _validators(request)[1],
+    )(view)
+
+    @functools.wraps(view)
+    def inner(request: HttpRequest, *args, **kwargs) -> HttpResponse:  # type: ignore[no-untyped-def]
+        response = wrapped(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return inner
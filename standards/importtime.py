@@ -0,0 +1,99 @@
+"""Start-up import cost of web workers and management commands.
+
+``measure`` starts a fresh interpreter under ``python -X importtime`` for one
+of ``TARGETS`` and parses the per-module lines it prints on stderr. The total
+is the sum of the top-level cumulative times, i.e. the time spent importing
+before the process can do any work. Best of ``runs``, since a cold page cache
+or a busy machine only ever makes it slower.
+
+``HEAVY`` are the packages that only ingest, concept search, spelling
+correction and compare/insights scoring need. The modules using them import
+them inside the functions that do that work, so none of them may show up in a
+target's imports (see ``standards.tests``); ``BUDGET_MS`` caps the rest
+(``manage.py benchmark_imports --fail-over-budget``).
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+
+TARGETS = {
+    # What a WSGI worker imports before it can answer its first request.
+    "web": ["-c", "import pmhub.wsgi, pmhub.urls"],
+    "manage": ["manage.py", "help"],
+    "ingest_standards": ["manage.py", "ingest_standards", "--help"],
+}
+BUDGET_MS = {"web": 600, "manage": 450, "ingest_standards": 450}
+HEAVY = ("numpy", "PIL", "pdfminer", "pypdf", "bs4", "ebooklib", "lxml", "rapidfuzz")
+
+Module = namedtuple("Module", "name self_ms cumulative_ms depth")
+Report = namedtuple("Report", "target total_ms modules heavy")  # modules: [Module, ...] in import order
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class ImportTimeError(Exception):
+    pass
+
+
+def parse(stderr: str) -> List[Module]:
+    """``Module`` rows from ``-X importtime`` output; other stderr lines are ignored."""
+    modules = []
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules.append(Module(name, int(own) / 1000, int(cumulative) / 1000, (len(indent) - 1) // 2))
+    return modules
+
+
+def heavy(modules: List[Module]) -> List[str]:
+    """The ``HEAVY`` packages among ``modules``."""
+    loaded = {m.name.split(".")[0] for m in modules}
+    return [name for name in HEAVY if name in loaded]
+
+
+def run_once(target: str) -> Report:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "pmhub.settings")}
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *TARGETS[target]],
+        cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True, timeout=120,
+    )
+    if proc.returncode != 0:
+        raise ImportTimeError(f"{target} exited with {proc.returncode}: {proc.stderr.strip().splitlines()[-1:]}")
+    modules = parse(proc.stderr)
+    total = sum(m.cumulative_ms for m in modules if m.depth == 0)
+    return Report(target, total, modules, heavy(modules))
+
+
+def measure(target: str, runs: int = 3) -> Report:
+    """Fastest of ``runs`` cold starts of ``target``."""
+    if target not in TARGETS:
+        raise ImportTimeError(f"Unknown target {target!r}; choose from {', '.join(TARGETS)}")
+    best: Optional[Report] = None
+    for _ in range(max(runs, 1)):
+        report = run_once(target)
+        if best is None or report.total_ms < best.total_ms:
+            best = report
+    return best  # type: ignore[return-value]
+
+
+def slowest(report: Report, count: int = 15) -> List[Module]:
+    """Modules with the largest self time."""
+    return sorted(report.modules, key=lambda m: m.self_ms, reverse=True)[:count]
+
+
+def by_package(report: Report) -> Dict[str, float]:
+    """Self time summed per top-level package, slowest first."""
+    totals: Dict[str, float] = {}
+    for m in report.modules:
+        package = m.name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + m.self_ms
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
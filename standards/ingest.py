@@ -0,0 +1,378 @@
+"""PDF/EPUB ingestion shared by the ``ingest_standards`` command and the job runner.
+
+Sources are parsed into a stream of ``(page_index, text, html)`` tuples that
+``run_job`` commits in small batches. After every batch the job row records
+the next page to ingest, so an interrupted job resumes from the last committed
+page instead of starting over inside one giant transaction. Once the last
+batch is in, repeated headers/footers are stripped (see ``boilerplate``) and
+the definitions and clause cross-references are indexed (see ``glossary`` and
+``crossrefs``).
+
+Fast mode extracts PDF text with pypdf only, so a standard is searchable in
+seconds. Its pages have no ``content_html`` until ``render_html`` renders one
+on the first text view of the page or the queued HTML backfill job reaches it.
+
+The parsers (pypdf, pdfminer, ebooklib, BeautifulSoup) are imported by the
+functions that use them, so web workers and unrelated commands that import
+this module for ``enqueue`` or ``ingest_settings`` never load them.
+"""
+
+import posixpath
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import boilerplate, crossrefs, figures, glossary, passages, scenarios, snapshots, stats
+from .models import CorpusVersion, IngestJob, Page, Standard
+
+if TYPE_CHECKING:
+    from ebooklib import epub
+
+
+DEFAULTS = {
+    "SOURCE_DIR": None,
+    "BATCH_SIZE": 25,
+    "WORKERS": 1,
+    "POLL_INTERVAL": 2.0,
+    "STALE_AFTER": 300,
+    "MODE": "full",
+    "HTML_BACKFILL": True,
+}
+
+SOURCE_TYPES = {".pdf": "pdf", ".epub": "epub"}
+
+ParsedPage = Tuple[int, str, Optional[str]]  # (page_index, text, html)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def ingest_settings() -> dict:
+    config = {**DEFAULTS, **getattr(settings, "PMHUB_INGEST", {})}
+    if config["SOURCE_DIR"] is None:
+        config["SOURCE_DIR"] = settings.BASE_DIR
+    return config
+
+
+def source_files(base_dir: Path) -> List[Path]:
+    return list(base_dir.glob("*.pdf")) + list(base_dir.glob("*.epub"))
+
+
+def count_pages(path: Path) -> Optional[int]:
+    """Physical page count for PDFs (cheap with pypdf); EPUB pagination is only known after parsing."""
+    if path.suffix.lower() != ".pdf":
+        return None
+    from pypdf import PdfReader
+
+    try:
+        return len(PdfReader(str(path)).pages)
+    except Exception:
+        return None
+
+
+def pdf_pages(path: Path, start: int = 0, only: Optional[Set[int]] = None) -> Iterator[ParsedPage]:
+    """pdfminer text and HTML per page; ``only`` restricts layout analysis to those page indexes."""
+    from bs4 import BeautifulSoup
+    from pdfminer.converter import HTMLConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    rsrcmgr = PDFResourceManager()
+    laparams = LAParams(line_margin=0.2, word_margin=0.1)
+    writer = figures.FigureWriter()
+    try:
+        with open(str(path), 'rb') as fp:
+            interpreter = PDFPageInterpreter(rsrcmgr, None)  # will be set per-page
+            for idx, page in enumerate(PDFPage.get_pages(fp)):
+                if idx < start or (only is not None and idx not in only):
+                    continue
+                outfp = BytesIO()
+                device = HTMLConverter(rsrcmgr, outfp, laparams=laparams, imagewriter=writer)
+                interpreter.device = device
+                interpreter.process_page(page)
+                device.close()
+                html_full = outfp.getvalue().decode('utf-8', errors='ignore')
+                soup = BeautifulSoup(html_full, 'lxml')
+                body = soup.body or soup
+                for tag in body.find_all(['script', 'style']):
+                    tag.decompose()
+                writer.finish(body)
+                yield idx, body.get_text("\n", strip=False), str(body)
+    finally:
+        writer.close()
+
+
+def pdf_text_pages(path: Path, start: int = 0) -> Iterator[ParsedPage]:
+    """Text only, via pypdf: no layout analysis and no HTML (``render_html`` fills that in later)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(str(path))
+    for idx in range(start, len(reader.pages)):
+        yield idx, reader.pages[idx].extract_text() or "", None
+
+
+def render_html(page: Page) -> Optional[str]:
+    """Render and store the HTML of one page ingested in fast mode; None if it cannot be rendered.
+
+    ``page`` may have been read from a published snapshot, which keeps
+    ``content_html`` empty until the next publish, so HTML an earlier view
+    already stored in the main database is returned without rendering again.
+    """
+    standard = page.standard
+    if standard.source_type != "pdf":
+        return None
+    stored = Page.objects.using("default").filter(pk=page.pk).values_list("content_html", flat=True).first()
+    if stored:
+        page.content_html = stored
+        return stored
+    path = Path(standard.file_path)
+    if not path.is_file():
+        return None
+    for _, _, html in pdf_pages(path, page.page_index, only={page.page_index}):
+        # UPDATE OF content_html only: the page_fts trigger does not fire.
+        Page.objects.filter(pk=page.pk).update(content_html=html)
+        page.content_html = html
+        return html
+    return None
+
+
+def epub_pages(path: Path, start: int = 0) -> Iterator[ParsedPage]:
+    from bs4 import BeautifulSoup
+    from ebooklib import epub
+
+    book = epub.read_epub(str(path))
+    texts: List[str] = []
+    page_idx = 0
+    for item in book.get_items():
+        # 9 corresponds to DOCUMENT type in ebooklib
+        if getattr(item, 'media_type', '').endswith('html') or item.get_type() == 9:
+            soup = BeautifulSoup(item.get_content(), "lxml")
+            # Keep headings, lists: minimal HTML
+            for tag in soup(["script", "style"]):
+                tag.decompose()
+            # Store HTML in chunks of roughly pages
+            body = soup.body or soup
+            # Images go to the figure store; chunks keep only lazy <img> references.
+            figures.rewrite_images(body, lambda src, item=item: _epub_image(book, item, src))
+            # Virtual pagination: split by block elements into ~1200-1600 char chunks
+            html_chunks: List[str] = []
+            current: List[str] = []
+            acc_len = 0
+            min_len = 800
+            block_tags = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "table", "pre", "blockqcouote", "img", "div"}
+            for child in list(body.children):
+                if getattr(child, 'name', None) is None:
+                    # NavigableString
+                    text_piece = str(child)
+                    if text_piece.strip():
+                        current.append(text_piece)
+                        acc_len += len(text_piece)
+                    continue
+                # Tag
+                html_piece = str(child)
+                current.append(html_piece)
+                acc_len += len(child.get_text(" ", strip=False))
+                if child.name in block_tags and acc_len >= min_len:
+                    html_chunks.append("".join(current))
+                    current = []
+                    acc_len = 0
+            if current:
+                html_chunks.append("".join(current))
+
+            if not html_chunks:
+                html_chunks = [str(body)]
+
+            for chunk in html_chunks:
+                text = BeautifulSoup(chunk, "lxml").get_text("\n", strip=False)
+                texts.append(text)
+                if page_idx >= start:
+                    yield page_idx, text, chunk
+                page_idx += 1
+    # If no items captured (rare), fallback to chunking concatenated text
+    if page_idx == 0:
+        full_text = "\n\n".join(texts)
+        for idx, chunk in enumerate(split_text(full_text)):
+            if idx >= start:
+                yield idx, chunk, None
+
+
+def _epub_image(book: "epub.EpubBook", item: "epub.EpubItem", src: str) -> Optional[bytes]:
+    href = posixpath.normpath(posixpath.join(posixpath.dirname(item.get_name()), unquote(src.split("#")[0])))
+    image = book.get_item_with_href(href)
+    return image.get_content() if image is not None else None
+
+
+def split_text(text: str) -> List[str]:
+    tokens = text.split()
+    chunk_size = 400
+    chunks: List[str] = []
+    current: List[str] = []
+    for tok in tokens:
+        current.append(tok)
+        if len(current) >= chunk_size:
+            chunks.append(" ".join(current))
+            current = []
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def parse(path: Path, start: int = 0, mode: str = IngestJob.MODE_FULL) -> Iterator[ParsedPage]:
+    if path.suffix.lower() == ".pdf":
+        return pdf_text_pages(path, start) if mode == IngestJob.MODE_FAST else pdf_pages(path, start)
+    return epub_pages(path, start)
+
+
+def standard_for(path: Path) -> Standard:
+    std, _ = Standard.objects.get_or_create(
+        title=path.stem,
+        defaults={"file_path": str(path), "source_type": SOURCE_TYPES[path.suffix.lower()]},
+    )
+    return std
+
+
+def enqueue(path: Path, rebuild: bool = False, mode: Optional[str] = None) -> IngestJob:
+    return IngestJob.objects.create(file_path=str(path), rebuild=rebuild, mode=mode or ingest_settings()["MODE"])
+
+
+def _html_backfill(job: IngestJob, standard: Standard, path: Path) -> Iterator[Page]:
+    """Pages still lacking HTML, rendered in page order from ``job.next_page_index``."""
+    pending: Dict[int, int] = dict(
+        standard.pages.filter(content_html__isnull=True, page_index__gte=job.next_page_index)
+        .values_list("page_index", "id")
+    )
+    if not pending or standard.source_type != "pdf":
+        return
+    for idx, _, html in pdf_pages(path, job.next_page_index, only=set(pending)):
+        yield Page(pk=pending[idx], standard=standard, page_index=idx, content_html=html)
+
+
+def publish(jobs: List[IngestJob]) -> None:
+    """Publish one snapshot for a batch of finished ``jobs``; a failure is recorded on them."""
+    try:
+        snapshots.publish()
+    except Exception as exc:
+        error = f"snapshot: {type(exc).__name__}: {exc}"
+        done = [job.pk for job in jobs if job.status == IngestJob.STATUS_DONE]
+        IngestJob.objects.filter(pk__in=done).update(status=IngestJob.STATUS_FAILED, error=error)
+        for job in jobs:
+            if job.pk in done:
+                job.status, job.error = IngestJob.STATUS_FAILED, error
+
+
+def run_job(job: IngestJob, progress: Optional[Callable[[IngestJob], None]] = None, publish_snapshot: bool = True) -> IngestJob:
+    """Ingest ``job.file_path`` in committed page batches, resuming from ``job.next_page_index``.
+
+    ``MODE_FAST`` stores pypdf text only and queues a ``MODE_HTML`` job that
+    adds the pdfminer HTML to those pages afterwards. A failure of the
+    follow-up indexing fails the job, with the step in ``job.error``.
+    Callers running several jobs pass ``publish_snapshot=False`` and call
+    ``publish`` once for all of them.
+    """
+    path = Path(job.file_path)
+    config = ingest_settings()
+    batch_size = int(config["BATCH_SIZE"])
+    standard = job.standard or standard_for(path)
+    fresh = job.started_at is None
+    backfill = job.mode == IngestJob.MODE_HTML
+
+    job.standard = standard
+    job.status = IngestJob.STATUS_RUNNING
+    job.error = ""
+    if fresh:
+        job.started_at = timezone.now()
+        if backfill:
+            job.next_page_index = 0
+        elif job.rebuild:
+            Page.objects.filter(standard=standard).delete()
+            stats.refresh(standard)
+            CorpusVersion.bump()
+            job.next_page_index = 0
+        else:
+            # Pages already in the table count as committed: continue after them.
+            last = standard.pages.order_by("-page_index").values_list("page_index", flat=True).first()
+            job.next_page_index = 0 if last is None else last + 1
+        job.pages_total = count_pages(path)
+    job.save()
+
+    run_started = time.perf_counter()
+    run_pages = 0
+    batch: List[Page] = []
+
+    def commit() -> None:
+        nonlocal batch, run_pages
+        if not batch:
+            return
+        with transaction.atomic():
+            if backfill:
+                # Same text, so search results and HTTP validators stay valid.
+                Page.objects.bulk_update(batch, ["content_html"])
+            else:
+                Page.objects.bulk_create(batch)
+                passages.index_pages(batch, replace=False)
+                stats.record_batch(standard, batch)
+                CorpusVersion.bump()
+            job.pages_done += len(batch)
+            job.next_page_index = batch[-1].page_index + 1
+            run_pages += len(batch)
+            job.pages_per_sec = run_pages / max(time.perf_counter() - run_started, 1e-6)
+            job.save(update_fields=["pages_done", "next_page_index", "pages_per_sec", "updated_at"])
+        batch = []
+        if progress:
+            progress(job)
+        if IngestJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+            raise JobCancelled
+
+    step = "pages"
+    try:
+        if backfill:
+            pages = _html_backfill(job, standard, path)
+        else:
+            pages = (
+                Page(standard=standard, page_index=idx, content=text, content_html=html)
+                for idx, text, html in parse(path, job.next_page_index, job.mode)
+            )
+        for page in pages:
+            batch.append(page)
+            if len(batch) >= batch_size:
+                commit()
+        commit()
+        if not backfill:
+            from . import spelling
+
+            # Running headers/footers are only recognisable once the whole document is in.
+            step = "boilerplate"
+            boilerplate.strip_standard(standard)
+            step = "glossary"
+            glossary.index_standard(standard)
+            step = "crossrefs"
+            crossrefs.index_standard(standard)
+            step = "spelling"
+            spelling.build()
+            step = "scenarios"
+            scenarios.refresh()
+        step = "backfill"
+        if job.mode == IngestJob.MODE_FAST and standard.source_type == "pdf" and config["HTML_BACKFILL"]:
+            IngestJob.objects.create(file_path=job.file_path, standard=standard, mode=IngestJob.MODE_HTML)
+    except JobCancelled:
+        job.status = IngestJob.STATUS_CANCELLED
+    except Exception as exc:
+        job.status = IngestJob.STATUS_FAILED
+        job.error = f"{type(exc).__name__}: {exc}" if step == "pages" else f"{step}: {type(exc).__name__}: {exc}"
+    else:
+        job.status = IngestJob.STATUS_DONE
+        if job.pages_total is None:
+            job.pages_total = job.next_page_index
+    job.finished_at = timezone.now()
+    job.save()
+    if publish_snapshot and job.status == IngestJob.STATUS_DONE:
+        publish([job])
+    return job
@@ -0,0 +1,107 @@
+"""In-process worker threads for queued ``IngestJob`` rows.
+
+Jobs are claimed with a conditional ``UPDATE ... WHERE status='queued'`` so
+several threads (or several ``ingest_worker`` processes sharing the SQLite
+file) never run the same job twice. A job whose worker died stays ``running``
+with a stale ``updated_at``; ``requeue_stale`` puts it back in the queue and
+``ingest.run_job`` resumes it from ``next_page_index``.
+"""
+
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import List, Optional
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import ingest, snapshots
+from .models import IngestJob
+
+
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"[:120]
+
+
+def requeue_stale() -> int:
+    cutoff = timezone.now() - timedelta(seconds=ingest.ingest_settings()["STALE_AFTER"])
+    return IngestJob.objects.filter(status=IngestJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=IngestJob.STATUS_QUEUED, worker=""
+    )
+
+
+def claim_next() -> Optional[IngestJob]:
+    """Atomically take the oldest queued job, or return ``None`` when the queue is empty."""
+    name = worker_name()
+    while True:
+        job_id = (
+            IngestJob.objects.filter(status=IngestJob.STATUS_QUEUED)
+            .order_by("created_at").values_list("id", flat=True).first()
+        )
+        if job_id is None:
+            return None
+        claimed = IngestJob.objects.filter(id=job_id, status=IngestJob.STATUS_QUEUED).update(
+            status=IngestJob.STATUS_RUNNING, worker=name, updated_at=timezone.now()
+        )
+        if claimed:
+            return IngestJob.objects.get(id=job_id)
+
+
+def cancel(job: IngestJob) -> None:
+    """Queued jobs are cancelled immediately; running ones stop after their current batch."""
+    IngestJob.objects.filter(id=job.id).update(cancel_requested=True)
+    IngestJob.objects.filter(id=job.id, status=IngestJob.STATUS_QUEUED).update(
+        status=IngestJob.STATUS_CANCELLED, finished_at=timezone.now()
+    )
+
+
+def run_pending(once: bool = False) -> int:
+    """Process queued jobs until the queue is empty, then publish one snapshot; returns the number of jobs run.
+
+    The snapshot is also published when other edits (scenarios saved in the
+    admin) left it ``behind`` the main database; a failed publish is retried
+    on the next pass.
+    """
+    ran: List[IngestJob] = []
+    requeue_stale()
+    while True:
+        job = claim_next()
+        if job is None:
+            break
+        ran.append(ingest.run_job(job, publish_snapshot=False))
+        if once:
+            break
+    if any(job.status == IngestJob.STATUS_DONE for job in ran) or snapshots.behind():
+        ingest.publish(ran)
+    return len(ran)
+
+
+def _worker_loop() -> None:
+    poll = float(ingest.ingest_settings()["POLL_INTERVAL"])
+    while True:
+        close_old_connections()
+        try:
+            run_pending()
+        finally:
+            close_old_connections()
+        _wakeup.wait(poll)
+        _wakeup.clear()
+
+
+def ensure_workers(count: Optional[int] = None) -> None:
+    """Start the in-process daemon workers once, then just nudge them awake."""
+    count = int(count or ingest.ingest_settings()["WORKERS"])
+    with _workers_lock:
+        alive = [t for t in _workers if t.is_alive()]
+        for n in range(len(alive), count):
+            thread = threading.Thread(target=_worker_loop, name=f"ingest-worker-{n}", daemon=True)
+            thread.start()
+            alive.append(thread)
+        _workers[:] = alive
+    _wakeup.set()
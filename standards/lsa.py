@@ -0,0 +1,246 @@
+"""Latent semantic ("concept") search over pages, built offline with NumPy only.
+
+``build_lsa`` tokenises every page, builds a sublinear TF-IDF matrix in CSR
+form and factorises it with a randomized truncated SVD (Halko et al.). The
+result is written to ``PMHUB_LSA["ROOT"]``:
+
+``vocab.json``       term -> column, plus the IDF weights and build metadata
+``components.npy``   terms x k projection (right singular vectors, float32)
+``doc_vectors.npy``  pages x k unit-length page vectors (float32)
+``page_ids.npy``     row -> ``Page.id``
+
+The arrays are memory-mapped at query time. A query is folded into the same
+space with one sparse row times ``components`` and scored with a single
+matrix-vector product against ``doc_vectors``, followed by top-k selection.
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+from collections import Counter, namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+
+DEFAULTS = {
+    "ROOT": None,
+    "COMPONENTS": 128,
+    "MIN_DF": 2,
+    "MAX_DF": 0.9,
+    "MAX_FEATURES": 50000,
+}
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]{2,}")
+STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has him his how its may new now "
+    "see two who did get let put say she too use with that this from they will would there their what "
+    "about which when make like than then them these some could been have into more other only over "
+    "such also where shall should each within between through used using being those both most must "
+    "page figure table iso isbn copyright rights reserved".split()
+)
+
+ConceptHit = namedtuple("ConceptHit", "page_id score")
+
+
+class IndexMissing(Exception):
+    pass
+
+
+def lsa_settings() -> dict:
+    config = {**DEFAULTS, **getattr(settings, "PMHUB_LSA", {})}
+    if config["ROOT"] is None:
+        config["ROOT"] = Path(settings.BASE_DIR) / "lsa"
+    return config
+
+
+def tokenize(text: str) -> List[str]:
+    return [tok for tok in TOKEN_RE.findall(text.lower()) if tok not in STOPWORDS]
+
+
+# --- sparse helpers -----------------------------------------------------------
+
+def _csr_matmul(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, dense: np.ndarray,
+                budget: int = 4_000_000) -> np.ndarray:
+    """CSR (rows x cols) @ dense (cols x k), in row blocks of about ``budget`` products to bound memory."""
+    rows = len(indptr) - 1
+    out = np.zeros((rows, dense.shape[1]), dtype=np.float64)
+    step = max(1, budget // max(dense.shape[1], 1))
+    start = 0
+    while start < rows:
+        stop = int(np.searchsorted(indptr, indptr[start] + step, side="right")) - 1
+        stop = min(max(stop, start + 1), rows)
+        lo, hi = indptr[start], indptr[stop]
+        if hi > lo:
+            products = data[lo:hi, None] * dense[indices[lo:hi]]
+            offsets = indptr[start:stop] - lo
+            nonempty = np.diff(indptr[start:stop + 1]) > 0
+            out[start:stop][nonempty] = np.add.reduceat(products, offsets[nonempty], axis=0)
+        start = stop
+    return out
+
+
+def _transpose(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_cols: int):  # type: ignore[no-untyped-def]
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    t_indptr = np.zeros(n_cols + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n_cols), out=t_indptr[1:])
+    return t_indptr, rows[order], data[order]
+
+
+def randomized_svd(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_cols: int, k: int,
+                   oversample: int = 10, n_iter: int = 4, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-``k`` singular values and right singular vectors (cols x k) of a CSR matrix."""
+    rng = np.random.default_rng(seed)
+    t_indptr, t_indices, t_data = _transpose(indptr, indices, data, n_cols)
+    n_rows = len(indptr) - 1
+    width = min(k + oversample, n_rows, n_cols)
+    q = _csr_matmul(indptr, indices, data, rng.standard_normal((n_cols, width)))
+    q, _ = np.linalg.qr(q)
+    for _ in range(n_iter):
+        z, _ = np.linalg.qr(_csr_matmul(t_indptr, t_indices, t_data, q))
+        q, _ = np.linalg.qr(_csr_matmul(indptr, indices, data, z))
+    b_t = _csr_matmul(t_indptr, t_indices, t_data, q)  # (Q^T A)^T: cols x width
+    _, s, vt = np.linalg.svd(b_t.T, full_matrices=False)
+    k = min(k, len(s))
+    return s[:k], vt[:k].T
+
+
+# --- build --------------------------------------------------------------------
+
+def build(pages: Iterable[Tuple[int, str]], components: Optional[int] = None) -> Dict[str, object]:
+    """Build and atomically publish the index from ``(page_id, text)`` pairs."""
+    config = lsa_settings()
+    k = int(components or config["COMPONENTS"])
+    page_ids: List[int] = []
+    docs: List[Counter] = []
+    df: Counter = Counter()
+    for page_id, text in pages:
+        counts = Counter(tokenize(text or ""))
+        page_ids.append(page_id)
+        docs.append(counts)
+        df.update(counts.keys())
+    n_docs = len(docs)
+    if n_docs == 0:
+        raise IndexMissing("No pages to index")
+
+    max_df = config["MAX_DF"] * n_docs if n_docs >= 20 else n_docs
+    kept = [t for t, n in df.items() if n >= min(config["MIN_DF"], n_docs) and n <= max_df]
+    kept.sort(key=lambda t: (-df[t], t))
+    kept = sorted(kept[: config["MAX_FEATURES"]])
+    if not kept:
+        raise IndexMissing("No terms pass the document-frequency limits (MIN_DF/MAX_DF)")
+    vocab = {t: i for i, t in enumerate(kept)}
+    idf = np.array([math.log((1 + n_docs) / (1 + df[t])) + 1.0 for t in kept], dtype=np.float64)
+
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for counts in docs:
+        row = sorted((vocab[t], c) for t, c in counts.items() if t in vocab)
+        weights = np.array([(1.0 + math.log(c)) * idf[j] for j, c in row], dtype=np.float64)
+        norm = float(np.linalg.norm(weights)) or 1.0
+        indices.extend(j for j, _ in row)
+        data.extend((weights / norm).tolist())
+        indptr.append(len(indices))
+    indptr_a = np.array(indptr, dtype=np.int64)
+    indices_a = np.array(indices, dtype=np.int64)
+    data_a = np.array(data, dtype=np.float64)
+
+    singular_values, components_ = randomized_svd(indptr_a, indices_a, data_a, len(kept), k)
+    doc_vectors = _csr_matmul(indptr_a, indices_a, data_a, components_)
+    doc_vectors /= np.maximum(np.linalg.norm(doc_vectors, axis=1, keepdims=True), 1e-12)
+
+    meta = {
+        "pages": n_docs,
+        "terms": len(kept),
+        "components": int(components_.shape[1]),
+        "nnz": int(len(data_a)),
+        "explained": float((singular_values ** 2).sum() / max(float((data_a ** 2).sum()), 1e-12)),
+    }
+    root = Path(config["ROOT"])
+    tmp = root.with_name(root.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "components.npy", components_.astype(np.float32))
+    np.save(tmp / "doc_vectors.npy", doc_vectors.astype(np.float32))
+    np.save(tmp / "page_ids.npy", np.array(page_ids, dtype=np.int64))
+    (tmp / "vocab.json").write_text(json.dumps({"meta": meta, "terms": kept, "idf": idf.tolist()}), encoding="utf-8")
+    old = root.with_name(root.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if root.exists():
+        os.replace(root, old)
+    os.replace(tmp, root)
+    shutil.rmtree(old, ignore_errors=True)
+    _index["key"] = None
+    return meta
+
+
+# --- query --------------------------------------------------------------------
+
+_index: Dict[str, object] = {"key": None}
+
+
+def _load() -> Dict[str, object]:
+    root = Path(lsa_settings()["ROOT"])
+    try:
+        key = (str(root), (root / "vocab.json").stat().st_mtime_ns)
+    except OSError:
+        raise IndexMissing("Concept index not built; run `manage.py build_lsa`")
+    if _index["key"] != key:
+        payload = json.loads((root / "vocab.json").read_text(encoding="utf-8"))
+        _index.update(
+            key=key,
+            meta=payload["meta"],
+            vocab={t: i for i, t in enumerate(payload["terms"])},
+            idf=np.array(payload["idf"], dtype=np.float32),
+            components=np.load(root / "components.npy", mmap_mode="r"),
+            doc_vectors=np.load(root / "doc_vectors.npy", mmap_mode="r"),
+            page_ids=np.load(root / "page_ids.npy", mmap_mode="r"),
+        )
+    return _index
+
+
+def available() -> bool:
+    try:
+        _load()
+    except IndexMissing:
+        return False
+    return True
+
+
+def query_vector(text: str) -> Optional[np.ndarray]:
+    index = _load()
+    vocab: Dict[str, int] = index["vocab"]  # type: ignore[assignment]
+    counts = Counter(t for t in tokenize(text) if t in vocab)
+    if not counts:
+        return None
+    cols = np.array([vocab[t] for t in counts], dtype=np.int64)
+    weights = np.array([1.0 + math.log(c) for c in counts.values()], dtype=np.float32) * index["idf"][cols]  # type: ignore[index]
+    vector = weights @ np.asarray(index["components"][cols])  # type: ignore[index]
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+def search(text: str, limit: int = 300, page_ids: Optional[Iterable[int]] = None) -> List[ConceptHit]:
+    """Pages closest to ``text`` in concept space, best first (only positive similarities).
+
+    ``page_ids`` restricts the ranking to those pages before the top-k cut.
+    """
+    vector = query_vector(text)
+    if vector is None:
+        return []
+    index = _load()
+    scores = np.asarray(index["doc_vectors"]) @ vector  # type: ignore[operator]
+    if page_ids is not None:
+        allowed = np.isin(index["page_ids"], np.fromiter(page_ids, dtype=np.int64))  # type: ignore[arg-type]
+        scores = np.where(allowed, scores, 0)
+    limit = min(limit, len(scores))
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top])]
+    page_ids = index["page_ids"]
+    return [ConceptHit(int(page_ids[i]), float(scores[i])) for i in top if scores[i] > 0]  # type: ignore[index]
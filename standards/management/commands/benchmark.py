@@ -0,0 +1,163 @@
+import json
+import platform
+import sqlite3
+import tempfile
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlencode
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from standards import benchmarks as bench
+from standards import federation
+from standards.models import Page, Standard
+
+
+class Command(BaseCommand):
+    help = "Time ingest, search, compare, insights, tailor, process_document and page_view on synthetic corpora"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--sizes", default="1000", help="Comma-separated corpus sizes in pages, e.g. 1000,10000,100000")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--ingest-pages", type=int, default=20, help="Pages in the synthetic PDF used to time ingest_standards")
+        parser.add_argument("--ingest-chapters", type=int, default=10, help="Chapters in the synthetic EPUB used to time ingest_standards")
+        parser.add_argument("--skip-ingest", action="store_true")
+        parser.add_argument("--tmpdir", default=None, help="Where to create the temporary databases")
+        parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+        parser.add_argument("--baseline", help="Previously saved JSON results to compare against")
+        parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+        tmp_root = Path(options["tmpdir"] or tempfile.gettempdir())
+        repeat = options["repeat"]
+        seed = options["seed"]
+
+        results: Dict[str, object] = {
+            "meta": {
+                "sizes": sizes,
+                "repeat": repeat,
+                "seed": seed,
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "machine": platform.machine(),
+            },
+            "sizes": {},
+        }
+        if not options["skip_ingest"]:
+            results["ingest"] = self._bench_ingest(tmp_root, options["ingest_pages"], options["ingest_chapters"], seed)
+        for size in sizes:
+            self.stderr.write(f"Benchmarking {size} pages...")
+            with bench.temporary_database(tmp_root):
+                bench.populate(size, seed=seed)
+                results["sizes"][str(size)] = self._bench_corpus(repeat)  # type: ignore[index]
+
+        payload = json.dumps(results, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(payload)
+            self.stderr.write(f"Results written to {options['output']}")
+        else:
+            self.stdout.write(payload)
+
+        self._print_scaling(results)
+        if options["baseline"]:
+            regressions = self._compare(results, json.loads(Path(options["baseline"]).read_text()), options["threshold"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} case(s) regressed beyond {options['threshold']}x")
+
+    def _bench_ingest(self, tmp_root: Path, pdf_pages: int, epub_chapters: int, seed: int) -> Dict[str, dict]:
+        timings: Dict[str, dict] = {}
+        with bench.temporary_database(tmp_root) as db_file:
+            source_dir = db_file.parent / "sources"
+            source_dir.mkdir()
+            bench.write_synthetic_pdf(source_dir / "Synthetic PDF Standard.pdf", pdf_pages, seed)
+            bench.write_synthetic_epub(source_dir / "Synthetic EPUB Standard.epub", epub_chapters, seed)
+            for mode in ("full", "fast"):
+                name = "ingest_standards" if mode == "full" else f"ingest_standards[{mode}]"
+                timings[name] = bench.time_call(
+                    lambda: call_command("ingest_standards", base_dir=str(source_dir), rebuild=True, mode=mode, stdout=StringIO()),
+                    repeat=1,
+                    warmup=0,
+                )
+                timings[name]["source_pdf_pages"] = pdf_pages
+                timings[name]["source_epub_chapters"] = epub_chapters
+        return timings
+
+    def _bench_corpus(self, repeat: int) -> Dict[str, dict]:
+        client = Client()
+        cases: Dict[str, dict] = {}
+
+        def get(name: str, *args: object, **params: str):  # type: ignore[no-untyped-def]
+            url = reverse(f"standards:{name}", args=args)
+            if params:
+                url += "?" + urlencode(params)
+
+            def run() -> None:
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} returned {response.status_code}")
+            return run
+
+        def fts(query: str, depth: int):  # type: ignore[no-untyped-def]
+            return lambda: federation.match(query, depth)
+
+        def fts_passages(query: str, depth: int):  # type: ignore[no-untyped-def]
+            return lambda: federation.passages(query, depth)
+
+        for query in bench.SEARCH_QUERIES:
+            for depth in bench.SEARCH_DEPTHS:
+                cases[f"fts[{query}]@{depth}"] = bench.time_call(fts(query, depth), repeat)
+                cases[f"fts_passages[{query}]@{depth}"] = bench.time_call(fts_passages(query, depth), repeat)
+            cases[f"search[{query}]"] = bench.time_call(get("search", q=query), repeat)
+        for topic in bench.COMPARE_TOPICS:
+            cases[f"compare[{topic}]"] = bench.time_call(get("compare", topic=topic), repeat)
+        cases["insights"] = bench.time_call(get("insights"), repeat)
+        for scenario in bench.SCENARIOS:
+            cases[f"tailor[{scenario}]"] = bench.time_call(get("tailor", type=scenario), repeat)
+            cases[f"process_document[{scenario}]"] = bench.time_call(get("process_document", type=scenario), repeat)
+        slug = Standard.objects.order_by("id").values_list("slug", flat=True).first()
+        middle = Page.objects.filter(standard__slug=slug).count() // 2
+        cases["page_view"] = bench.time_call(get("page", slug, middle), repeat)
+        return cases
+
+    def _print_scaling(self, results: dict) -> None:
+        sizes: List[str] = list(results["sizes"])
+        if not sizes:
+            return
+        self.stderr.write("")
+        self.stderr.write(f"{'median ms':<44}" + "".join(f"{s + ' pages':>16}" for s in sizes))
+        for case in results["sizes"][sizes[0]]:
+            row = "".join(f"{results['sizes'][s].get(case, {}).get('median_ms', float('nan')):>16.2f}" for s in sizes)
+            self.stderr.write(f"{case[:43]:<44}{row}")
+        for name, timing in results.get("ingest", {}).items():
+            self.stderr.write(f"{name:<44}{timing['median_ms']:>16.2f}")
+
+    def _compare(self, current: dict, baseline: dict, threshold: float) -> List[str]:
+        regressions: List[str] = []
+        self.stderr.write("")
+        self.stderr.write(f"{'case':<52}{'baseline':>12}{'current':>12}{'ratio':>9}")
+        pairs = [
+            (f"{size}:{case}", baseline.get("sizes", {}).get(size, {}).get(case), timing)
+            for size, cases in current["sizes"].items()
+            for case, timing in cases.items()
+        ]
+        pairs += [
+            (f"ingest:{case}", baseline.get("ingest", {}).get(case), timing)
+            for case, timing in current.get("ingest", {}).items()
+        ]
+        for label, before, after in pairs:
+            if not before:
+                continue
+            ratio = after["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append(label)
+            self.stderr.write(f"{label[:51]:<52}{before['median_ms']:>12.2f}{after['median_ms']:>12.2f}{ratio:>8.2f}x{flag}")
+        return regressions
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from standards import importtime
+
+
+class Command(BaseCommand):
+    help = "Report `python -X importtime` start-up cost of web workers and management commands against the budget"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--target", action="append", dest="targets", choices=list(importtime.TARGETS),
+                            help="Process to measure (repeatable; default: all)")
+        parser.add_argument("--runs", type=int, default=3, help="Cold starts per target; the fastest is reported")
+        parser.add_argument("--top", type=int, default=15, help="Slowest modules listed per target")
+        parser.add_argument("--output", help="Also write the per-module timings as JSON here")
+        parser.add_argument("--fail-over-budget", action="store_true")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        targets = options["targets"] or list(importtime.TARGETS)
+        results = {}
+        over = []
+        for target in targets:
+            try:
+                report = importtime.measure(target, options["runs"])
+            except importtime.ImportTimeError as exc:
+                raise CommandError(str(exc))
+            budget = importtime.BUDGET_MS[target]
+            status = "ok" if report.total_ms <= budget and not report.heavy else "OVER BUDGET"
+            if status != "ok":
+                over.append(target)
+            self.stdout.write(f"{target}: {report.total_ms:.0f} ms in {len(report.modules)} modules "
+                              f"(budget {budget} ms) {status}")
+            if report.heavy:
+                self.stdout.write(self.style.WARNING(f"  heavy packages imported: {', '.join(report.heavy)}"))
+            packages = list(importtime.by_package(report).items())[:5]
+            self.stdout.write("  by package: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in packages))
+            self.stdout.write(f"  {'self ms':>9}{'cumul. ms':>11}  module")
+            for m in importtime.slowest(report, options["top"]):
+                self.stdout.write(f"  {m.self_ms:>9.1f}{m.cumulative_ms:>11.1f}  {m.name}")
+            results[target] = {
+                "total_ms": report.total_ms,
+                "budget_ms": budget,
+                "heavy": report.heavy,
+                "modules": [m._asdict() for m in report.modules],
+            }
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stderr.write(f"Results written to {options['output']}")
+        if over and options["fail_over_budget"]:
+            raise CommandError(f"Over the import budget: {', '.join(over)}")
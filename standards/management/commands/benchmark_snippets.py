@@ -0,0 +1,101 @@
+import sqlite3
+import statistics
+import time
+from typing import Callable, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from standards import highlight as hl
+
+
+DEFAULT_QUERIES = ["risk", "stakeholder engagement", "governance", "quality OR change", "benefit*"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the Python snippet/highlight module against the SQL snippet() and substr/instr windows"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--query", action="append", dest="queries", help="Query to benchmark (repeatable)")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+        parser.add_argument("--limit", type=int, default=20, help="Rows highlighted per search (one result page)")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        queries = options["queries"] or DEFAULT_QUERIES
+        repeat = options["repeat"]
+        limit = options["limit"]
+        db_path = settings.DATABASES["default"]["NAME"]
+        with sqlite3.connect(db_path) as conn:
+            cur = conn.cursor()
+            self.stdout.write(f"{'case':<34}{'query':<26}{'sql ms':>10}{'python ms':>12}{'speedup':>10}")
+            for q in queries:
+                sql_ms = self._time(repeat, lambda: self._sql_snippet(cur, q, limit))
+                py_ms = self._time(repeat, lambda: self._py_snippet(cur, q, limit))
+                self._row("search snippet()", q, sql_ms, py_ms)
+
+                topic = " ".join(t for t, _ in hl.query_terms(q))
+                sql_ms = self._time(repeat, lambda: self._sql_window(cur, topic))
+                py_ms = self._time(repeat, lambda: self._py_window(cur, topic))
+                self._row("compare substr(instr(lower()))", topic, sql_ms, py_ms)
+
+                # What the compare view actually renders: the window plus a highlighted snippet
+                py_ms = self._time(repeat, lambda: self._py_window(cur, topic, with_highlight=True))
+                self._row("compare window + highlight", topic, sql_ms, py_ms)
+
+    def _time(self, repeat: int, fn: Callable[[], object]) -> float:
+        fn()  # warm-up
+        samples: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def _row(self, case: str, query: str, sql_ms: float, py_ms: float) -> None:
+        speedup = sql_ms / py_ms if py_ms else float("inf")
+        self.stdout.write(f"{case:<34}{query[:24]:<26}{sql_ms:>10.2f}{py_ms:>12.2f}{speedup:>9.2f}x")
+
+    def _sql_snippet(self, cur: sqlite3.Cursor, q: str, limit: int) -> list:
+        cur.execute(
+            """
+            SELECT page_fts.rowid, snippet(page_fts, 0, '<mark>', '</mark>', ' … ', 12)
+            FROM page_fts WHERE page_fts MATCH ? ORDER BY bm25(page_fts) LIMIT ?
+            """,
+            (q, limit),
+        )
+        return cur.fetchall()
+
+    def _py_snippet(self, cur: sqlite3.Cursor, q: str, limit: int) -> list:
+        cur.execute(
+            """
+            SELECT p.id, p.content FROM page_fts JOIN standards_page p ON p.id = page_fts.rowid
+            WHERE page_fts MATCH ? ORDER BY bm25(page_fts) LIMIT ?
+            """,
+            (q, limit),
+        )
+        terms = hl.query_terms(q)
+        return [(pid, hl.highlight(content, terms, size=12)) for pid, content in cur.fetchall()]
+
+    def _sql_window(self, cur: sqlite3.Cursor, topic: str) -> list:
+        cur.execute(
+            """
+            SELECT p.id, substr(p.content, max(instr(lower(p.content), lower(?)) - 80, 1), 240)
+            FROM standards_page p WHERE lower(p.content) LIKE '%' || lower(?) || '%' LIMIT 400
+            """,
+            (topic, topic),
+        )
+        return cur.fetchall()
+
+    def _py_window(self, cur: sqlite3.Cursor, topic: str, with_highlight: bool = False) -> list:
+        cur.execute(
+            "SELECT p.id, p.content FROM standards_page p WHERE p.content LIKE '%' || ? || '%' LIMIT 400",
+            (topic,),
+        )
+        terms = hl.substring_terms(topic)
+        rows = []
+        for pid, content in cur.fetchall():
+            window = hl.context_window(content, terms)
+            if with_highlight:
+                window = hl.highlight(content, terms, size=30, max_fragments=2)
+            rows.append((pid, window))
+        return rows
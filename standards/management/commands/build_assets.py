@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from standards import assets
+
+
+CHARTJS_VERSION = "4.4.1"
+CHARTJS_URL = f"https://cdn.jsdelivr.net/npm/chart.js@{CHARTJS_VERSION}/dist/chart.umd.min.js"
+TAILWIND_VERSION = "3.4.17"
+
+
+class Command(BaseCommand):
+    help = "Build the purged Tailwind CSS bundle, vendor Chart.js, collect hashed static files and precompress them"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--tailwind", default=os.environ.get("TAILWINDCSS_BIN"),
+                            help="Tailwind CLI executable (default: $TAILWINDCSS_BIN, tailwindcss on PATH, then npx)")
+        parser.add_argument("--chartjs", help="Local copy of chart.umd.min.js to vendor instead of downloading it")
+        parser.add_argument("--skip-css", action="store_true")
+        parser.add_argument("--skip-vendor", action="store_true", help="Keep the already vendored Chart.js")
+        parser.add_argument("--no-collect", action="store_true", help="Only write into STATICFILES_DIRS")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        static_dir = assets.source_dir()
+        if not options["skip_css"]:
+            self._build_css(static_dir / "css" / "app.css", options["tailwind"])
+        if not options["skip_vendor"]:
+            self._vendor_chartjs(static_dir / "vendor" / "chart.umd.min.js", options["chartjs"])
+        if options["no_collect"]:
+            return
+
+        call_command("collectstatic", interactive=False, verbosity=0)
+        written = assets.precompress(Path(settings.STATIC_ROOT))
+        self.stdout.write(f"Collected into {settings.STATIC_ROOT}; {len(written)} precompressed variant(s)")
+        for name in assets.BUNDLE:
+            hashed = assets.manifest_paths().get(name, "?")
+            self.stdout.write(f"  {name} -> {hashed} ({self._sizes(Path(settings.STATIC_ROOT) / hashed)})")
+        self.stdout.write(self.style.SUCCESS("Assets built."))
+
+    def _build_css(self, output: Path, tailwind: str) -> None:
+        assets_dir = Path(settings.BASE_DIR) / "assets"
+        if tailwind:
+            command = [tailwind]
+        elif shutil.which("tailwindcss"):
+            command = ["tailwindcss"]
+        elif shutil.which("npx"):
+            command = ["npx", "--yes", f"tailwindcss@{TAILWIND_VERSION}"]
+        else:
+            raise CommandError("Tailwind CLI not found; pass --tailwind or set TAILWINDCSS_BIN")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        command += ["-c", "tailwind.config.js", "-i", "app.css", "-o", str(output), "--minify"]
+        result = subprocess.run(command, cwd=assets_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"Tailwind build failed:\n{result.stderr.strip()}")
+        self.stdout.write(f"CSS bundle: {output} ({output.stat().st_size // 1024} KiB)")
+
+    def _vendor_chartjs(self, output: Path, local: str) -> None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        if local:
+            shutil.copyfile(local, output)
+        else:
+            try:
+                with urllib.request.urlopen(CHARTJS_URL, timeout=30) as response:
+                    output.write_bytes(response.read())
+            except OSError as exc:
+                raise CommandError(f"Could not download Chart.js ({exc}); pass --chartjs with a local copy")
+        self.stdout.write(f"Chart.js {CHARTJS_VERSION}: {output} ({output.stat().st_size // 1024} KiB)")
+
+    def _sizes(self, path: Path) -> str:
+        parts = [f"{path.stat().st_size} B"] if path.exists() else ["missing"]
+        for suffix in (".gz", ".br"):
+            variant = path.with_name(path.name + suffix)
+            if variant.exists():
+                parts.append(f"{suffix[1:]} {variant.stat().st_size} B")
+        return ", ".join(parts)
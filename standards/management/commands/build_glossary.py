@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from standards import glossary, snapshots
+from standards.models import Standard
+
+
+class Command(BaseCommand):
+    help = "Index the \"Terms and definitions\" clauses and glossaries of already ingested standards"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--standard", action="append", dest="slugs", help="Slug of the standard to index (repeatable); default all")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        standards = Standard.objects.order_by("title")
+        if options["slugs"]:
+            standards = standards.filter(slug__in=options["slugs"])
+            missing = set(options["slugs"]) - set(standards.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Unknown standard(s): {', '.join(sorted(missing))}")
+        for standard in standards:
+            self.stdout.write(f"{standard.slug}: {glossary.index_standard(standard)} definition(s)")
+        snapshots.publish()
+        self.stdout.write(self.style.SUCCESS("Glossary indexed."))
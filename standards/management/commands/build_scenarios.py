@@ -0,0 +1,29 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from standards import scenarios, snapshots
+from standards.models import Scenario
+
+
+class Command(BaseCommand):
+    help = "Load tailoring scenarios from JSON and precompute their evidence from the corpus"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--file", dest="path", help="JSON list of user-defined scenarios to add or update")
+        parser.add_argument("--refresh-only", action="store_true", help="Only recompute the evidence of existing scenarios")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        loaded = []
+        try:
+            if not options["refresh_only"]:
+                loaded += scenarios.sync()
+                if options["path"]:
+                    loaded += scenarios.sync(options["path"], builtin=False)
+        except ValidationError as exc:
+            raise CommandError("; ".join(exc.messages))
+        for scenario in loaded:
+            self.stdout.write(f"{scenario.slug}: {'built-in' if scenario.builtin else 'loaded'}")
+        # Scenarios added in the admin are not in any file; refresh their evidence too.
+        refreshed = scenarios.refresh(Scenario.objects.exclude(slug__in=[s.slug for s in loaded]))
+        snapshots.publish()
+        self.stdout.write(self.style.SUCCESS(f"Evidence computed for {len(loaded) + refreshed} scenario(s)."))
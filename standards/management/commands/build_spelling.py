@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from standards import spelling
+
+
+class Command(BaseCommand):
+    help = "Build the vocabulary index used for \"did you mean\" spelling corrections"
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        started = time.perf_counter()
+        meta = spelling.build()
+        self.stdout.write(f"{meta['terms']} terms, {meta['deletes']} deletes in {time.perf_counter() - started:.1f}s")
+        self.stdout.write(self.style.SUCCESS(f"Spelling index written to {spelling.spelling_settings()['ROOT']}"))
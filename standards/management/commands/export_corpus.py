@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from standards import export
+from standards.models import Standard
+
+
+class Command(BaseCommand):
+    help = "Stream Standard/Page rows to JSON Lines (optionally gzipped) or Parquet in constant memory"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("-o", "--output", default="-", help="Output file; '-' for stdout (default)")
+        parser.add_argument("--format", choices=export.FORMATS, help="Default: from the output suffix, else jsonl")
+        parser.add_argument("--gzip", action="store_true", help="gzip JSON Lines output (implied by a .gz suffix)")
+        parser.add_argument("--compression", default="zstd", help="Parquet codec: zstd, snappy, gzip or none (default zstd)")
+        parser.add_argument("--standard", action="append", dest="slugs", help="Slug of a standard to export (repeatable); default all")
+        parser.add_argument("--from-page", type=int, help="First page index to export (zero-based, inclusive)")
+        parser.add_argument("--to-page", type=int, help="Last page index to export (inclusive)")
+        parser.add_argument("--html", action="store_true", help="Include content_html and its hash")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        if options["slugs"]:
+            known = set(Standard.objects.filter(slug__in=options["slugs"]).values_list("slug", flat=True))
+            missing = set(options["slugs"]) - known
+            if missing:
+                raise CommandError(f"Unknown standard(s): {', '.join(sorted(missing))}")
+
+        output = options["output"]
+        fmt = options["format"] or ("parquet" if output.endswith(".parquet") else "jsonl")
+        compress = options["gzip"] or output.endswith(".gz")
+        rows = export.records(options["slugs"], options["from_page"], options["to_page"], html=options["html"])
+
+        started = time.perf_counter()
+        target = tmp = None
+        if output == "-":
+            out = sys.stdout.buffer
+        else:
+            target = Path(output)
+            tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            out = open(tmp, "wb")
+        try:
+            if fmt == "parquet":
+                count = export.write_parquet(rows, out, html=options["html"], compression=options["compression"])
+            else:
+                count = export.write_jsonl(rows, out, compress=compress)
+        except BaseException as exc:
+            if tmp is not None:
+                out.close()
+                tmp.unlink(missing_ok=True)
+            if isinstance(exc, export.ExportError):
+                raise CommandError(str(exc))
+            raise
+        if tmp is not None:
+            out.close()
+            os.replace(tmp, target)
+        else:
+            out.flush()
+
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        size = target.stat().st_size if target is not None else None
+        rate = f"{count / elapsed:.0f} pages/sec"
+        if size is not None:
+            rate += f", {size / 2**20:.1f} MiB ({size / 2**20 / elapsed:.1f} MiB/s)"
+        self.stderr.write(f"{count} pages in {elapsed:.1f}s ({rate})")
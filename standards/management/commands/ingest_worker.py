@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from standards import ingest, jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued ingest jobs (resumes jobs left running by a crashed worker)"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit instead of polling")
+        parser.add_argument("--threads", type=int, default=1, help="Worker threads in this process")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        if options["once"]:
+            ran = jobs.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} job(s)."))
+            return
+        jobs.ensure_workers(options["threads"])
+        poll = float(ingest.ingest_settings()["POLL_INTERVAL"])
+        self.stdout.write(f"Ingest worker running with {options['threads']} thread(s); Ctrl-C to stop.")
+        try:
+            while True:
+                time.sleep(poll)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping; running jobs resume from their last committed batch.")
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from standards import snapshots
+
+
+class Command(BaseCommand):
+    help = "Copy the main database into a new immutable read-only snapshot and make it the one web requests read"
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        started = time.perf_counter()
+        path = snapshots.publish()
+        if path is None:
+            raise CommandError("Snapshots are disabled (PMHUB_SNAPSHOTS['ENABLED'] or the 'snapshot' database alias)")
+        size = path.stat().st_size / 2**20
+        self.stdout.write(f"{path.name}: {size:.1f} MiB in {time.perf_counter() - started:.1f}s")
+        self.stdout.write(self.style.SUCCESS(f"Snapshot published at {snapshots.pointer()}"))
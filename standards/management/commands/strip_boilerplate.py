@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from standards import boilerplate, crossrefs, glossary, scenarios, snapshots, spelling
+from standards.models import Standard
+
+
+class Command(BaseCommand):
+    help = "Strip repeated headers/footers from already ingested pages and report the full-text index reduction"
+
+    def add_arguments(self, parser):  # type: ignore[no-untyped-def]
+        parser.add_argument("--standard", action="append", dest="slugs", help="Slug of the standard to process (repeatable); default all")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+
+    def handle(self, *args, **options):  # type: ignore[no-untyped-def]
+        standards = Standard.objects.order_by("title")
+        if options["slugs"]:
+            standards = standards.filter(slug__in=options["slugs"])
+            missing = set(options["slugs"]) - set(standards.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Unknown standard(s): {', '.join(sorted(missing))}")
+
+        dry_run = options["dry_run"]
+        if not dry_run:
+            boilerplate.optimize_indexes()
+        before = boilerplate.index_bytes()
+        for standard in standards:
+            report = boilerplate.strip_standard(standard, dry_run=dry_run)
+            saved = report.chars_before - report.chars_after
+            self.stdout.write(
+                f"{standard.slug}: {report.lines} line(s) on {report.changed}/{report.pages} page(s), "
+                f"{saved} of {report.chars_before} chars ({100 * saved / max(report.chars_before, 1):.1f}%)"
+            )
+            if report.changed and not dry_run:
+                glossary.index_standard(standard)
+                crossrefs.index_standard(standard)
+        if dry_run:
+            return
+
+        boilerplate.optimize_indexes()
+        spelling.build()
+        scenarios.refresh()
+        snapshots.publish()
+        after = boilerplate.index_bytes()
+        for table in before:
+            reduction = 100 * (before[table] - after[table]) / max(before[table], 1)
+            self.stdout.write(f"{table}: {before[table] // 1024} KiB -> {after[table] // 1024} KiB ({reduction:.1f}% smaller)")
+        self.stdout.write(self.style.SUCCESS("Boilerplate stripped."))
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+import standards.compression
+
+
+# The update trigger used to fire on any column change, re-indexing a page's
+# text whenever only its HTML was rewritten. Restrict it to ``content``.
+SQL_TRIGGER_AU = r"""
+CREATE TRIGGER page_au AFTER UPDATE OF content ON standards_page BEGIN
+  INSERT INTO page_fts(page_fts, rowid, content) VALUES('delete', old.id, old.content);
+  INSERT INTO page_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+SQL_TRIGGER_AU_ANY = r"""
+CREATE TRIGGER page_au AFTER UPDATE ON standards_page BEGIN
+  INSERT INTO page_fts(page_fts, rowid, content) VALUES('delete', old.id, old.content);
+  INSERT INTO page_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+
+def compress_existing(apps, schema_editor):  # type: ignore[no-untyped-def]
+    cursor = schema_editor.connection.cursor()
+    cursor.execute("DROP TRIGGER IF EXISTS page_au;")
+    cursor.execute(SQL_TRIGGER_AU)
+    rows = cursor.execute(
+        "SELECT id, content_html FROM standards_page WHERE typeof(content_html) = 'text' AND content_html != ''"
+    ).fetchall()
+    cursor.executemany(
+        "UPDATE standards_page SET content_html = %s WHERE id = %s",
+        [(standards.compression.compress(html), page_id) for page_id, html in rows],
+    )
+
+
+def decompress_existing(apps, schema_editor):  # type: ignore[no-untyped-def]
+    cursor = schema_editor.connection.cursor()
+    rows = cursor.execute("SELECT id, content_html FROM standards_page WHERE typeof(content_html) = 'blob'").fetchall()
+    cursor.executemany(
+        "UPDATE standards_page SET content_html = %s WHERE id = %s",
+        [(standards.compression.decompress(bytes(blob)), page_id) for page_id, blob in rows],
+    )
+    cursor.execute("DROP TRIGGER IF EXISTS page_au;")
+    cursor.execute(SQL_TRIGGER_AU_ANY)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0004_ingestjob"),
+    ]
+
+    operations = [
+        # Same TEXT column on disk; only the Python-side field class changes.
+        # Altering it through the schema editor would rebuild standards_page
+        # and drop the FTS triggers.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="page",
+                    name="content_html",
+                    field=standards.compression.CompressedTextField(blank=True, null=True),
+                ),
+            ],
+        ),
+        migrations.RunPython(compress_existing, decompress_existing),
+    ]
@@ -0,0 +1,85 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SQL_CREATE_FTS = r"""
+CREATE VIRTUAL TABLE IF NOT EXISTS passage_fts USING fts5(
+  content,
+  content='standards_passage',
+  content_rowid='id'
+);
+"""
+
+SQL_TRIGGER_AI = r"""
+CREATE TRIGGER IF NOT EXISTS passage_ai AFTER INSERT ON standards_passage BEGIN
+  INSERT INTO passage_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+SQL_TRIGGER_AD = r"""
+CREATE TRIGGER IF NOT EXISTS passage_ad AFTER DELETE ON standards_passage BEGIN
+  INSERT INTO passage_fts(passage_fts, rowid, content) VALUES('delete', old.id, old.content);
+END;
+"""
+
+SQL_TRIGGER_AU = r"""
+CREATE TRIGGER IF NOT EXISTS passage_au AFTER UPDATE OF content ON standards_passage BEGIN
+  INSERT INTO passage_fts(passage_fts, rowid, content) VALUES('delete', old.id, old.content);
+  INSERT INTO passage_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+
+def forwards(apps, schema_editor):  # type: ignore[no-untyped-def]
+    from standards.passages import split
+
+    cursor = schema_editor.connection.cursor()
+    cursor.execute(SQL_CREATE_FTS)
+    cursor.execute(SQL_TRIGGER_AI)
+    cursor.execute(SQL_TRIGGER_AD)
+    cursor.execute(SQL_TRIGGER_AU)
+    pages = cursor.execute("SELECT id, standard_id, page_index, content FROM standards_page").fetchall()
+    rows = [
+        (page_id, standard_id, page_index, n, start, chunk)
+        for page_id, standard_id, page_index, content in pages
+        for n, (start, chunk) in enumerate(split(content))
+    ]
+    cursor.executemany(
+        "INSERT INTO standards_passage (page_id, standard_id, page_index, ordinal, start, content) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        rows,
+    )
+
+
+def backwards(apps, schema_editor):  # type: ignore[no-untyped-def]
+    cursor = schema_editor.connection.cursor()
+    cursor.execute("DROP TRIGGER IF EXISTS passage_ai;")
+    cursor.execute("DROP TRIGGER IF EXISTS passage_ad;")
+    cursor.execute("DROP TRIGGER IF EXISTS passage_au;")
+    cursor.execute("DROP TABLE IF EXISTS passage_fts;")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0006_corpusversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Passage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("page_index", models.PositiveIntegerField()),
+                ("ordinal", models.PositiveIntegerField()),
+                ("start", models.PositiveIntegerField(help_text="Offset into Page.content")),
+                ("content", models.TextField()),
+                ("page", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="passages", to="standards.page")),
+                ("standard", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="standards.standard")),
+            ],
+            options={
+                "ordering": ["page_id", "ordinal"],
+                "unique_together": {("page", "ordinal")},
+            },
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
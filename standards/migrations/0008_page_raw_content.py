@@ -0,0 +1,23 @@
+from django.db import migrations
+
+import standards.compression
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0007_passage"),
+    ]
+
+    operations = [
+        # Nullable so SQLite adds the column in place instead of rebuilding
+        # standards_page, which would drop the page_fts triggers.
+        migrations.AddField(
+            model_name="page",
+            name="raw_content",
+            field=standards.compression.CompressedTextField(
+                blank=True,
+                null=True,
+                help_text="Extracted text before boilerplate stripping; null when nothing was stripped",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0008_page_raw_content"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingestjob",
+            name="mode",
+            field=models.CharField(
+                choices=[
+                    ("full", "Text and HTML (pdfminer)"),
+                    ("fast", "Text only (pypdf); HTML rendered later"),
+                    ("html", "HTML backfill for pages ingested in fast mode"),
+                ],
+                default="full",
+                max_length=8,
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Length
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):  # type: ignore[no-untyped-def]
+    Standard = apps.get_model("standards", "Standard")
+    Page = apps.get_model("standards", "Page")
+    StandardStats = apps.get_model("standards", "StandardStats")
+    for standard in Standard.objects.all():
+        pages = Page.objects.filter(standard=standard)
+        totals = pages.aggregate(
+            page_count=models.Count("id"),
+            char_count=Coalesce(models.Sum(Length("content")), 0),
+            max_page_index=models.Max("page_index"),
+        )
+        totals["token_count"] = sum(len(text.split()) for text in pages.values_list("content", flat=True).iterator())
+        StandardStats.objects.create(standard=standard, **totals)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0009_ingestjob_mode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StandardStats",
+            fields=[
+                ("standard", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="stats", serialize=False, to="standards.standard")),
+                ("page_count", models.PositiveIntegerField(default=0)),
+                ("char_count", models.PositiveBigIntegerField(default=0)),
+                ("token_count", models.PositiveBigIntegerField(default=0, help_text="Whitespace-separated tokens in Page.content")),
+                ("max_page_index", models.IntegerField(blank=True, null=True)),
+                ("last_ingested_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
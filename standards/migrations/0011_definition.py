@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0010_standardstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Definition",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(max_length=255)),
+                ("key", models.CharField(db_index=True, help_text="Normalised term: unicode61 tokens, last word singular", max_length=255)),
+                ("clause", models.CharField(blank=True, default="", help_text='Entry number in ISO clauses, e.g. "3.4"', max_length=32)),
+                ("definition", models.TextField()),
+                ("page", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="definitions", to="standards.page")),
+                ("standard", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="definitions", to="standards.standard")),
+            ],
+            options={
+                "ordering": ["standard_id", "key"],
+                "unique_together": {("standard", "key")},
+            },
+        ),
+    ]
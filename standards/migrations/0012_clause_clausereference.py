@@ -0,0 +1,40 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0011_definition"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Clause",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("number", models.CharField(max_length=32)),
+                ("title", models.CharField(blank=True, default="", max_length=255)),
+                ("page", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="clauses", to="standards.page")),
+                ("standard", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="clauses", to="standards.standard")),
+            ],
+            options={
+                "ordering": ["standard_id", "id"],
+                "unique_together": {("standard", "number")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ClauseReference",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("label", models.CharField(help_text="Number as written, e.g. 3.20 for a reference resolved to 3", max_length=32)),
+                ("page", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="clause_references", to="standards.page")),
+                ("source", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="references", to="standards.clause")),
+                ("standard", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="standards.standard")),
+                ("target", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="referenced_by", to="standards.clause")),
+            ],
+            options={
+                "ordering": ["page_id", "id"],
+                "unique_together": {("page", "target")},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from django.db import migrations, models
+
+
+def load_builtin(apps, schema_editor):  # type: ignore[no-untyped-def]
+    # Evidence is computed by the next ingest or `manage.py build_scenarios`; until then the view searches live.
+    Scenario = apps.get_model("standards", "Scenario")
+    path = Path(__file__).resolve().parent.parent / "data" / "scenarios.json"
+    for spec in json.loads(path.read_text(encoding="utf-8")):
+        Scenario.objects.update_or_create(slug=spec["slug"], defaults={"name": spec["name"], "spec": spec, "builtin": True})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("standards", "0012_clause_clausereference"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Scenario",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("slug", models.SlugField(max_length=64, unique=True)),
+                ("name", models.CharField(max_length=255)),
+                ("spec", models.JSONField(help_text="Keywords, phases and process design; checked by scenarios.validate")),
+                ("builtin", models.BooleanField(default=False, help_text="Loaded from standards/data/scenarios.json")),
+                ("evidence", models.JSONField(blank=True, default=dict, help_text="Recommendations and phase evidence from the corpus")),
+                ("evidence_version", models.PositiveIntegerField(blank=True, help_text="CorpusVersion the evidence was computed at", null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.RunPython(load_builtin, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .compression import CompressedTextField
+
 
 class Standard(models.Model):
     title = models.CharField(max_length=255)
@@ -20,11 +23,27 @@ class Standard(models.Model):
         return self.title
 
 
+class StandardStats(models.Model):
+    """Denormalised per-standard totals, maintained by ingest (see ``standards.stats``)."""
+
+    standard = models.OneToOneField(Standard, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    page_count = models.PositiveIntegerField(default=0)
+    char_count = models.PositiveBigIntegerField(default=0)
+    token_count = models.PositiveBigIntegerField(default=0, help_text="Whitespace-separated tokens in Page.content")
+    max_page_index = models.IntegerField(null=True, blank=True)
+    last_ingested_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.standard_id}: {self.page_count} pages"
+
+
 class Page(models.Model):
     standard = models.ForeignKey(Standard, on_delete=models.CASCADE, related_name="pages")
     page_index = models.PositiveIntegerField(help_text="Zero-based index")
     content = models.TextField()
-    content_html = models.TextField(blank=True, null=True)
+    content_html = CompressedTextField(blank=True, null=True)
+    raw_content = CompressedTextField(blank=True, null=True, help_text="Extracted text before boilerplate stripping; null when nothing was stripped")
     section_hint = models.CharField(max_length=255, blank=True, default="")
 
     class Meta:
@@ -34,6 +53,97 @@ class Page(models.Model):
     def __str__(self) -> str:
         return f"{self.standard.slug}#{self.page_index}"
 
+    @property
+    def raw_text(self) -> str:
+        return self.raw_content or self.content
+
+
+class Passage(models.Model):
+    """Overlapping character window of a page; indexed by ``passage_fts`` for passage-level ranking."""
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="passages")
+    standard = models.ForeignKey(Standard, on_delete=models.CASCADE, related_name="+")
+    page_index = models.PositiveIntegerField()
+    ordinal = models.PositiveIntegerField()
+    start = models.PositiveIntegerField(help_text="Offset into Page.content")
+    content = models.TextField()
+
+    class Meta:
+        unique_together = ("page", "ordinal")
+        ordering = ["page_id", "ordinal"]
+
+    def __str__(self) -> str:
+        return f"{self.page_id}:{self.ordinal}"
+
+
+class Definition(models.Model):
+    """Entry of a standard's "Terms and definitions" clause or glossary (see ``standards.glossary``)."""
+
+    standard = models.ForeignKey(Standard, on_delete=models.CASCADE, related_name="definitions")
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="definitions")
+    term = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, db_index=True, help_text="Normalised term: unicode61 tokens, last word singular")
+    clause = models.CharField(max_length=32, blank=True, default="", help_text='Entry number in ISO clauses, e.g. "3.4"')
+    definition = models.TextField()
+
+    class Meta:
+        unique_together = ("standard", "key")
+        ordering = ["standard_id", "key"]
+
+    def __str__(self) -> str:
+        return f"{self.standard_id}:{self.term}"
+
+
+class Clause(models.Model):
+    """Numbered heading (``4.3.2``, ``Annex A``) and the page it starts on (see ``standards.crossrefs``)."""
+
+    standard = models.ForeignKey(Standard, on_delete=models.CASCADE, related_name="clauses")
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="clauses")
+    number = models.CharField(max_length=32)
+    title = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        unique_together = ("standard", "number")
+        ordering = ["standard_id", "id"]
+
+    def __str__(self) -> str:
+        return f"{self.standard_id}:{self.number} {self.title}"
+
+
+class ClauseReference(models.Model):
+    """In-text reference ("see 4.3.2") from a page, written in clause ``source``, to clause ``target``."""
+
+    standard = models.ForeignKey(Standard, on_delete=models.CASCADE, related_name="+")
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="clause_references")
+    source = models.ForeignKey(Clause, null=True, blank=True, on_delete=models.CASCADE, related_name="references")
+    target = models.ForeignKey(Clause, on_delete=models.CASCADE, related_name="referenced_by")
+    label = models.CharField(max_length=32, help_text="Number as written, e.g. 3.20 for a reference resolved to 3")
+
+    class Meta:
+        unique_together = ("page", "target")
+        ordering = ["page_id", "id"]
+
+    def __str__(self) -> str:
+        return f"{self.page_id}→{self.target_id}"
+
+
+class Scenario(models.Model):
+    """Tailoring scenario and its precomputed evidence (see ``standards.scenarios``)."""
+
+    slug = models.SlugField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    spec = models.JSONField(help_text="Keywords, phases and process design; checked by scenarios.validate")
+    builtin = models.BooleanField(default=False, help_text="Loaded from standards/data/scenarios.json")
+    evidence = models.JSONField(default=dict, blank=True, help_text="Recommendations and phase evidence from the corpus")
+    evidence_version = models.PositiveIntegerField(null=True, blank=True, help_text="CorpusVersion the evidence was computed at")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return self.name
+
 
 class Bookmark(models.Model):
     session_key = models.CharField(max_length=64, db_index=True)
@@ -48,4 +158,70 @@ class Bookmark(models.Model):
     def __str__(self) -> str:
         return f"{self.session_key}:{self.page}"
 
+class IngestJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+
+    MODE_FULL = "full"
+    MODE_FAST = "fast"
+    MODE_HTML = "html"
+
+    file_path = models.CharField(max_length=1024)
+    rebuild = models.BooleanField(default=False)
+    mode = models.CharField(max_length=8, default=MODE_FULL, choices=[
+        (MODE_FULL, "Text and HTML (pdfminer)"),
+        (MODE_FAST, "Text only (pypdf); HTML rendered later"),
+        (MODE_HTML, "HTML backfill for pages ingested in fast mode"),
+    ])
+    status = models.CharField(max_length=16, db_index=True, default=STATUS_QUEUED, choices=[
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_CANCELLED, "Cancelled"),
+    ])
+    standard = models.ForeignKey(Standard, null=True, blank=True, on_delete=models.SET_NULL, related_name="ingest_jobs")
+    pages_total = models.PositiveIntegerField(null=True, blank=True)
+    pages_done = models.PositiveIntegerField(default=0)
+    next_page_index = models.PositiveIntegerField(default=0, help_text="First page not yet committed; resume point")
+    pages_per_sec = models.FloatField(default=0.0)
+    cancel_requested = models.BooleanField(default=False)
+    error = models.TextField(blank=True, default="")
+    worker = models.CharField(max_length=120, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.file_path} [{self.status}]"
+
+    @property
+    def eta_seconds(self):  # type: ignore[no-untyped-def]
+        if self.status != self.STATUS_RUNNING or not self.pages_total or not self.pages_per_sec:
+            return None
+        return max(self.pages_total - self.next_page_index, 0) / self.pages_per_sec
+
+class CorpusVersion(models.Model):
+    """Single row bumped whenever page content changes; drives HTTP validators."""
+
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def current(cls) -> "CorpusVersion":
+        # Migration 0006 creates the row; never write from the read path.
+        return cls.objects.filter(pk=1).first() or cls(pk=1, updated_at=timezone.make_aware(timezone.datetime(2000, 1, 1)))
+
+    @classmethod
+    def bump(cls) -> None:
+        if not cls.objects.filter(pk=1).update(version=models.F("version") + 1, updated_at=timezone.now()):
+            cls.objects.create(pk=1, version=1)
+
 # Create your models here.
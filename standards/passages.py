@@ -0,0 +1,63 @@
+"""Split pages into overlapping passages for the ``passage_fts`` index.
+
+Windows are ``WINDOW`` characters long and start every ``STRIDE`` characters,
+with both edges snapped to whitespace, so a sentence cut at one window's edge
+is whole in the next. Search ranks pages by their best passage and shows that
+passage as the snippet, instead of scoring a whole page by BM25.
+"""
+
+from typing import Iterable, Iterator, List, Tuple
+
+from .models import Page, Passage
+
+
+WINDOW = 600
+STRIDE = 400
+SNAP = 40  # how far an edge may move to land on whitespace
+
+
+def _snap(text: str, pos: int, forward: bool) -> int:
+    if pos <= 0 or pos >= len(text):
+        return max(0, min(pos, len(text)))
+    span = range(pos, min(pos + SNAP, len(text))) if forward else range(pos, max(pos - SNAP, 0), -1)
+    for i in span:
+        if text[i].isspace():
+            return i
+    return pos
+
+
+def split(text: str) -> Iterator[Tuple[int, str]]:
+    """``(start offset, passage text)`` windows covering ``text``."""
+    text = text or ""
+    length = len(text)
+    if not text.strip():
+        return
+    start = 0
+    while True:
+        begin = _snap(text, start, forward=False) if start else 0
+        end = length if start + WINDOW >= length else _snap(text, start + WINDOW, forward=True)
+        raw = text[begin:end]
+        chunk = raw.strip()
+        if chunk:
+            yield begin + len(raw) - len(raw.lstrip()), chunk
+        if end >= length:
+            return
+        start += STRIDE
+
+
+def for_pages(pages: Iterable[Page]) -> List[Passage]:
+    return [
+        Passage(page_id=page.pk, standard_id=page.standard_id, page_index=page.page_index,
+                ordinal=n, start=start, content=chunk)
+        for page in pages
+        for n, (start, chunk) in enumerate(split(page.content))
+    ]
+
+
+def index_pages(pages: Iterable[Page], replace: bool = True, batch_size: int = 1000) -> int:
+    """(Re)create passages for ``pages``, which must already have primary keys."""
+    pages = list(pages)
+    if replace:
+        Passage.objects.filter(page__in=[p.pk for p in pages]).delete()
+    created = Passage.objects.bulk_create(for_pages(pages), batch_size=batch_size)
+    return len(created)
@@ -0,0 +1,219 @@
+"""Opt-in per-view profiling: wall time, SQL count/time and rapidfuzz time.
+
+Enabled through ``settings.PMHUB_PROFILING``. When disabled the middleware
+removes itself at startup (``MiddlewareNotUsed``), so there is no per-request
+cost. Sampled requests get a ``Server-Timing`` header and feed per-route
+rolling windows that ``stats_view`` reports as p50/p95/p99.
+"""
+
+import math
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 1.0,
+    "WINDOW": 1000,
+    "SERVER_TIMING": True,
+}
+
+
+def profiling_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PMHUB_PROFILING", {})}
+
+
+@dataclass
+class RequestProfile:
+    sql_count: int = 0
+    sql_ms: float = 0.0
+    fuzz_ms: float = 0.0
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("pmhub_profile", default=None)
+
+
+def record_sql(duration_ms: float, count: int = 1) -> None:
+    profile = _current.get()
+    if profile is not None:
+        profile.sql_count += count
+        profile.sql_ms += duration_ms
+
+
+@contextmanager
+def timer(kind: str) -> Iterator[None]:
+    """Attribute the time spent in the block to ``kind`` (currently only "fuzz")."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        if kind == "fuzz":
+            profile.fuzz_ms += elapsed
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor for raw sqlite3 connections that reports statements to the active profile."""
+
+    def execute(self, sql, parameters=()):  # type: ignore[no-untyped-def, override]
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_sql((time.perf_counter() - start) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):  # type: ignore[no-untyped-def, override]
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_sql((time.perf_counter() - start) * 1000)
+
+    # SELECTs do most of their work while rows are stepped, so fetch time is SQL
+    # time, whichever way the rows are read.
+    def _stepped(self, fetch, *args):  # type: ignore[no-untyped-def]
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            record_sql((time.perf_counter() - start) * 1000, count=0)
+
+    def fetchone(self):  # type: ignore[no-untyped-def, override]
+        return self._stepped(super().fetchone)
+
+    def fetchmany(self, *args):  # type: ignore[no-untyped-def, override]
+        return self._stepped(super().fetchmany, *args)
+
+    def fetchall(self):  # type: ignore[no-untyped-def, override]
+        return self._stepped(super().fetchall)
+
+    def __next__(self):  # type: ignore[no-untyped-def]
+        return self._stepped(super().__next__)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfiledCursor):  # type: ignore[no-untyped-def, override]
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):  # type: ignore[no-untyped-def, override]
+        return self.cursor().execute(sql, parameters)
+
+
+def _orm_wrapper(execute, sql, params, many, context):  # type: ignore[no-untyped-def]
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_sql((time.perf_counter() - start) * 1000)
+
+
+class RouteStats:
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples: Dict[str, Deque[tuple]] = defaultdict(lambda: deque(maxlen=self.window))
+        self.requests: Dict[str, int] = defaultdict(int)
+
+    def add(self, route: str, total_ms: float, profile: RequestProfile) -> None:
+        with self.lock:
+            self.samples[route].append((total_ms, profile.sql_ms, profile.sql_count, profile.fuzz_ms))
+            self.requests[route] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            data = {route: list(samples) for route, samples in self.samples.items()}
+            counts = dict(self.requests)
+        report = {}
+        for route, samples in sorted(data.items()):
+            columns = list(zip(*samples))
+            report[route] = {
+                "sampled_requests": counts[route],
+                "window": len(samples),
+                "total_ms": _percentiles(columns[0]),
+                "sql_ms": _percentiles(columns[1]),
+                "sql_queries": _percentiles(columns[2]),
+                "fuzz_ms": _percentiles(columns[3]),
+            }
+        return report
+
+
+def _percentiles(values: tuple) -> Dict[str, float]:
+    ordered: List[float] = sorted(values)
+    n = len(ordered)
+
+    def rank(p: float) -> float:
+        # Nearest-rank percentile
+        return round(ordered[max(0, math.ceil(p * n) - 1)], 3)
+
+    return {"p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99), "max": round(ordered[-1], 3)}
+
+
+stats = RouteStats(profiling_settings()["WINDOW"])
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):  # type: ignore[no-untyped-def]
+        config = profiling_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = float(config["SAMPLE_RATE"])
+        self.server_timing = bool(config["SERVER_TIMING"])
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_orm_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        match = request.resolver_match
+        route = match.view_name if match else "unresolved"
+        stats.add(route, total_ms, profile)
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'total;dur={total_ms:.1f}, '
+                f'db;dur={profile.sql_ms:.1f};desc="{profile.sql_count} queries", '
+                f'fuzz;dur={profile.fuzz_ms:.1f}'
+            )
+        return response
+
+
+@staff_member_required
+@require_GET
+def stats_view(request: HttpRequest) -> HttpResponse:
+    """Aggregated per-route timings for this worker process."""
+    config = profiling_settings()
+    if not config["ENABLED"]:
+        raise Http404("Profiling is disabled")
+    return JsonResponse({
+        "sample_rate": config["SAMPLE_RATE"],
+        "routes": stats.snapshot(),
+    })
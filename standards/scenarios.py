@@ -0,0 +1,210 @@
+"""Tailoring scenarios: definitions from a data file or the admin, evidence precomputed.
+
+A scenario is a JSON object (``validate`` documents the shape): keywords for
+its general recommendations, phases with the terms used to find evidence for
+each, and optionally a full process design (phase activities, roles,
+artefacts, gates, rationale, tailoring decisions, implementation guidance)
+used by the process diagram and document endpoints. The built-in scenarios
+live in ``data/scenarios.json``; ``sync`` loads them into ``Scenario`` rows and
+user-defined ones are added in the admin.
+
+Searching the corpus for a scenario's evidence runs one FTS query per phase
+plus one for the keywords. ``refresh`` does that when a scenario is saved and
+after every ingest, storing the result on the row, so rendering the tailor
+view is a single primary-key read however many keywords or phases it has.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from . import federation, fts, highlight as hl
+from .models import CorpusVersion, Scenario, Standard
+
+
+DEFAULTS = {
+    "FILE": Path(__file__).resolve().parent / "data" / "scenarios.json",
+    "RECOMMENDATIONS": 100,
+    "EVIDENCE_PER_PHASE": 30,
+}
+
+SLUG_RE = re.compile(r"^[-a-zA-Z0-9_]{1,64}$")
+# Phase fields required once a scenario has a process design (``tailoring_rationale``).
+DESIGN_FIELDS = {
+    "duration": str,
+    "activities": list,
+    "roles": list,
+    "artifacts": list,
+    "decision_gates": list,
+    "standards_references": dict,
+}
+
+
+def scenarios_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PMHUB_SCENARIOS", {})}
+
+
+def _strings(value: object, where: str, errors: List[str], required: bool = True) -> None:
+    if not isinstance(value, list) or (required and not value) or not all(isinstance(v, str) and v.strip() for v in value):
+        errors.append(f"{where} must be a {'non-empty ' if required else ''}list of strings")
+
+
+def validate(spec: object) -> dict:
+    """``spec`` if it is a well-formed scenario, else ``ValidationError`` listing every problem.
+
+    Required: ``slug``, ``name``, ``context``, ``focus`` (strings), ``keywords``
+    (strings) and ``phases`` (``{"name", "terms"}`` objects). A process design
+    adds ``tailoring_rationale`` and ``governance_model`` and the
+    ``DESIGN_FIELDS`` on every phase; ``key_characteristics``,
+    ``tailoring_decisions`` and ``implementation_guidance`` are optional.
+    """
+    if not isinstance(spec, dict):
+        raise ValidationError("A scenario must be a JSON object")
+    errors: List[str] = []
+    if not isinstance(spec.get("slug"), str) or not SLUG_RE.match(spec["slug"]):
+        errors.append("slug must be 1-64 letters, digits, '-' or '_'")
+    for field in ("name", "context", "focus"):
+        if not isinstance(spec.get(field), str) or not spec[field].strip():
+            errors.append(f"{field} must be a non-empty string")
+    _strings(spec.get("keywords"), "keywords", errors)
+    designed = "tailoring_rationale" in spec
+    if designed and not all(isinstance(spec.get(f), str) for f in ("tailoring_rationale", "governance_model")):
+        errors.append("tailoring_rationale and governance_model must be strings")
+    phases = spec.get("phases")
+    if not isinstance(phases, list) or not phases:
+        errors.append("phases must be a non-empty list")
+        phases = []
+    for n, phase in enumerate(phases, 1):
+        if not isinstance(phase, dict) or not isinstance(phase.get("name"), str) or not phase["name"].strip():
+            errors.append(f"phase {n} must be an object with a name")
+            continue
+        _strings(phase.get("terms"), f"phase {n} terms", errors)
+        if designed:
+            for field, kind in DESIGN_FIELDS.items():
+                if not isinstance(phase.get(field), kind):
+                    errors.append(f"phase {n} {field} must be a {kind.__name__}")
+    if "key_characteristics" in spec:
+        _strings(spec["key_characteristics"], "key_characteristics", errors, required=False)
+    decisions = spec.get("tailoring_decisions", [])
+    if not isinstance(decisions, list) or not all(
+        isinstance(d, dict) and all(isinstance(d.get(k), str) for k in ("decision", "rationale", "standards_basis"))
+        for d in decisions
+    ):
+        errors.append("tailoring_decisions must be a list of {decision, rationale, standards_basis} objects")
+    if not isinstance(spec.get("implementation_guidance", {}), dict):
+        errors.append("implementation_guidance must be an object")
+    if errors:
+        raise ValidationError(errors)
+    return spec
+
+
+def load_file(path: Optional[Path] = None) -> List[dict]:
+    """Validated scenarios from a JSON file holding a list of them (default: the built-in ones)."""
+    path = Path(path or scenarios_settings()["FILE"])
+    try:
+        specs = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValidationError(f"{path}: {exc}")
+    if not isinstance(specs, list):
+        raise ValidationError(f"{path}: expected a list of scenarios")
+    slugs = [s.get("slug") for s in specs if isinstance(s, dict)]
+    if len(slugs) != len(set(slugs)):
+        raise ValidationError(f"{path}: duplicate scenario slugs")
+    return [validate(spec) for spec in specs]
+
+
+def save(spec: dict, builtin: bool = False, bump: bool = True) -> Scenario:
+    """Create or update the scenario ``spec`` describes, with fresh evidence.
+
+    Bumps ``CorpusVersion``, which the process endpoints' validators and the
+    stored process documents are keyed on; ``bump=False`` leaves that to a
+    caller saving several scenarios.
+    """
+    spec = validate(spec)
+    scenario, _ = Scenario.objects.update_or_create(
+        slug=spec["slug"], defaults={"name": spec["name"], "spec": spec, "builtin": builtin},
+    )
+    if bump:
+        CorpusVersion.bump()
+    refresh([scenario])
+    return scenario
+
+
+def sync(path: Optional[Path] = None, builtin: bool = True) -> List[Scenario]:
+    """Load every scenario of ``path`` (default: the built-in file) and compute its evidence."""
+    specs = load_file(path)
+    CorpusVersion.bump()
+    return [save(spec, builtin=builtin, bump=False) for spec in specs]
+
+
+def evidence(spec: dict) -> dict:
+    """``{"recommendations", "tailored"}`` for ``spec``, searched in the current corpus."""
+    config = scenarios_settings()
+    standards_by_id = Standard.objects.in_bulk()
+    terms = hl.terms_for(spec["keywords"])
+    recommendations = []
+    for hit in federation.passages(fts.any_of(spec["keywords"]), int(config["RECOMMENDATIONS"])):
+        std = standards_by_id[hit.standard_id]
+        recommendations.append({
+            "page_id": hit.page_id,
+            "standard_slug": std.slug,
+            "standard_title": std.title,
+            "page_index": hit.page_index,
+            "snippet": hl.highlight(hit.content, terms, size=36, max_fragments=1),
+        })
+    tailored = []
+    for phase in spec["phases"]:
+        phase_terms = phase["terms"][:3]
+        phase_hl_terms = hl.substring_terms(" ".join(phase_terms))
+        found = []
+        for hit in federation.first_passages(federation.phrase_query(phase_terms), int(config["EVIDENCE_PER_PHASE"])):
+            std = standards_by_id[hit.standard_id]
+            found.append({
+                "standard_slug": std.slug,
+                "standard_title": std.title,
+                "page_index": hit.page_index,
+                "snippet": hl.highlight(hit.content, phase_hl_terms, size=32, max_fragments=1),
+            })
+        tailored.append({"phase": phase["name"], "evidence": found})
+    return {"recommendations": recommendations, "tailored": tailored}
+
+
+def refresh(scenarios: Optional[Iterable[Scenario]] = None) -> int:
+    """Recompute and store the evidence of ``scenarios`` (default: all); returns how many."""
+    version = CorpusVersion.current().version
+    count = 0
+    for scenario in (Scenario.objects.all() if scenarios is None else scenarios):
+        scenario.evidence = evidence(scenario.spec)
+        scenario.evidence_version = version
+        scenario.save(update_fields=["evidence", "evidence_version", "updated_at"])
+        count += 1
+    return count
+
+
+def design(spec: dict) -> Optional[dict]:
+    """The process design (``phases``, ``tailoring_rationale``, ``governance_model``), if ``spec`` has one."""
+    if "tailoring_rationale" not in spec:
+        return None
+    return {
+        "phases": [{k: v for k, v in phase.items() if k != "terms"} for phase in spec["phases"]],
+        "tailoring_rationale": spec["tailoring_rationale"],
+        "governance_model": spec["governance_model"],
+    }
+
+
+def standards_mapping(phases: List[dict]) -> dict:
+    """Phase references grouped by standard."""
+    mapping: dict = {"PMBOK": [], "PRINCE2": [], "ISO 21500": [], "ISO 21502": []}
+    for phase in phases:
+        for standard, reference in phase["standards_references"].items():
+            mapping.setdefault(standard, []).append({
+                "phase": phase["name"],
+                "reference": reference,
+                "activities": phase["activities"],
+                "artifacts": phase["artifacts"],
+            })
+    return mapping
@@ -0,0 +1,26 @@
+"""Signed-cookie session engine that adopts pre-existing database session keys.
+
+Before bookmarks moved to signed-cookie sessions, ``Bookmark.session_key`` held
+the visitor's ``django_session`` key, which is also what their ``sessionid``
+cookie still contains. Such a cookie fails signature checks, so instead of
+discarding it the store keeps the old key as the visitor's ``bookmark_key`` and
+re-issues it as a signed cookie. Existing bookmark rows stay reachable without
+touching ``django_session``.
+"""
+
+import re
+
+from django.contrib.sessions.backends import signed_cookies
+
+
+LEGACY_SESSION_KEY = re.compile(r"^[a-z0-9]{32}$")
+
+
+class SessionStore(signed_cookies.SessionStore):
+    def load(self):  # type: ignore[no-untyped-def]
+        legacy_key = self.session_key
+        data = super().load()
+        if not data and legacy_key and LEGACY_SESSION_KEY.match(legacy_key):
+            data = {"bookmark_key": legacy_key}
+            self.modified = True
+        return data
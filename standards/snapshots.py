@@ -0,0 +1,271 @@
+"""Immutable read-only corpus snapshots for the web workers.
+
+Ingest keeps writing to the main database, which serves as the staging copy.
+``publish`` copies it with SQLite's online backup API into
+``PMHUB_SNAPSHOTS["ROOT"]/corpus-<version>-<time>.sqlite3``, keeps only the
+corpus tables (no users, sessions, bookmarks or jobs), marks the file
+read-only and then names it in the ``CURRENT`` pointer file, replaced with a
+single ``os.replace`` (a plain file rather than a symlink, which Windows only
+allows with extra privileges). A snapshot file is never modified after that,
+so readers can open it with ``mode=ro&immutable=1``: no locks, no change
+checks and ``mmap_size`` reads. Ingest write transactions therefore never
+stall them, and readers never see a half-ingested standard.
+
+GET/HEAD requests (``SnapshotMiddleware``) read the corpus models through the
+``snapshot`` database alias (``SnapshotRouter``), and ``db.read_path()`` gives
+raw FTS queries the same file. The middleware pins one snapshot per request
+and points the alias's connection at it. Everything else reads and writes the
+main database: bookmarks, jobs, POSTs, management commands and ingest worker
+threads. The next request after a publish uses the new snapshot without a
+restart; connections already open keep reading the old file.
+
+A snapshot taken before the latest ``standards`` migration lacks its tables
+and columns, so requests read the main database until ``migrate`` (which
+publishes again through ``post_migrate``) or ``publish_snapshot`` replaces it.
+
+Publishing copies the whole database, so request handlers never do it.
+Edits outside ingest (scenarios in the admin) only bump ``CorpusVersion``,
+which leaves the snapshot ``behind``; the ingest job runner publishes it on
+its next pass, as it does after ingest jobs.
+"""
+
+import contextvars
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest, HttpResponse
+
+from .db import db_path
+
+from .models import CorpusVersion
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "ROOT": None,
+    "KEEP": 2,
+    "MMAP_SIZE": 256 * 2**20,
+}
+
+ALIAS = "snapshot"
+POINTER = "CURRENT"
+# Corpus models; only these are ever read from a snapshot.
+MODELS = frozenset({"standard", "standardstats", "page", "passage", "definition", "clause", "clausereference", "scenario", "corpusversion"})
+# Raw FTS5 tables (and their ``<name>_*`` shadow tables) copied along with the models.
+FTS_TABLES = ("page_fts", "passage_fts")
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# Snapshot file of the current GET/HEAD request, None outside them.
+_reading: contextvars.ContextVar[Optional[Path]] = contextvars.ContextVar("pmhub_snapshot_reads", default=None)
+_fresh: Dict[Path, bool] = {}
+
+
+def snapshots_settings() -> dict:
+    config = {**DEFAULTS, **getattr(settings, "PMHUB_SNAPSHOTS", {})}
+    if config["ROOT"] is None:
+        config["ROOT"] = Path(settings.BASE_DIR) / "snapshots"
+    return config
+
+
+def enabled() -> bool:
+    return bool(snapshots_settings()["ENABLED"]) and ALIAS in settings.DATABASES
+
+
+def pointer() -> Path:
+    return Path(snapshots_settings()["ROOT"]) / POINTER
+
+
+def current() -> Optional[Path]:
+    """The published snapshot file, or None before the first publish."""
+    try:
+        path = pointer().parent / pointer().read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return path if path.is_file() else None
+
+
+def version(path: Path) -> int:
+    """The ``CorpusVersion`` snapshot ``path`` was published at (from its name)."""
+    return int(path.name.split("-")[1])
+
+
+def behind() -> bool:
+    """Whether the main database's ``CorpusVersion`` is newer than the published snapshot's."""
+    live = current()
+    if live is None:
+        return False
+    latest = CorpusVersion.objects.using(DEFAULT_DB_ALIAS).filter(pk=1).values_list("version", flat=True).first()
+    return (latest or 0) > version(live)
+
+
+def reading() -> Optional[Path]:
+    """The snapshot corpus reads in this context should use, or None for the main database."""
+    path = _reading.get()
+    return path if path is not None and enabled() else None
+
+
+def active() -> bool:
+    """Whether corpus reads in this context should go to the snapshot."""
+    return reading() is not None
+
+
+def alias() -> str:
+    """Database alias for corpus reads in this context.
+
+    Querysets evaluated after the view returns (a streamed body) run once the
+    middleware has reset the context; pass them ``.using(alias())`` taken
+    inside the view so they still read the request's snapshot.
+    """
+    return ALIAS if active() else DEFAULT_DB_ALIAS
+
+
+def migrations() -> FrozenSet[str]:
+    """Names of the ``standards`` migrations shipped with the code."""
+    return frozenset(p.stem for p in MIGRATIONS_DIR.glob("[0-9][0-9][0-9][0-9]_*.py"))
+
+
+def fresh(path: Path) -> bool:
+    """Whether snapshot ``path`` has every ``standards`` migration applied (cached per file)."""
+    if path not in _fresh:
+        try:
+            conn = sqlite3.connect(f"{path.as_uri()}?mode=ro&immutable=1", uri=True)
+            try:
+                applied = {name for (name,) in conn.execute("SELECT name FROM django_migrations WHERE app = 'standards'")}
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            applied = set()
+        _fresh[path] = migrations() <= applied
+    return _fresh[path]
+
+
+def corpus_tables() -> FrozenSet[str]:
+    """Tables a snapshot keeps: the ``MODELS`` tables, ``FTS_TABLES`` and ``django_migrations``."""
+    return frozenset({apps.get_model("standards", name)._meta.db_table for name in MODELS} | set(FTS_TABLES) | {"django_migrations"})
+
+
+def _keep(table: str, keep: FrozenSet[str]) -> bool:
+    return table in keep or table.startswith("sqlite_") or any(table.startswith(f"{fts}_") for fts in FTS_TABLES)
+
+
+def publish() -> Optional[Path]:
+    """Copy the main database into a new snapshot and make it current; None when snapshots are off."""
+    if not enabled():
+        return None
+    config = snapshots_settings()
+    root = Path(config["ROOT"])
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"corpus-{CorpusVersion.current().version}-{time.time_ns()}.sqlite3"
+    tmp = root / f".{name}.tmp"
+    # Owner-only until the non-corpus tables are gone.
+    os.close(os.open(tmp, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600))
+    source = sqlite3.connect(db_path())
+    target = sqlite3.connect(str(tmp))
+    try:
+        source.backup(target)
+        keep = corpus_tables()
+        tables = [t for (t,) in target.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for table in tables:
+            if not _keep(table, keep):
+                target.execute(f'DROP TABLE "{table}"')
+        target.commit()
+        target.execute("PRAGMA journal_mode=DELETE")
+        target.execute("VACUUM")
+        target.execute("ANALYZE")
+        target.commit()
+    finally:
+        target.close()
+        source.close()
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, root / name)
+
+    marker = root / f".{POINTER}.{os.getpid()}"
+    marker.write_text(name, encoding="utf-8")
+    os.replace(marker, pointer())
+    prune(keep=int(config["KEEP"]))
+    return root / name
+
+
+def prune(keep: int) -> List[Path]:
+    """Delete all but the ``keep`` newest snapshots (never the current one)."""
+    root = Path(snapshots_settings()["ROOT"])
+    live = current()
+    files = sorted(root.glob("corpus-*.sqlite3"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    removed = []
+    for path in files[max(keep, 1):]:
+        if path == live:
+            continue
+        try:
+            # Read-only files cannot be deleted on Windows, nor files another process has open.
+            os.chmod(path, 0o644)
+            path.unlink()
+        except OSError:
+            continue
+        _fresh.pop(path, None)
+        removed.append(path)
+    return removed
+
+
+def publish_after_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    """``post_migrate`` hook: replace a published snapshot that predates the migrations just applied."""
+    if using != DEFAULT_DB_ALIAS or not enabled() or connections[using].is_in_memory_db():
+        return
+    live = current()
+    if live is not None and not fresh(live):
+        publish()
+
+
+def configure_connection(sender, connection, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    """``connection_created`` hook: memory-map snapshot connections."""
+    if connection.alias == ALIAS:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA mmap_size = {int(snapshots_settings()['MMAP_SIZE'])}")
+
+
+class SnapshotRouter:
+    """Send corpus reads to the snapshot while ``SnapshotMiddleware`` marks the request read-only."""
+
+    def db_for_read(self, model, **hints):  # type: ignore[no-untyped-def]
+        if model._meta.app_label == "standards" and model._meta.model_name in MODELS:
+            return alias()
+        return "default"
+
+    def db_for_write(self, model, **hints):  # type: ignore[no-untyped-def]
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):  # type: ignore[no-untyped-def]
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):  # type: ignore[no-untyped-def]
+        return db != ALIAS
+
+
+def bind(path: Path) -> None:
+    """Point this thread's ``snapshot`` connection at ``path``, reopening it if it read another file."""
+    connection = connections[ALIAS]
+    name = f"{path.as_uri()}?mode=ro&immutable=1"
+    if connection.settings_dict["NAME"] != name:
+        connection.close()
+        connection.settings_dict = {**connection.settings_dict, "NAME": name}
+
+
+class SnapshotMiddleware:
+    def __init__(self, get_response):  # type: ignore[no-untyped-def]
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        live = current() if request.method in ("GET", "HEAD") and enabled() else None
+        if live is None or not fresh(live):
+            return self.get_response(request)
+        bind(live)
+        token = _reading.set(live)
+        try:
+            return self.get_response(request)
+        finally:
+            _reading.reset(token)
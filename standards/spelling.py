@@ -0,0 +1,204 @@
+"""Spelling correction ("did you mean") for keyword queries.
+
+``build`` reads the indexed vocabulary straight out of ``page_fts`` through an
+``fts5vocab`` table and writes a SymSpell-style deletion index to
+``PMHUB_SPELLING["ROOT"]``:
+
+``terms.npy``       vocabulary, sorted (fixed-width bytes), row = term id
+``doc_counts.npy``  pages containing each term
+``keys.npy``        CRC32 of every delete of every term's prefix, sorted
+``postings.npy``    term id for each entry of ``keys.npy``
+``meta.json``       build metadata; its mtime tells workers to reload
+
+The arrays are memory-mapped, so every worker process shares one copy through
+the page cache. A lookup hashes the deletes of the misspelt word, finds the
+candidate terms with two ``searchsorted`` calls, and keeps the closest one by
+optimal-string-alignment distance (ties go to the more frequent term). Hash
+collisions only add candidates, which the distance check discards.
+"""
+
+import json
+import os
+import re
+import shutil
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+from rapidfuzz.distance import OSA
+
+from . import db
+from .fts import FILTER_PREFIXES, TOKEN_RE
+from .highlight import QUERY_OPERATORS
+
+
+DEFAULTS = {
+    "ROOT": None,
+    "MAX_DISTANCE": 2,
+    "PREFIX_LENGTH": 7,
+    "MIN_DOCS": 2,
+    "AUTO_APPLY": True,
+}
+
+WORD_RE = re.compile(r"^[^\W\d_]{3,}$")
+# Query tokens split like ``fts.tokens`` (the index's ``unicode61``), so only whole index words are corrected.
+QUERY_TOKEN_RE = re.compile(r"(%s)(\*?)" % TOKEN_RE.pattern)
+# A ``standard:``/``in:`` filter up to where ``fts`` ends the token; its value is a slug or title, not search text.
+FILTER_RE = re.compile(r"(?<![^\s(])(?:%s)[^\s()\",]*" % "|".join(map(re.escape, FILTER_PREFIXES)), re.IGNORECASE)
+
+
+def spelling_settings() -> dict:
+    config = {**DEFAULTS, **getattr(settings, "PMHUB_SPELLING", {})}
+    if config["ROOT"] is None:
+        config["ROOT"] = Path(settings.BASE_DIR) / "spelling"
+    return config
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """``word`` and every string obtained by deleting up to ``distance`` characters."""
+    found = {word}
+    edge = {word}
+    for _ in range(distance):
+        edge = {w[:i] + w[i + 1:] for w in edge if len(w) > 1 for i in range(len(w))} - found
+        found |= edge
+    return found
+
+
+def _hashes(strings: Iterable[str]) -> np.ndarray:
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in strings), dtype=np.uint32)
+
+
+def vocabulary() -> List[Tuple[str, int]]:
+    """``(term, pages)`` for every word token in ``page_fts``."""
+    with db.connect() as conn:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.page_fts_vocab USING fts5vocab(main, page_fts, row)")
+        rows = conn.execute("SELECT term, doc FROM temp.page_fts_vocab").fetchall()
+    return [(term, doc) for term, doc in rows if WORD_RE.match(term)]
+
+
+def build() -> Dict[str, object]:
+    """Build and atomically publish the deletion index from the current ``page_fts`` vocabulary."""
+    config = spelling_settings()
+    distance, prefix = int(config["MAX_DISTANCE"]), int(config["PREFIX_LENGTH"])
+    vocab = sorted((t, n) for t, n in vocabulary() if n >= config["MIN_DOCS"])
+
+    keys: List[np.ndarray] = []
+    postings: List[np.ndarray] = []
+    for term_id, (term, _) in enumerate(vocab):
+        hashes = np.unique(_hashes(_deletes(term[:prefix], distance)))
+        keys.append(hashes)
+        postings.append(np.full(len(hashes), term_id, dtype=np.int32))
+    keys_a = np.concatenate(keys) if keys else np.zeros(0, dtype=np.uint32)
+    postings_a = np.concatenate(postings) if postings else np.zeros(0, dtype=np.int32)
+    order = np.argsort(keys_a, kind="stable")
+
+    meta = {"terms": len(vocab), "deletes": int(len(keys_a)), "max_distance": distance, "prefix_length": prefix}
+    root = Path(config["ROOT"])
+    tmp = root.with_name(root.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    width = max((len(t.encode("utf-8")) for t, _ in vocab), default=1)
+    np.save(tmp / "terms.npy", np.array([t.encode("utf-8") for t, _ in vocab], dtype=f"S{width}"))
+    np.save(tmp / "doc_counts.npy", np.array([n for _, n in vocab], dtype=np.int32))
+    np.save(tmp / "keys.npy", keys_a[order])
+    np.save(tmp / "postings.npy", postings_a[order])
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    old = root.with_name(root.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if root.exists():
+        os.replace(root, old)
+    os.replace(tmp, root)
+    shutil.rmtree(old, ignore_errors=True)
+    _index["key"] = None
+    return meta
+
+
+# --- query --------------------------------------------------------------------
+
+_index: Dict[str, object] = {"key": None}
+
+
+def _load() -> Optional[Dict[str, object]]:
+    root = Path(spelling_settings()["ROOT"])
+    try:
+        key = (str(root), (root / "meta.json").stat().st_mtime_ns)
+    except OSError:
+        return None  # not built yet: no suggestions
+    if _index["key"] != key:
+        meta = json.loads((root / "meta.json").read_text(encoding="utf-8"))
+        if not meta["terms"]:
+            return None
+        _index.update(
+            key=key,
+            meta=meta,
+            terms=np.load(root / "terms.npy", mmap_mode="r"),
+            doc_counts=np.load(root / "doc_counts.npy", mmap_mode="r"),
+            keys=np.load(root / "keys.npy", mmap_mode="r"),
+            postings=np.load(root / "postings.npy", mmap_mode="r"),
+        )
+    return _index
+
+
+def _known(index: Dict[str, object], encoded: bytes) -> bool:
+    terms = index["terms"]
+    i = int(np.searchsorted(terms, encoded))  # type: ignore[call-overload]
+    return i < len(terms) and terms[i] == encoded  # type: ignore[arg-type, index]
+
+
+def correct_word(word: str) -> Optional[str]:
+    """Closest indexed term to an unknown ``word``; None if ``word`` is indexed or nothing is close."""
+    index = _load()
+    word = word.lower()
+    if index is None or _known(index, word.encode("utf-8")):
+        return None
+    meta = index["meta"]
+    distance = min(meta["max_distance"], 1 if len(word) <= 4 else 2)  # type: ignore[index]
+    hashes = _hashes(_deletes(word[: meta["prefix_length"]], distance))  # type: ignore[index]
+    keys, postings = index["keys"], index["postings"]
+    lo = np.searchsorted(keys, hashes, side="left")  # type: ignore[call-overload]
+    hi = np.searchsorted(keys, hashes, side="right")  # type: ignore[call-overload]
+    candidates = {int(t) for a, b in zip(lo, hi) if b > a for t in postings[a:b]}  # type: ignore[index]
+
+    best: Optional[Tuple[int, int, str]] = None
+    terms, doc_counts = index["terms"], index["doc_counts"]
+    for term_id in candidates:
+        term = terms[term_id].decode("utf-8")  # type: ignore[index]
+        if abs(len(term) - len(word)) > distance:
+            continue
+        d = OSA.distance(word, term, score_cutoff=distance)
+        if d <= distance:
+            rank = (d, -int(doc_counts[term_id]), term)  # type: ignore[index]
+            if best is None or rank < best:
+                best = rank
+    return best[2] if best else None
+
+
+def correct_query(query: str) -> Optional[str]:
+    """``query`` with each unknown word replaced by its correction; None if nothing changed.
+
+    Prefix terms (``word*``), FTS operators and ``standard:`` filters are left
+    alone; words inside quoted phrases are corrected like any other.
+    """
+    changed = False
+
+    def replace(match: re.Match) -> str:
+        nonlocal changed
+        word, star = match.group(1), match.group(2)
+        if star or word in QUERY_OPERATORS or not WORD_RE.match(word):
+            return match.group(0)
+        fixed = correct_word(word)
+        if fixed is None:
+            return match.group(0)
+        changed = True
+        return fixed
+
+    query = query or ""
+    parts: List[str] = []
+    end = 0
+    for match in FILTER_RE.finditer(query):
+        parts += [QUERY_TOKEN_RE.sub(replace, query[end:match.start()]), match.group(0)]
+        end = match.end()
+    parts.append(QUERY_TOKEN_RE.sub(replace, query[end:]))
+    return "".join(parts) if changed else None
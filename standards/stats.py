@@ -0,0 +1,66 @@
+"""Per-standard page/char/token totals kept in ``StandardStats``.
+
+Ingest adds each committed batch with ``record_batch`` (a single UPDATE with
+``F()`` increments); anything that rewrites or deletes pages wholesale
+(rebuilds, boilerplate stripping) calls ``refresh`` to recount from the
+pages. Views read these rows instead of counting ``standards_page``.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from django.db import models
+from django.db.models.functions import Coalesce, Greatest, Length
+from django.utils import timezone
+
+from .models import Page, Standard, StandardStats
+
+
+def tokens(text: str) -> int:
+    return len((text or "").split())
+
+
+def record_batch(standard: Standard, pages: Iterable[Page]) -> None:
+    pages = list(pages)
+    if not pages:
+        return
+    top = max(p.page_index for p in pages)
+    StandardStats.objects.get_or_create(standard=standard)
+    StandardStats.objects.filter(standard=standard).update(
+        page_count=models.F("page_count") + len(pages),
+        char_count=models.F("char_count") + sum(len(p.content or "") for p in pages),
+        token_count=models.F("token_count") + sum(tokens(p.content) for p in pages),
+        max_page_index=Greatest(Coalesce("max_page_index", top), top),
+        last_ingested_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def refresh(standard: Standard, ingested: bool = False) -> StandardStats:
+    """Recount ``standard`` from its pages (one aggregate plus one pass over the text for tokens)."""
+    pages = Page.objects.filter(standard=standard)
+    totals = pages.aggregate(
+        page_count=models.Count("id"),
+        char_count=Coalesce(models.Sum(Length("content")), 0),
+        max_page_index=models.Max("page_index"),
+    )
+    totals["token_count"] = sum(tokens(text) for text in pages.values_list("content", flat=True).iterator())
+    if ingested:
+        totals["last_ingested_at"] = timezone.now()
+    row, _ = StandardStats.objects.update_or_create(standard=standard, defaults=totals)
+    return row
+
+
+def refresh_all() -> None:
+    for standard in Standard.objects.all():
+        refresh(standard)
+
+
+def by_standard() -> Dict[int, StandardStats]:
+    return {row.standard_id: row for row in StandardStats.objects.all()}
+
+
+def for_standard(standard: Standard) -> Optional[StandardStats]:
+    try:
+        return standard.stats
+    except StandardStats.DoesNotExist:
+        return None
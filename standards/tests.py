@@ -1,3 +1,1180 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import sqlite3
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.admin import AdminSite
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.exceptions import FieldError
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import assets, boilerplate, compression, crossrefs, db, documents, export, federation, figures, flight, fts, glossary, highlight, http, importtime, ingest, jobs, lsa, passages, profiling, scenarios, snapshots, spelling, stats
+from .admin import ScenarioAdmin
+from .models import Bookmark, CorpusVersion, Definition, IngestJob, Page, Passage, Scenario, Standard, StandardStats
+
+
+class ImportBudgetTests(SimpleTestCase):
+    """Start-up imports of every ``importtime.TARGETS`` process (one fresh interpreter per run).
+
+    Only the deterministic check lives here; wall-clock time depends on the
+    machine and is checked by ``benchmark_imports --fail-over-budget``.
+    """
+
+    def test_heavy_packages_stay_lazy(self) -> None:
+        for target in importtime.TARGETS:
+            with self.subTest(target=target):
+                self.assertEqual(importtime.run_once(target).heavy, [])
+
+    def test_parse(self) -> None:
+        modules = importtime.parse(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   numpy.core\n"
+            "import time:       300 |        420 | numpy\n"
+            "some other stderr line\n"
+        )
+        self.assertEqual([m.name for m in modules], ["numpy.core", "numpy"])
+        self.assertEqual([m.depth for m in modules], [1, 0])
+        self.assertEqual(modules[1].cumulative_ms, 0.42)
+        self.assertEqual(importtime.heavy(modules), ["numpy"])
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    """``manage.py benchmark`` on a tiny synthetic corpus, in a fresh process: it swaps the default database."""
+
+    def run_benchmark(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "benchmark", "--sizes", "8", "--repeat", "1",
+             "--skip-ingest", "--tmpdir", str(self.tmp), *args],
+            capture_output=True, text=True, timeout=120,
+        )
+
+    def test_output_shape_and_regression_gate(self) -> None:
+        self.tmp = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        output = self.tmp / "results.json"
+        done = self.run_benchmark("--output", str(output))
+        self.assertEqual(done.returncode, 0, done.stderr)
+        results = json.loads(output.read_text())
+        self.assertEqual((results["meta"]["sizes"], results["meta"]["repeat"]), ([8], 1))
+        self.assertNotIn("ingest", results)
+        cases = results["sizes"]["8"]
+        for case in ("fts[risk]@20", "fts_passages[risk]@20", "search[risk]", "compare[risk]", "insights",
+                     "tailor[custom_software]", "process_document[custom_software]", "page_view"):
+            self.assertEqual(set(cases[case]), {"runs", "median_ms", "p95_ms", "min_ms"}, case)
+        self.assertIn("page_view", done.stderr)  # the scaling table
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), ["results.json"])  # databases removed
+
+        gated = self.run_benchmark("--baseline", str(output), "--threshold", "0", "--fail-on-regression")
+        self.assertNotEqual(gated.returncode, 0)
+        self.assertIn("REGRESSION", gated.stderr)
+        self.assertEqual(json.loads(gated.stdout)["meta"]["sizes"], [8])
+
+
+class GuideTestCase(TestCase):
+    """Shared fixture: ``guide``, a PDF standard created once per test class."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.guide = Standard.objects.create(title="Guide", file_path="guide.pdf", source_type="pdf")
+
+
+class SnapshotTests(TestCase):
+    """Publishing, pointer file and the stale-snapshot fallback, against a throwaway source database."""
+
+    def setUp(self) -> None:
+        tmp = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.root = tmp / "snapshots"
+        self.source = tmp / "db.sqlite3"
+        conn = sqlite3.connect(self.source)
+        conn.executescript(
+            "CREATE TABLE django_migrations (app TEXT, name TEXT);"
+            "CREATE TABLE standards_page (id INTEGER PRIMARY KEY, content TEXT);"
+            "CREATE TABLE standards_corpusversion (id INTEGER PRIMARY KEY, version INTEGER, updated_at TEXT);"
+            "CREATE TABLE standards_bookmark (id INTEGER PRIMARY KEY, session_key TEXT);"
+            "CREATE TABLE auth_user (id INTEGER PRIMARY KEY, password TEXT);"
+            "CREATE TABLE django_session (session_key TEXT PRIMARY KEY, session_data TEXT);"
+            "CREATE VIRTUAL TABLE page_fts USING fts5(content);"
+            "INSERT INTO standards_page VALUES (1, 'risk register');"
+            "INSERT INTO auth_user VALUES (1, 'secret');"
+        )
+        conn.executemany("INSERT INTO django_migrations VALUES ('standards', ?)", [(name,) for name in sorted(snapshots.migrations())[:-1]])
+        conn.commit()
+        conn.close()
+        self.enterContext(override_settings(PMHUB_SNAPSHOTS={"ENABLED": True, "ROOT": self.root, "KEEP": 1}))
+        self.enterContext(mock.patch.object(snapshots, "db_path", return_value=str(self.source)))
+        self.enterContext(mock.patch.object(snapshots, "bind"))
+
+    def apply_latest_migration(self) -> None:
+        conn = sqlite3.connect(self.source)
+        conn.execute("INSERT INTO django_migrations VALUES ('standards', ?)", (max(snapshots.migrations()),))
+        conn.commit()
+        conn.close()
+
+    def read_alias(self) -> str:
+        """Database the router picks for ``Page`` inside a GET request."""
+        seen = []
+
+        def view(request):  # type: ignore[no-untyped-def]
+            seen.append(snapshots.SnapshotRouter().db_for_read(Page))
+            return HttpResponse()
+
+        snapshots.SnapshotMiddleware(view)(RequestFactory().get("/"))
+        return seen[0]
+
+    def test_publish_keeps_only_corpus_tables(self) -> None:
+        path = snapshots.publish()
+        self.assertEqual(snapshots.current(), path)
+        self.assertEqual((self.root / snapshots.POINTER).read_text(), path.name)
+        self.assertFalse(path.stat().st_mode & stat.S_IWUSR)
+        conn = sqlite3.connect(path)
+        tables = {t for (t,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertEqual(conn.execute("SELECT content FROM standards_page").fetchall(), [("risk register",)])
+        conn.close()
+        self.assertIn("page_fts_data", tables)
+        self.assertIn("django_migrations", tables)
+        self.assertFalse(tables & {"auth_user", "django_session", "standards_bookmark"})
+
+    def test_prune_removes_read_only_snapshots(self) -> None:
+        first = snapshots.publish()
+        second = snapshots.publish()
+        self.assertFalse(first.exists())
+        self.assertEqual(snapshots.current(), second)
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), sorted([snapshots.POINTER, second.name]))
+
+    def test_stale_snapshot_reads_main_database(self) -> None:
+        self.assertEqual(self.read_alias(), "default")
+        stale = snapshots.publish()
+        self.assertFalse(snapshots.fresh(stale))
+        self.assertEqual(self.read_alias(), "default")
+        self.apply_latest_migration()
+        self.assertTrue(snapshots.fresh(snapshots.publish()))
+        self.assertEqual(self.read_alias(), snapshots.ALIAS)
+        # Outside a GET request, and for non-corpus models, always the main database.
+        self.assertEqual(snapshots.SnapshotRouter().db_for_read(Page), "default")
+
+    def test_migrate_republishes_stale_snapshot(self) -> None:
+        stale = snapshots.publish()
+        self.apply_latest_migration()
+        with mock.patch.object(connections["default"], "is_in_memory_db", return_value=False):
+            snapshots.publish_after_migrate(sender=None)
+            republished = snapshots.current()
+            snapshots.publish_after_migrate(sender=None)
+        self.assertNotEqual(republished, stale)
+        self.assertTrue(snapshots.fresh(republished))
+        self.assertEqual(snapshots.current(), republished)
+
+    def test_admin_scenario_edits_leave_publishing_to_the_job_runner(self) -> None:
+        published = snapshots.publish()
+        self.assertFalse(snapshots.behind())
+        scenario = Scenario.objects.first()
+        model_admin = ScenarioAdmin(Scenario, AdminSite())
+        self.enterContext(mock.patch.object(scenarios, "refresh"))
+        ensure_workers = self.enterContext(mock.patch.object(jobs, "ensure_workers"))
+        publish = self.enterContext(mock.patch.object(snapshots, "publish", wraps=snapshots.publish))
+
+        model_admin.save_model(None, scenario, None, True)
+        publish.assert_not_called()
+        ensure_workers.assert_called_once()
+        self.assertTrue(snapshots.behind())
+
+        self.assertEqual(jobs.run_pending(), 0)
+        publish.assert_called_once()
+        self.assertFalse(snapshots.behind())
+        self.assertNotEqual(snapshots.current(), published)
+
+        model_admin.delete_model(None, scenario)
+        self.assertTrue(snapshots.behind())
+        self.assertEqual(publish.call_count, 1)
+
+
+class LazyHtmlTests(TestCase):
+    def test_fast_mode_page_rendered_once(self) -> None:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+            standard = Standard.objects.create(title="Fast", file_path=pdf.name, source_type="pdf")
+            page = Page.objects.create(standard=standard, page_index=0, content="risk")
+            with mock.patch.object(ingest, "pdf_pages", return_value=iter([(0, "risk", "<p>risk</p>")])) as pdf_pages:
+                first = ingest.render_html(page)
+                # A later view reads the page from a snapshot published before the render.
+                stale = Page(pk=page.pk, standard=standard, page_index=0, content="risk")
+                second = ingest.render_html(stale)
+        self.assertEqual((first, second), ("<p>risk</p>", "<p>risk</p>"))
+        pdf_pages.assert_called_once()
+
+    @override_settings(PMHUB_SNAPSHOTS={"ENABLED": False})
+    def test_page_view_renders_pdf_text_view_only_until_stored(self) -> None:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+            guide = Standard.objects.create(title="Fast", file_path=pdf.name, source_type="pdf")
+            book = Standard.objects.create(title="Book", file_path="book.epub", source_type="epub")
+            Page.objects.create(standard=guide, page_index=0, content="risk")
+            Page.objects.create(standard=book, page_index=0, content="quality")
+            rendered = iter([(0, "risk", "<p>rendered risk</p>")])
+            with mock.patch.object(ingest, "pdf_pages", return_value=rendered) as pdf_pages, \
+                    mock.patch.object(ingest, "render_html", wraps=ingest.render_html) as render_html:
+                embedded = self.client.get(reverse("standards:page", args=[guide.slug, 0]))
+                self.assertNotContains(embedded, "rendered risk")
+                render_html.assert_not_called()
+                for _ in range(2):
+                    text = self.client.get(reverse("standards:page", args=[guide.slug, 0]), {"mode": "text"})
+                    self.assertContains(text, "rendered risk")
+                    self.assertContains(self.client.get(reverse("standards:page", args=[book.slug, 0])), "quality")
+        pdf_pages.assert_called_once()
+        self.assertEqual(render_html.call_count, 1)
+
+
+class ScenarioTests(TestCase):
+    def test_saving_specs_bumps_corpus_version(self) -> None:
+        spec = scenarios.load_file()[0]
+        version = CorpusVersion.current().version
+        with mock.patch.object(scenarios, "refresh"):
+            scenarios.save({**spec, "focus": "Changed focus"})
+            self.assertEqual(CorpusVersion.current().version, version + 1)
+            self.assertEqual(Scenario.objects.get(slug=spec["slug"]).spec["focus"], "Changed focus")
+            scenarios.sync()
+        # Once per file, not once per scenario.
+        self.assertEqual(CorpusVersion.current().version, version + 2)
+
+
+class IngestJobTests(GuideTestCase):
+    def setUp(self) -> None:
+        self.enterContext(mock.patch.object(ingest, "count_pages", return_value=1))
+        self.enterContext(mock.patch.object(ingest, "parse", side_effect=lambda *args: iter([(0, "risk", "<p>risk</p>")])))
+        self.enterContext(mock.patch.object(boilerplate, "strip_standard"))
+        self.publish = self.enterContext(mock.patch.object(snapshots, "publish"))
+
+    def job(self) -> IngestJob:
+        return IngestJob.objects.create(file_path="guide.pdf", standard=self.guide, mode=IngestJob.MODE_FULL)
+
+    def test_follow_up_failure_fails_job(self) -> None:
+        with mock.patch.object(glossary, "index_standard", side_effect=RuntimeError("bad heading")):
+            job = ingest.run_job(self.job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.STATUS_FAILED)
+        self.assertEqual(job.error, "glossary: RuntimeError: bad heading")
+        self.assertIsNotNone(job.finished_at)
+        self.publish.assert_not_called()
+
+    def test_worker_publishes_once_per_batch(self) -> None:
+        self.job(), self.job()
+        with mock.patch.object(ingest, "run_job", side_effect=lambda job, **kwargs: IngestJob(pk=job.pk, status=IngestJob.STATUS_DONE)) as run_job:
+            self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual([call.kwargs for call in run_job.call_args_list], [{"publish_snapshot": False}] * 2)
+        self.publish.assert_called_once()
+
+    def test_publish_failure_recorded_on_jobs(self) -> None:
+        job = self.job()
+        job.status = IngestJob.STATUS_DONE
+        job.save()
+        self.publish.side_effect = OSError("disk full")
+        ingest.publish([job])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (IngestJob.STATUS_FAILED, "snapshot: OSError: disk full"))
+
+
+class FtsCompileTests(SimpleTestCase):
+    CASES = {
+        "risk-based": '"risk based"',
+        "ISO/IEC 21500": '"iso iec" AND "21500"',
+        "plan*": '"plan"*',
+        '"risk manag"*': '"risk manag"*',
+        '"unbalanced': '"unbalanced"',
+        "risk risk": '"risk"',
+        "risk AND": '"risk"',
+        "(risk OR": '"risk"',
+        "(a OR b) c": '("a" OR "b") AND "c"',
+        "risk OR issue NOT financial": '"risk" OR ("issue" NOT "financial")',
+        "risk -financial": '"risk" NOT "financial"',
+        "risk NEAR issue": 'NEAR("risk" "issue", 10)',
+        "a NEAR/5 b": 'NEAR("a" "b", 5)',
+        "NEAR(a b, 5)": 'NEAR("a" "b", 5)',
+        "NOT risk": "",
+        "-risk": "",
+        "": "",
+        "  ) , ": "",
+    }
+
+    def test_compiled_expressions(self) -> None:
+        for query, expected in self.CASES.items():
+            with self.subTest(query=query):
+                self.assertEqual(fts.compile(query).match, expected)
+
+    def test_expressions_parse_in_fts5(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(content)")
+        conn.execute("INSERT INTO t VALUES ('risk based planning near an issue')")
+        for query, expected in self.CASES.items():
+            if expected:
+                with self.subTest(query=query):
+                    conn.execute("SELECT rowid FROM t WHERE t MATCH ?", (expected,)).fetchall()
+        conn.close()
+
+    def test_standard_filters(self) -> None:
+        compiled = fts.compile("standard:prince2 risk")
+        self.assertEqual((compiled.match, compiled.standards), ('"risk"', ("prince2",)))
+        compiled = fts.compile("in:PMBOK stakeholder OR risk")
+        self.assertEqual((compiled.match, compiled.standards), ('"stakeholder" OR "risk"', ("pmbok",)))
+        self.assertEqual(fts.compile("standard:iso").match, "")
+
+    def test_highlight_terms(self) -> None:
+        self.assertEqual(fts.compile('"risk manag"* NOT issue').terms, (("risk", False), ("manag", True)))
+
+    def test_any_of(self) -> None:
+        self.assertEqual(fts.any_of(["risk management", "Risk management", "plan", "--"]), '"risk management" OR "plan"')
+
+
+class GlossaryTests(GuideTestCase):
+    def definitions(self, pages):  # type: ignore[no-untyped-def]
+        return [(e.page_id, e.clause, e.term, e.definition) for e in glossary.entries(pages)]
+
+    def test_iso_clause(self) -> None:
+        pages = [
+            (1, "Contents\n3 Terms and definitions .......... 2\n"),
+            (2, "3 Terms and definitions\n"
+                "For the purposes of this document, the following terms apply.\n"
+                "3.1\nactivity\nidentified work performed during a project (3.5)\n"
+                "[SOURCE: ISO 9000:2015, 3.4.1,\nmodified]\n"
+                "3.2\nbaseline\nreference basis for comparison against which project\nperformance is monitored\n"
+                "Note 1 to entry: A baseline can be changed.\n"
+                "3.3\nstakeholders\nperson, group or organization that can affect or be affected by the project\n"
+                "4 Project management concepts\n3.9\noutside\nnot part of the clause at all\n"),
+        ]
+        self.assertEqual(self.definitions(pages), [
+            (2, "3.1", "activity", "identified work performed during a project"),
+            (2, "3.2", "baseline", "reference basis for comparison against which project performance is monitored"),
+            (2, "3.3", "stakeholders", "person, group or organization that can affect or be affected by the project"),
+        ])
+
+    def test_iso_displaced_words_restored(self) -> None:
+        pages = [(9, "3 Terms and definitions\n"
+                     "3.1\nproject\ntemporary endeavour\nobjectives\nto create outputs that achieve the\n"
+                     "3.2\nobjective\nresult to be achieved by a project\n"
+                     "3.3\ndeliverable\nunique output produced by a project\n")]
+        self.assertEqual(self.definitions(pages)[0], (9, "3.1", "project", "temporary endeavour to create outputs that achieve the objectives"))
+
+    def test_run_in_glossary(self) -> None:
+        pages = [(5, "Glossary\n"
+                     "Acceptance Criteria. A set of conditions that is required to be met before deliverables are accepted.\n"
+                     "Agile Approaches. Approaches that use iterative and incremental\nmethods to deliver value.\n"
+                     "Backlog: An ordered list of user-centric requirements that a team maintains.\n"
+                     "Index\nAcceptance 4\n")]
+        self.assertEqual(self.definitions(pages), [
+            (5, "", "Acceptance Criteria", "A set of conditions that is required to be met before deliverables are accepted."),
+            (5, "", "Agile Approaches", "Approaches that use iterative and incremental methods to deliver value."),
+            (5, "", "Backlog", "An ordered list of user-centric requirements that a team maintains."),
+        ])
+
+    def test_block_glossary(self) -> None:
+        pages = [(7, "Glossary\n"
+                     "benefit\nThe measurable improvement resulting from an outcome perceived as an\nadvantage by one or more stakeholders.\n"
+                     "business case\nThe justification for an organizational activity (project), which\ntypically contains costs, benefits and risks.\n"
+                     "stage\nA subset of a project that has its own plan.\n")]
+        self.assertEqual([entry[2] for entry in self.definitions(pages)], ["benefit", "business case", "stage"])
+        self.assertEqual(self.definitions(pages)[0][3], "The measurable improvement resulting from an outcome perceived as an advantage by one or more stakeholders.")
+
+    def test_too_few_entries(self) -> None:
+        self.assertEqual(self.definitions([(1, "Glossary\nstage\nA subset of a project that has its own plan.\n")]), [])
+
+    def test_key(self) -> None:
+        cases = {
+            "Risks (R)": "risk",
+            "Work Breakdown Structures (WBS)": "work breakdown structure",
+            "Activities": "activity",
+            "Process": "process",
+            "Status": "status",
+            "Analysis": "analysis",
+            "Café Stakeholders": "cafe stakeholder",
+            "Stakeholder-Engagement": "stakeholder engagement",
+            "(PMO)": "",
+        }
+        for term, expected in cases.items():
+            with self.subTest(term=term):
+                self.assertEqual(glossary.key(term), expected)
+
+    def test_clean(self) -> None:
+        self.assertEqual(glossary._clean("defined in (3.5) and 4.2) the ( ) plan , see"), "defined in and the plan, see")
+
+    def test_lookup_exact_then_prefix(self) -> None:
+        page = Page.objects.create(standard=self.guide, page_index=0, content="")
+        for term in ("Risk", "Risk appetite", "Risk register"):
+            Definition.objects.create(standard=self.guide, page=page, term=term, key=glossary.key(term), definition="...")
+        found, exact = glossary.lookup("risks")
+        self.assertEqual(([d.term for d in found], exact), (["Risk"], True))
+        found, exact = glossary.lookup("risk reg")
+        self.assertEqual(([d.term for d in found], exact), (["Risk register"], False))
+        found, exact = glossary.lookup("ris")
+        self.assertEqual(([d.term for d in found], exact), (["Risk", "Risk appetite", "Risk register"], False))
+        self.assertEqual(glossary.lookup("risk", standard_ids=[self.guide.id + 1]), ([], False))
+        self.assertEqual(glossary.lookup("--"), ([], False))
+
+
+class CrossrefTests(SimpleTestCase):
+    PAGES = [
+        (1, "Contents\n1 Scope .......... 1\n2 Normative references .......... 1\n"
+            "3 Terms and definitions .......... 2\n4 Concepts .......... 3\n"),
+        (2, "1 Scope\nThis document gives guidance (see 4.2).\n2 Normative references\n"
+            "There are no normative references.\n3 Terms and definitions\n3.1\nproject\ntemporary endeavour (3.20)\n"),
+        (3, "4\nProject management concepts\n4.1 General\nAs described in Clause 3 and Annex A, projects vary (3.20).\n"
+            "12 Stakeholders want value\n4.2 Governance\nSee 4.2 for this clause; see also 4.1.\n"),
+        (4, "Annex A\n(informative)\nExamples\nA.1 Construction project\nSubclauses 4.1 and 4.2 apply.\n"),
+    ]
+
+    def test_headings(self) -> None:
+        self.assertEqual([(h.page_id, h.number, h.title) for h in crossrefs.headings(self.PAGES)], [
+            (2, "1", "Scope"),
+            (2, "2", "Normative references"),
+            (2, "3", "Terms and definitions"),
+            (3, "4", "Project management concepts"),  # number on its own line
+            (3, "4.1", "General"),
+            (3, "4.2", "Governance"),  # "12 Stakeholders ..." cannot follow 4.1
+            (4, "A", "Examples"),
+            (4, "A.1", "Construction project"),
+        ])
+
+    def test_contents_page_skipped(self) -> None:
+        self.assertNotIn(1, {h.page_id for h in crossrefs.headings(self.PAGES)})
+        contents = [(1, "\n".join(f"{n} Heading number {n}" for n in range(1, 10)))]
+        self.assertEqual(crossrefs.headings(contents), [])
+
+    def test_follows(self) -> None:
+        self.assertTrue(crossrefs._follows((4, 2), (4, 3), 3))
+        self.assertTrue(crossrefs._follows((4, 2), (4, 2, 1), 3))
+        self.assertTrue(crossrefs._follows((4, 2), (5,), 3))
+        self.assertTrue(crossrefs._follows(("A",), ("A", 1), 3))
+        self.assertFalse(crossrefs._follows((4, 2), (9,), 3))
+        self.assertFalse(crossrefs._follows((4, 2), (12,), 3))
+        self.assertFalse(crossrefs._follows((4, 2), (4, 2), 3))
+
+    def test_references(self) -> None:
+        found = crossrefs.headings(self.PAGES)
+        self.assertEqual([tuple(r) for r in crossrefs.references(self.PAGES, found)], [
+            (2, "1", "4.2", "4.2"),
+            # (3.20) inside clause 3 refers to itself and is dropped; in 4.1 it resolves to 3.
+            (3, "4.1", "3", "3"),
+            (3, "4.1", "A", "A"),
+            (3, "4.2", "4.1", "4.1"),  # "See 4.2" in 4.2 itself is dropped
+            (4, "A.1", "4.1", "4.1"),
+            (4, "A.1", "4.2", "4.2"),
+        ])
+
+    def test_resolve_to_deepest_known_clause(self) -> None:
+        known = {h.number: h for h in crossrefs.headings(self.PAGES)}
+        self.assertEqual(crossrefs._resolve("3.20", known), "3")
+        self.assertEqual(crossrefs._resolve("4.2.7", known), "4.2")
+        self.assertEqual(crossrefs._resolve("A.1", known), "A.1")
+        self.assertIsNone(crossrefs._resolve("9.1", known))
+
+
+class HighlightTests(SimpleTestCase):
+    def test_marks_fts_tokens(self) -> None:
+        text = "Risk-based planning keeps a risk_register; an asterisk is not a risk."
+        self.assertEqual(
+            highlight.highlight(text, (("risk", False),)),
+            "<mark>Risk</mark>-based planning keeps a <mark>risk</mark>_register; an asterisk is not a <mark>risk</mark>.",
+        )
+
+    def test_prefix_terms(self) -> None:
+        terms = highlight.substring_terms("risk manag")
+        self.assertEqual(terms, (("risk", True), ("manag", True)))
+        self.assertEqual(
+            highlight.highlight("Risks need management, not managers whims.", terms),
+            "<mark>Risks</mark> need <mark>management</mark>, not <mark>managers</mark> whims.",
+        )
+        self.assertEqual(highlight.highlight("risky business", (("risk", False),)), "risky business")
+
+    def test_escapes_text(self) -> None:
+        self.assertEqual(highlight.highlight("<b>risk</b> & issue", (("risk", False),)), "&lt;b&gt;<mark>risk</mark>&lt;/b&gt; &amp; issue")
+
+    def test_no_hit_shows_leading_window(self) -> None:
+        text = " ".join(f"word{n}" for n in range(100))
+        snippet = highlight.highlight(text, (("risk", False),), size=4)
+        self.assertTrue(snippet.startswith("word0 word1"))
+        self.assertTrue(snippet.endswith("…"))
+
+    def test_window_around_densest_hits(self) -> None:
+        text = " ".join(["filler"] * 200 + ["risk", "and", "issue"] + ["filler"] * 200)
+        snippet = highlight.highlight(text, (("risk", False), ("issue", False)), size=6, max_fragments=1)
+        self.assertIn("<mark>risk</mark> and <mark>issue</mark>", snippet)
+        self.assertTrue(snippet.startswith("…") and snippet.endswith("…"))
+
+    def test_query_terms(self) -> None:
+        self.assertEqual(highlight.query_terms('"risk" OR plan* NOT risk_x'), (("risk", False), ("plan", True), ("x", False)))
+
+
+class CompressedTextFieldTests(GuideTestCase):
+    def stored(self, page: Page) -> object:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT content_html FROM standards_page WHERE id = %s", [page.pk])
+            return cursor.fetchone()[0]
+
+    def test_round_trip(self) -> None:
+        html = '<div style="position:absolute;"><span>Risk é</span></div>' * 20
+        page = Page.objects.create(standard=self.guide, page_index=0, content="risk", content_html=html)
+        self.assertEqual(self.stored(page)[:1], bytes([compression.FORMAT_DEFLATE_V1]))
+        self.assertLess(len(self.stored(page)), len(html))
+        self.assertEqual(Page.objects.get(pk=page.pk).content_html, html)
+
+        Page.objects.filter(pk=page.pk).update(content_html="<p>updated</p>")
+        self.assertEqual(Page.objects.get(pk=page.pk).content_html, "<p>updated</p>")
+        page.content_html = "<p>bulk</p>"
+        Page.objects.bulk_update([page], ["content_html"])
+        self.assertEqual(Page.objects.get(pk=page.pk).content_html, "<p>bulk</p>")
+        self.assertIsInstance(self.stored(page), bytes)
+        page.content_html = ""
+        page.save()
+        self.assertEqual(self.stored(page), "")
+
+    def test_legacy_plain_text_reads_back(self) -> None:
+        page = Page.objects.create(standard=self.guide, page_index=0, content="risk")
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE standards_page SET content_html = %s WHERE id = %s", ["<p>plain</p>", page.pk])
+        self.assertEqual(Page.objects.get(pk=page.pk).content_html, "<p>plain</p>")
+
+    def test_lookups(self) -> None:
+        Page.objects.create(standard=self.guide, page_index=0, content="risk", content_html="<p>risk</p>")
+        Page.objects.create(standard=self.guide, page_index=1, content="issue")
+        self.assertEqual(list(Page.objects.filter(content_html__isnull=True).values_list("page_index", flat=True)), [1])
+        for lookup in ("content_html", "content_html__contains", "content_html__icontains", "raw_content__startswith"):
+            with self.subTest(lookup=lookup), self.assertRaises(FieldError):
+                Page.objects.filter(**{lookup: "risk"}).exists()
+
+
+def corpus_file(test: TestCase) -> Path:
+    """Copy the test database's corpus tables, FTS indexes included, to a file ``db.read_path()`` then names.
+
+    The test database lives in memory, out of reach of the raw sqlite3
+    connections the FTS queries use.
+    """
+    path = Path(test.enterContext(tempfile.TemporaryDirectory())) / "corpus.sqlite3"
+    tables = ["standards_standard", "standards_page", "standards_passage"]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND (tbl_name IN (%s) OR name IN ('page_fts', 'passage_fts')) "
+            "ORDER BY type = 'trigger', type = 'index'" % ",".join("'%s'" % t for t in tables)
+        )
+        schema = [sql for (sql,) in cursor.fetchall()]
+        rows = {}
+        for table in tables:
+            cursor.execute(f"SELECT * FROM {table}")
+            rows[table] = cursor.fetchall()
+    conn = sqlite3.connect(path)
+    with conn:
+        for sql in schema:
+            conn.execute(sql)
+        for table, values in rows.items():
+            if values:
+                conn.executemany(f"INSERT INTO {table} VALUES ({','.join('?' * len(values[0]))})", values)
+    conn.close()
+    test.enterContext(mock.patch.object(db, "read_path", return_value=(str(path), False)))
+    return path
+
+
+class BoilerplateTests(GuideTestCase):
+    @staticmethod
+    def page_text(n: int) -> str:
+        topic = ["scope", "schedule", "cost", "quality", "risk", "team", "stakeholders", "change", "benefits", "closure"][n]
+        note = "\nSee the appendix for worked examples." if n % 2 else ""
+        return (
+            f"Guide to Project Delivery 2021 - page {n + 1}\n"
+            f"This section explains {topic}.\nIt covers {topic} practice.\n"
+            f"Totals for {topic}\n{n * 7}\n{n * 11}\nReview the {topic} totals.\nPlan the {topic} work.{note}\n"
+            "Licensed to Example Ltd. Copyright 2021\n"
+            f"{n + 1}"
+        )
+
+    def test_detect_repeated_header_and_footer_only(self) -> None:
+        texts = [self.page_text(n) for n in range(10)]
+        keys = boilerplate.detect(texts, min_fraction=0.7, min_pages=8, edge_lines=4)
+        self.assertEqual(keys, {"guide to project delivery # - page #", "licensed to example ltd. copyright #", "#"})
+        self.assertEqual(boilerplate.detect(texts[:7], min_fraction=0.7, min_pages=8, edge_lines=4), frozenset())
+        text, removed = boilerplate.strip(texts[3], keys, edge_lines=4)
+        self.assertEqual(removed, 3)  # the table's numbers are not at the page edges and stay
+        # The appendix note is on half the pages, below MIN_FRACTION, and stays too.
+        self.assertEqual(text, (
+            "This section explains quality.\nIt covers quality practice.\nTotals for quality\n21\n33\n"
+            "Review the quality totals.\nPlan the quality work.\nSee the appendix for worked examples."
+        ))
+
+    def test_strip_standard_keeps_raw_content_and_is_idempotent(self) -> None:
+        originals = [self.page_text(n) for n in range(10)]
+        pages = Page.objects.bulk_create(Page(standard=self.guide, page_index=n, content=t) for n, t in enumerate(originals))
+        passages.index_pages(pages, replace=False)
+
+        report = boilerplate.strip_standard(self.guide)
+        self.assertEqual((report.pages, report.changed), (10, 10))
+        stripped = list(Page.objects.filter(standard=self.guide).order_by("page_index"))
+        self.assertEqual([p.raw_content for p in stripped], originals)
+        self.assertTrue(all("Copyright" not in p.content and "This section" in p.content for p in stripped))
+        self.assertFalse(Passage.objects.filter(page__standard=self.guide, content__contains="Copyright").exists())
+
+        again = boilerplate.strip_standard(self.guide)
+        self.assertEqual(again.changed, 0)
+        self.assertEqual(again.lines, report.lines)
+        self.assertEqual(
+            [(p.content, p.raw_content) for p in Page.objects.filter(standard=self.guide).order_by("page_index")],
+            [(p.content, p.raw_content) for p in stripped],
+        )
+
+
+class StatsTests(GuideTestCase):
+    FIELDS = ("page_count", "char_count", "token_count", "max_page_index")
+
+    def counters(self, standard: Standard) -> tuple:
+        return StandardStats.objects.values_list(*self.FIELDS).get(standard=standard)
+
+    def assert_matches_refresh(self, standard: Standard) -> None:
+        incremental = self.counters(standard)
+        stats.refresh(standard)
+        self.assertEqual(incremental, self.counters(standard))
+
+    def test_batch_counters_match_a_full_recount(self) -> None:
+        texts = [(n, BoilerplateTests.page_text(n), None) for n in range(10)]
+        self.enterContext(override_settings(PMHUB_INGEST={"BATCH_SIZE": 3, "HTML_BACKFILL": False}))
+        self.enterContext(mock.patch.object(ingest, "count_pages", return_value=len(texts)))
+        self.enterContext(mock.patch.object(ingest, "parse", side_effect=lambda path, start, mode: iter(texts[start:])))
+        self.enterContext(mock.patch.object(spelling, "build"))
+        self.enterContext(mock.patch.object(scenarios, "refresh"))
+        with mock.patch.object(boilerplate, "strip_standard"):
+            job = ingest.run_job(IngestJob.objects.create(file_path="guide.pdf", standard=self.guide), publish_snapshot=False)
+        self.assertEqual(job.status, IngestJob.STATUS_DONE)
+        self.assertEqual(self.counters(self.guide)[0], 10)
+        self.assert_matches_refresh(self.guide)
+
+        report = boilerplate.strip_standard(self.guide)
+        self.assertEqual(report.changed, 10)
+        self.assertLess(self.counters(self.guide)[1], sum(len(text) for _, text, _ in texts))
+        self.assert_matches_refresh(self.guide)
+
+
+class PassageSplitTests(SimpleTestCase):
+    def test_windows_overlap_and_snap_to_whitespace(self) -> None:
+        text = " ".join(f"word{n:04d}" for n in range(300))
+        windows = list(passages.split(text))
+        self.assertGreater(len(windows), 3)
+        self.assertEqual(windows[0][0], 0)
+        self.assertTrue(windows[-1][1].endswith("word0299"))
+        for (start, chunk), (next_start, _) in zip(windows, windows[1:]):
+            self.assertEqual(text[start:start + len(chunk)], chunk)
+            self.assertLessEqual(len(chunk), passages.WINDOW + passages.SNAP)
+            self.assertAlmostEqual(next_start - start, passages.STRIDE, delta=passages.SNAP)
+            self.assertLess(next_start, start + len(chunk))  # consecutive windows overlap
+            self.assertTrue(text[next_start - 1].isspace())
+
+    def test_short_and_blank_pages(self) -> None:
+        self.assertEqual(list(passages.split("  Short page.\n")), [(2, "Short page.")])
+        self.assertEqual(list(passages.split("x" * passages.WINDOW)), [(0, "x" * passages.WINDOW)])
+        self.assertEqual(list(passages.split(" \n ")), [])
+        self.assertEqual(list(passages.split("")), [])
+
+
+class FederationTests(GuideTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        cls.manual = Standard.objects.create(title="Manual", file_path="manual.epub", source_type="epub")
+        pages = Page.objects.bulk_create([
+            Page(standard=cls.guide, page_index=0, content="Risk register and risk owners. Risk, risk, risk."),
+            Page(standard=cls.guide, page_index=1, content="Stakeholder engagement plan."),
+            Page(standard=cls.manual, page_index=0, content="Identify each risk early."),
+            Page(standard=cls.manual, page_index=1, content="Benefits review."),
+        ])
+        passages.index_pages(pages, replace=False)
+
+    def setUp(self) -> None:
+        corpus_file(self)
+
+    def test_match_ranks_by_bm25(self) -> None:
+        hits = federation.match('"risk"', 10, with_content=True)
+        self.assertEqual([(h.standard_id, h.page_index) for h in hits], [(self.guide.id, 0), (self.manual.id, 0)])
+        self.assertLess(hits[0].score, hits[1].score)
+        self.assertEqual(hits[1].content, "Identify each risk early.")
+        self.assertIsNone(federation.match('"risk"', 1)[0].content)
+
+    def test_passages_restricted_to_standards(self) -> None:
+        self.assertEqual(len(federation.passages('"risk"', 10)), 2)
+        hits = federation.passages('"risk"', 10, standard_ids=[self.manual.id])
+        self.assertEqual([(h.standard_id, h.page_index) for h in hits], [(self.manual.id, 0)])
+        self.assertEqual(federation.passages('"risk"', 10, standard_ids=[]), [])
+
+    def test_passages_keep_the_best_passage_per_page(self) -> None:
+        filler = "Plan the work and review the schedule. " * 20
+        content = "A risk is noted. " + filler + "Risk register, risk owner, risk review. " + filler
+        page = Page.objects.create(standard=self.guide, page_index=2, content=content)
+        self.assertGreater(passages.index_pages([page]), 2)
+        corpus_file(self)
+        hits = [h for h in federation.passages('"risk"', 10) if h.page_id == page.id]
+        self.assertEqual(len(hits), 1)
+        self.assertIn("Risk register, risk owner, risk review.", hits[0].content)
+        self.assertNotIn("A risk is noted.", hits[0].content)
+
+    def test_page_counts_and_first_passages(self) -> None:
+        self.assertEqual(federation.page_counts('"risk" OR "benefits"'), {self.guide.id: 1, self.manual.id: 2})
+        hits = federation.first_passages('"risk" OR "benefits"', 10)
+        self.assertEqual(
+            [(h.standard_id, h.page_index) for h in hits],
+            [(self.guide.id, 0), (self.manual.id, 0), (self.manual.id, 1)],
+        )
+
+
+@override_settings(PMHUB_SNAPSHOTS={"ENABLED": False})
+class LsaTests(GuideTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        cls.manual = Standard.objects.create(title="Manual", file_path="manual.epub", source_type="epub")
+        cls.pages = Page.objects.bulk_create([
+            Page(standard=cls.guide, page_index=0, content="Risk register lists each risk owner and mitigation."),
+            Page(standard=cls.manual, page_index=0, content="Assign a risk owner and plan the mitigation early."),
+            Page(standard=cls.manual, page_index=1, content="Quality audit and inspection review quality records."),
+        ])
+
+    def setUp(self) -> None:
+        root = Path(self.enterContext(tempfile.TemporaryDirectory())) / "lsa"
+        self.enterContext(override_settings(PMHUB_LSA={"ROOT": root, "MIN_DF": 1, "COMPONENTS": 2}))
+        self.meta = lsa.build((p.id, p.content) for p in self.pages)
+
+    def test_build_and_search(self) -> None:
+        self.assertEqual((self.meta["pages"], self.meta["components"]), (3, 2))
+        risk, shared, quality = (p.id for p in self.pages)
+        hits = lsa.search("risk mitigation")
+        self.assertEqual({hit.page_id for hit in hits[:2]}, {risk, shared})
+        self.assertTrue(all(hit.score < 1e-3 for hit in hits[2:]))
+        self.assertEqual(lsa.search("quality")[0].page_id, quality)
+        self.assertEqual([hit.page_id for hit in lsa.search("risk mitigation", page_ids=[shared])], [shared])
+        self.assertEqual(lsa.search("unknown words"), [])
+
+    def test_concept_search_applies_standard_filter(self) -> None:
+        url = reverse("standards:search")
+        response = self.client.get(url, {"q": "risk owner", "mode": "concept"})
+        self.assertEqual({r["page"].standard_id for r in response.context["results"][:2]}, {self.guide.id, self.manual.id})
+        response = self.client.get(url, {"q": "risk owner standard:manual", "mode": "concept"})
+        self.assertEqual(response.context["mode"], "concept")
+        ids = [r["page"].id for r in response.context["results"]]
+        self.assertEqual(ids[0], self.pages[1].id)
+        self.assertNotIn(self.pages[0].id, ids)
+
+
+@override_settings(PMHUB_SNAPSHOTS={"ENABLED": False})
+class FigureTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory())) / "figures"
+        self.enterContext(override_settings(PMHUB_FIGURES={"ROOT": self.root, "WIDTHS": [2]}))
+
+    @staticmethod
+    def image(fmt: str) -> bytes:
+        from PIL import Image
+
+        out = io.BytesIO()
+        Image.new("RGB", (4, 3), "red").save(out, fmt)
+        return out.getvalue()
+
+    def test_same_bytes_stored_once(self) -> None:
+        data = self.image("PNG")
+        first, second = figures.store(data), figures.store(data)
+        self.assertEqual(first, second)
+        self.assertEqual(first.variants, [(2, first.name.replace(".png", "-2.webp"))])
+        self.assertEqual(sorted(p.name for p in self.root.rglob("*") if p.is_file()), sorted([first.name, first.variants[0][1]]))
+        self.assertEqual(figures.path_for(first.name).read_bytes(), data)
+        self.assertIsNone(figures.store(b"not an image"))
+
+    def test_bmp_reencoded_as_png(self) -> None:
+        from PIL import Image
+
+        figure = figures.store(self.image("BMP"))
+        self.assertTrue(figure.name.endswith(".png"))
+        with Image.open(figures.path_for(figure.name)) as stored:
+            self.assertEqual((stored.format, stored.size), ("PNG", (4, 3)))
+
+    def test_figure_view(self) -> None:
+        figure = figures.store(self.image("PNG"))
+        response = self.client.get(figures.url_for(figure.name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Cache-Control"], assets.IMMUTABLE)
+        self.assertEqual(b"".join(response.streaming_content), figures.path_for(figure.name).read_bytes())
+        response.close()
+        (self.root.parent / "secret.png").write_bytes(b"secret")
+        for name in ("../secret.png", f"{figure.name[:2]}/../../secret.png", "00/missing.png"):
+            self.assertEqual(self.client.get(reverse("standards:figure", args=[name])).status_code, 404, name)
+
+
+class AssetStorageTests(SimpleTestCase):
+    def test_plain_names_until_collectstatic_writes_a_manifest(self):  # type: ignore[no-untyped-def]
+        root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(DEBUG=False, STATIC_ROOT=str(root)))
+        self.assertEqual(assets.AssetStorage(location=root).url("admin/css/base.css"), "/static/admin/css/base.css")
+
+        (root / "staticfiles.json").write_text(
+            '{"version": "1.1", "paths": {"css/app.css": "css/app.0123abcd.css"}}', encoding="utf-8"
+        )
+        self.assertEqual(assets.AssetStorage(location=root).url("css/app.css"), "/static/css/app.0123abcd.css")
+
+
+class DocumentTests(TestCase):
+    def setUp(self) -> None:
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(PMHUB_DOCUMENTS={"ROOT": self.root}))
+        self.spec = next(s for s in scenarios.load_file() if scenarios.design(s))
+        self.design = scenarios.design(self.spec)
+
+    def test_store_renames_into_place_only_when_complete(self) -> None:
+        path = self.root / "custom-0123.md"
+        stream = documents._store(iter(["# a\n", "b\n"]), path)
+        self.assertEqual(next(stream), b"# a\n")
+        self.assertFalse(path.exists())
+        self.assertEqual(b"".join(stream), b"b\n")
+        self.assertEqual(path.read_bytes(), b"# a\nb\n")
+        self.assertEqual(list(self.root.iterdir()), [path])
+
+    def test_interrupted_stream_leaves_nothing_behind(self) -> None:
+        path = self.root / "custom-0123.md"
+        stream = documents._store(iter(["# a\n", "b\n"]), path)
+        next(stream)
+        stream.close()
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_store_prunes_older_artefacts_of_the_same_scenario(self) -> None:
+        for name in ("custom-old1.md", "custom-old2.html", "custom-software-old.md"):
+            (self.root / name).write_text("old")
+        b"".join(documents._store(iter(["new"]), self.root / "custom-0123.md"))
+        self.assertEqual(
+            sorted(p.name for p in self.root.iterdir()),
+            ["custom-0123.md", "custom-old2.html", "custom-software-old.md"],
+        )
+
+    def test_response_streams_once_then_serves_the_file(self) -> None:
+        first = documents.response(self.spec, self.design, "md", download=True)
+        self.assertTrue(first.streaming)
+        self.assertNotIsInstance(first, documents.FileResponse)
+        body = b"".join(first.streaming_content)
+        self.assertIn(b"**Corpus as of:** ", body)
+        self.assertEqual(first["Content-Disposition"], f'attachment; filename="{self.spec["slug"]}-process-design.md"')
+
+        again = documents.response(self.spec, self.design, "md")
+        self.assertIsInstance(again, documents.FileResponse)
+        self.assertEqual(b"".join(again.streaming_content), body)
+        again.close()
+
+        CorpusVersion.bump()
+        fresh = documents.response(self.spec, self.design, "md")
+        self.assertNotIsInstance(fresh, documents.FileResponse)
+        b"".join(fresh.streaming_content)
+        self.assertEqual(len(list(self.root.glob(f"{self.spec['slug']}-*.md"))), 1)
+
+
+class FlightTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.enterContext(override_settings(PMHUB_FLIGHT={"ENABLED": True, "ROUTES": {}}))
+        self.enterContext(mock.patch.dict(flight._metrics, clear=True))
+
+    def test_waiters_get_their_own_copy_of_the_leaders_error(self) -> None:
+        release = threading.Event()
+        errors = {}
+
+        def compute():  # type: ignore[no-untyped-def]
+            release.wait(5)
+            raise ValueError("boom")
+
+        def call(name):  # type: ignore[no-untyped-def]
+            try:
+                flight.run("test", "key", compute)
+            except ValueError as exc:
+                errors[name] = exc
+
+        leader = threading.Thread(target=call, args=("leader",))
+        leader.start()
+        while ("test", "key") not in flight._calls:
+            time.sleep(0.001)
+        waiters = [threading.Thread(target=call, args=(f"waiter{n}",)) for n in range(2)]
+        for thread in waiters:
+            thread.start()
+        while flight._calls[("test", "key")].waiters < 2:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *waiters]:
+            thread.join(5)
+
+        self.assertEqual(sorted(errors), ["leader", "waiter0", "waiter1"])
+        self.assertEqual(len({id(exc) for exc in errors.values()}), 3)
+        for name in ("waiter0", "waiter1"):
+            self.assertEqual(errors[name].args, ("boom",))
+            self.assertIs(errors[name].__cause__, errors["leader"])
+        self.assertEqual(flight.snapshot()["test"], {"coalesced": 2, "in_flight": 0, "failed": 1})
+
+    def test_copy_keeps_attributes_without_calling_init(self) -> None:
+        original = flight.Overloaded("compare", 15.0)
+        copy = flight._own(original)
+        self.assertIsInstance(copy, flight.Overloaded)
+        self.assertEqual((copy.route, copy.retry_after, copy.args), ("compare", 15.0, original.args))
+
+    def test_computed_counts_only_successes(self) -> None:
+        self.assertEqual(flight.run("test", 1, lambda: 42), 42)
+        with self.assertRaises(ZeroDivisionError):
+            flight.run("test", 2, lambda: 1 / 0)
+        self.assertEqual(flight.snapshot()["test"], {"in_flight": 0, "computed": 1, "failed": 1})
+
+    def test_stats_endpoints_are_staff_only(self) -> None:
+        for url in ("/standards/flight/", "/standards/profiling/"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 302)
+                self.assertIn("/admin/login/", response["Location"])
+
+
+class ProfiledCursorTests(SimpleTestCase):
+    def test_every_way_of_reading_rows_is_timed(self) -> None:
+        conn = sqlite3.connect(":memory:", factory=profiling.ProfiledConnection)
+        self.addCleanup(conn.close)
+        sql = "SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3"
+        reads = {
+            "fetchone": lambda cur: cur.fetchone(),
+            "fetchmany": lambda cur: cur.fetchmany(2),
+            "fetchall": lambda cur: cur.fetchall(),
+            "iteration": lambda cur: [row for row in cur],
+        }
+        for name, read in reads.items():
+            with self.subTest(read=name), mock.patch.object(profiling, "record_sql") as record:
+                cur = conn.execute(sql)
+                self.assertEqual(record.call_count, 1)
+                read(cur)
+                self.assertGreater(record.call_count, 1)
+                self.assertTrue(all(call.kwargs == {"count": 0} for call in record.call_args_list[1:]))
+
+
+class SpellingTests(SimpleTestCase):
+    VOCABULARY = [("management", 40), ("manager", 9), ("risk", 30), ("risks", 2), ("rusk", 5), ("planning", 12), ("prince", 3), ("rare", 1)]
+
+    def setUp(self) -> None:
+        root = Path(self.enterContext(tempfile.TemporaryDirectory())) / "spelling"
+        self.enterContext(override_settings(PMHUB_SPELLING={"ROOT": root}))
+        self.enterContext(mock.patch.object(spelling, "vocabulary", return_value=self.VOCABULARY))
+        self.addCleanup(spelling._index.update, key=None)
+        self.meta = spelling.build()
+
+    def test_deletes(self) -> None:
+        self.assertEqual(spelling._deletes("abc", 1), {"abc", "bc", "ac", "ab"})
+        self.assertEqual(spelling._deletes("abc", 2), {"abc", "bc", "ac", "ab", "a", "b", "c"})
+        self.assertEqual(spelling._deletes("a", 2), {"a"})
+
+    def test_index_holds_every_delete_of_each_frequent_term(self) -> None:
+        self.assertEqual(self.meta["terms"], 7)  # "rare" is below MIN_DOCS
+        root = spelling.spelling_settings()["ROOT"]
+        terms = [t.decode() for t in spelling.np.load(root / "terms.npy")]
+        self.assertEqual(terms, sorted(t for t, n in self.VOCABULARY if n >= 2))
+        keys, postings = spelling.np.load(root / "keys.npy"), spelling.np.load(root / "postings.npy")
+        self.assertTrue((keys[:-1] <= keys[1:]).all())
+        expected = {(key, terms.index("risk")) for key in spelling._hashes(spelling._deletes("risk", 2)).tolist()}
+        self.assertLessEqual(expected, set(zip(keys.tolist(), postings.tolist())))
+        self.assertFalse(root.with_name("spelling.tmp").exists())
+
+    def test_correct_word(self) -> None:
+        self.assertEqual(spelling.correct_word("managment"), "management")
+        self.assertEqual(spelling.correct_word("Planing"), "planning")
+        self.assertIsNone(spelling.correct_word("risk"))  # already indexed
+        self.assertIsNone(spelling.correct_word("xylophone"))
+        self.assertEqual(spelling.correct_word("rask"), "risk")  # tie with "rusk": the more frequent term wins
+        self.assertIsNone(spelling.correct_word("rar"))  # "rare" is not indexed
+
+    def test_correct_query_leaves_filters_prefixes_and_operators_alone(self) -> None:
+        self.assertEqual(spelling.correct_query("risk managment"), "risk management")
+        self.assertEqual(spelling.correct_query('"risk managment" OR planing'), '"risk management" OR planning')
+        self.assertEqual(spelling.correct_query("managment standard:prinse in:planing"), "management standard:prinse in:planing")
+        self.assertEqual(spelling.correct_query("(Standard:prinse managment)"), "(Standard:prinse management)")
+        self.assertIsNone(spelling.correct_query("managm* NOT risk"))
+        # Tokens split where page_fts splits them: underscores too, and digits stay part of a token.
+        self.assertEqual(spelling.correct_query("risk_managment planing-based"), "risk_management planning-based")
+        self.assertEqual(spelling.correct_query("managment's"), "management's")
+        self.assertIsNone(spelling.correct_query("managment2 ISO21500"))
+        self.assertIsNone(spelling.correct_query("standard:managment"))
+        self.assertIsNone(spelling.correct_query(""))
+
+
+@override_settings(PMHUB_SNAPSHOTS={"ENABLED": False})
+class SessionTests(GuideTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        cls.page = Page.objects.create(standard=cls.guide, page_index=0, content="Risk register")
+
+    def test_legacy_session_key_becomes_the_bookmark_key(self) -> None:
+        legacy = "0123456789abcdefghijklmnopqrstuv"
+        Bookmark.objects.create(session_key=legacy, page=self.page)
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = legacy
+
+        response = self.client.get(reverse("standards:bookmarks"))
+        self.assertEqual([b.page_id for b in response.context["items"]], [self.page.id])
+        signed = response.cookies[settings.SESSION_COOKIE_NAME].value
+        self.assertNotEqual(signed, legacy)
+        self.assertEqual(self.client.session["bookmark_key"], legacy)
+
+        response = self.client.get(reverse("standards:bookmarks"))
+        self.assertEqual([b.page_id for b in response.context["items"]], [self.page.id])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_unknown_cookie_is_not_adopted(self) -> None:
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "not-a-legacy-key"
+        response = self.client.get(reverse("standards:bookmarks"))
+        self.assertEqual(list(response.context["items"]), [])
+        self.assertNotIn("bookmark_key", self.client.session)
+
+    def test_anonymous_get_sets_no_cookie_and_writes_nothing(self) -> None:
+        urls = [reverse("standards:library"), reverse("standards:page", args=["guide", 0]), reverse("standards:bookmarks")]
+        for url in urls:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+                writes = [q["sql"] for q in queries if not q["sql"].lstrip().upper().startswith(("SELECT", "SAVEPOINT", "RELEASE"))]
+                self.assertEqual(writes, [])
+
+    def test_toggling_a_bookmark_issues_the_cookie(self) -> None:
+        response = self.client.post(reverse("standards:toggle_bookmark", args=[self.page.id]))
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        key = self.client.session["bookmark_key"]
+        self.assertTrue(Bookmark.objects.filter(session_key=key, page=self.page).exists())
+        self.assertFalse(Session.objects.exists())
+
+
+@override_settings(PMHUB_SNAPSHOTS={"ENABLED": False})
+class HttpCachingTests(GuideTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        cls.page = Page.objects.create(standard=cls.guide, page_index=0, content="Risk register")
+        cls.url = reverse("standards:page", args=[cls.guide.slug, 0])
+
+    def etag(self) -> str:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_repeat_get_is_not_modified(self) -> None:
+        self.client.get(self.url)  # the first visit only sets the CSRF cookie the ETag covers
+        etag = self.etag()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_etag_changes_with_bookmarks_and_corpus_version(self) -> None:
+        self.client.get(self.url)
+        before = self.etag()
+        self.client.post(reverse("standards:toggle_bookmark", args=[self.page.id]))
+        bookmarked = self.etag()
+        self.assertNotEqual(bookmarked, before)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=before).status_code, 200)
+        CorpusVersion.bump()
+        self.assertNotEqual(self.etag(), bookmarked)
+
+
+class CompressionTests(SimpleTestCase):
+    def compress(self, body: bytes, content_type: str) -> HttpResponse:
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        middleware = http.CompressionMiddleware(lambda request: HttpResponse(body, content_type=content_type))
+        return middleware(request)
+
+    def test_large_text_is_gzipped(self) -> None:
+        response = self.compress(b"risk " * 400, "text/html; charset=utf-8")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_small_bodies_and_other_types_are_left_alone(self) -> None:
+        small = b"risk " * (http.DEFAULTS["COMPRESS_MIN_SIZE"] // 5 - 1)
+        for body, content_type in [(small, "text/html"), (b"\x89PNG" * 600, "image/png"), (b"%PDF" * 600, "application/pdf")]:
+            with self.subTest(content_type=content_type, size=len(body)):
+                response = self.compress(body, content_type)
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(response.content, body)
+
+
+class ExportTests(GuideTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        manual = Standard.objects.create(title="Manual", file_path="manual.epub", source_type="epub")
+        Page.objects.bulk_create([
+            Page(standard=manual, page_index=1, content="Benefits review"),
+            Page(standard=cls.guide, page_index=2, content="Issue log", content_html="<p>Issue log</p>"),
+            Page(standard=cls.guide, page_index=0, content="Risk register", section_hint="1 Scope"),
+            Page(standard=manual, page_index=0, content="Stakeholders"),
+            Page(standard=cls.guide, page_index=1, content="Lessons"),
+        ])
+        cls.staff = User.objects.create_user("staff", password="x", is_staff=True)
+
+    def keys(self, rows) -> list:  # type: ignore[no-untyped-def]
+        return [(row["standard"], row["page_index"]) for row in rows]
+
+    def test_records_order_and_filters(self) -> None:
+        self.assertEqual(
+            self.keys(export.records()),
+            [("guide", 0), ("guide", 1), ("guide", 2), ("manual", 0), ("manual", 1)],
+        )
+        self.assertEqual(self.keys(export.records(["manual"])), [("manual", 0), ("manual", 1)])
+        self.assertEqual(self.keys(export.records(first_page=1, last_page=1)), [("guide", 1), ("manual", 1)])
+        self.assertEqual(self.keys(export.records(["guide"], first_page=2)), [("guide", 2)])
+
+    def test_record_fields_and_hashes(self) -> None:
+        first, _, third = list(export.records(["guide"], html=True))
+        self.assertEqual(first["content_sha256"], hashlib.sha256(b"Risk register").hexdigest())
+        self.assertEqual((first["standard_title"], first["source_type"], first["section_hint"], first["chars"]),
+                         ("Guide", "pdf", "1 Scope", 13))
+        self.assertEqual(third["content_html"], "<p>Issue log</p>")
+        self.assertEqual(third["content_html_sha256"], hashlib.sha256(b"<p>Issue log</p>").hexdigest())
+        self.assertIsNone(first["content_html_sha256"])
+        self.assertNotIn("content_html", next(export.records()))
+
+    def test_write_jsonl_round_trips(self) -> None:
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                out = io.BytesIO()
+                self.assertEqual(export.write_jsonl(export.records(), out, compress=compress), 5)
+                data = gzip.decompress(out.getvalue()) if compress else out.getvalue()
+                rows = [json.loads(line) for line in data.splitlines()]
+                self.assertEqual(rows, list(export.records()))
+
+    def test_command_renames_into_place(self) -> None:
+        root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        call_command("export_corpus", output=str(root / "corpus.jsonl.gz"), slugs=["guide"], stderr=io.StringIO())
+        self.assertEqual([p.name for p in root.iterdir()], ["corpus.jsonl.gz"])
+        with gzip.open(root / "corpus.jsonl.gz") as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+    def test_command_failure_leaves_no_partial_file(self) -> None:
+        root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+        def fail(rows, out, compress=False):  # type: ignore[no-untyped-def]
+            out.write(b"{partial")
+            raise RuntimeError("disk full")
+
+        with mock.patch.object(export, "write_jsonl", fail), self.assertRaises(RuntimeError):
+            call_command("export_corpus", output=str(root / "corpus.jsonl"), stderr=io.StringIO())
+        self.assertEqual(list(root.iterdir()), [])
+
+        with mock.patch.dict("sys.modules", {"pyarrow": None}), self.assertRaises(CommandError):
+            call_command("export_corpus", output=str(root / "corpus.parquet"), stderr=io.StringIO())
+        self.assertEqual(list(root.iterdir()), [])
+
+    def test_streamed_export_reads_the_requests_snapshot(self) -> None:
+        self.client.force_login(self.staff)
+        self.enterContext(mock.patch.object(snapshots, "current", return_value=Path("corpus.sqlite3")))
+        self.enterContext(mock.patch.object(snapshots, "fresh", return_value=True))
+        self.enterContext(mock.patch.object(snapshots, "bind"))
+        records = self.enterContext(mock.patch.object(export, "records", return_value=iter([{"page_id": 1}])))
+
+        response = self.client.get(reverse("standards:export_corpus"))
+        self.assertIsNone(snapshots.reading())  # the middleware is done before the body is read
+        self.assertEqual(b"".join(response.streaming_content), b'{"page_id": 1}\n')
+        self.assertEqual(records.call_args.kwargs["using"], snapshots.ALIAS)
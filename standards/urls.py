@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import flight, profiling, views
 
 
 urlpatterns = [
@@ -12,7 +12,17 @@ urlpatterns = [
     path("tailor/", views.tailor, name="tailor"),
     path("process-diagram/", views.process_diagram, name="process_diagram"),
     path("process-document/", views.process_document, name="process_document"),
+    path("jobs/", views.ingest_jobs, name="ingest_jobs"),
+    path("jobs/<int:job_id>/", views.ingest_job, name="ingest_job"),
+    path("jobs/<int:job_id>/cancel/", views.cancel_ingest_job, name="cancel_ingest_job"),
+    path("export/corpus.jsonl", views.export_corpus, name="export_corpus"),
+    path("profiling/", profiling.stats_view, name="profiling_stats"),
+    path("flight/", flight.stats_view, name="flight_stats"),
+    path("stats/", views.corpus_stats, name="corpus_stats"),
+    path("definitions/", views.definitions, name="definitions"),
     path("pdf/<slug:slug>/", views.pdf_file, name="pdf_file"),
+    path("figures/<path:name>", views.figure, name="figure"),
+    path("<slug:slug>/graph/", views.clause_graph, name="clause_graph"),
     path("<slug:slug>/page/<int:page_index>/", views.page_view, name="page"),
 ]
 